@@ -26,13 +26,32 @@ class LPFConfig:
     ray_resolution: float = 10.0   # degrees
     bounces: int = 2               # >=1
     source_origin: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    phi_span: Optional[float] = None        # degrees, None -> source_angle (기존 동작), 360 -> 전체 방위각
+    phi_resolution: Optional[float] = None  # degrees, None -> ray_resolution
+
+    def resolutions(self) -> Tuple[float, float]:
+        """(theta_res, phi_res) degrees."""
+        return self.ray_resolution, (self.phi_resolution if self.phi_resolution is not None else self.ray_resolution)
+
+    def phi_extent(self) -> float:
+        return self.phi_span if self.phi_span is not None else self.source_angle
 
     def compute_size(self) -> Tuple[int, int]:
         import math
         if not (1 <= self.source_angle <= 180):
             raise ValueError("source_angle must be in [1,180]")
-        if not (0.001 <= self.ray_resolution <= 20):
+        theta_res, phi_res = self.resolutions()
+        if not (0.001 <= theta_res <= 20):
             raise ValueError("ray_resolution must be in [0.001,20]")
-        size = int(math.floor(self.source_angle / self.ray_resolution) + 1)
-        return size, size
-
+        if not (0.001 <= phi_res <= 20):
+            raise ValueError("phi_resolution must be in [0.001,20]")
+        phi_span = self.phi_extent()
+        if not (1 <= phi_span <= 360):
+            raise ValueError("phi_span must be in [1,360]")
+        H = int(math.floor(self.source_angle / theta_res) + 1)
+        if phi_span >= 360:
+            # 0 과 360 은 같은 방향 → 끝점 제외
+            W = int(math.ceil(360.0 / phi_res - 1e-9))
+        else:
+            W = int(math.floor(phi_span / phi_res) + 1)
+        return H, W
@@ -0,0 +1,289 @@
+"""Adaptive LPF (quadtree 인덱스 각도 샘플링)
+
+목적:
+  - 균일 LPF 는 source 에너지가 없는 영역까지 같은 해상도로 채움 → 좁은 빔 LED 에서 셀 낭비
+  - 거친 base 격자에서 시작해 에너지 변화(gradient)나 LAD 오차가 큰 leaf 만 4분할
+
+각도 영역:
+  - theta ∈ [0, source_angle], phi ∈ [0, phi_span) (phi_span=360 이면 전체 방위각)
+  - base 격자: ceil(source_angle/ray_resolution) x ceil(phi_span/phi_resolution) 개의 '면적 셀'
+  - level L leaf (qi,qj) 의 크기 = base 셀 / 2^L, 광선은 leaf 중심 방향
+
+Quadtree 인덱스 (linear quadtree):
+  - 최대 level Lmax 격자에서의 leaf 시작 좌표 (qi<<(Lmax-L), qj<<(Lmax-L)) 의 Morton 코드가 key
+  - 정렬된 key 위에서 leaf 는 [key, key + 4^(Lmax-L)) 연속 구간 → locate() 는 searchsorted 한 번
+
+에너지:
+  - leaf 에너지 = 분포 밀도(중심) x 입체각 (cos θ0 - cos θ1)·Δφ, 전체 합 1 로 정규화
+  - 셀 크기가 달라도 총 에너지가 해상도에 의존하지 않음 (균일 LPF 와 달리 입체각 가중)
+
+저장:
+  - leaf 들은 LPFBuffers (cell shape (N,)) 에 key 순서로 저장 → 균일 LPF 와 같은 SoA 배열/연산 재사용
+  - 추적 기록: append_interactions(leaf_idx, ...) / append_interactions_at(theta, phi, ...) / update_steps(step, mask (N,), ...)
+    (LPFBuffers.append_steps / update_steps 공유, bounce 한도와 중복 검사 동일), connectivity_violations()
+  - refine() 은 버퍼를 다시 할당 → 기록된 leaf 인덱스는 무효
+"""
+
+from __future__ import annotations
+from typing import Optional, Tuple, Callable, Any
+import math
+import numpy as np
+from loda.config import LPFConfig
+from loda.fields.lpf import LPFBuffers, evaluate_distribution
+from loda.utils.math3d import sph_to_cart_array
+
+
+def _part1by1(x: np.ndarray) -> np.ndarray:
+	# 32bit 정수의 비트 사이에 0 삽입 (Morton 인코딩용)
+	x = np.asarray(x, dtype=np.uint64) & np.uint64(0xFFFFFFFF)
+	x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+	x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+	x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+	x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+	x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+	return x
+
+
+def morton_encode(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+	"""(i,j) -> Morton(Z-order) 코드 uint64. i 가 상위 비트."""
+	return (_part1by1(i) << np.uint64(1)) | _part1by1(j)
+
+
+class AdaptiveLPF:
+	"""quadtree 로 적응 세분화되는 LPF. leaf 별 광 경로를 LPFBuffers (N,) 에 저장."""
+
+	def __init__(self, cfg: LPFConfig, max_level: int = 4):
+		if not (0 <= max_level <= 20):
+			raise ValueError("max_level must be in [0,20]")
+		cfg.compute_size()  # 범위 검증
+		self.cfg = cfg
+		self.max_level = max_level
+		theta_res, phi_res = cfg.resolutions()
+		self.theta_span = float(cfg.source_angle)
+		self.phi_span = float(cfg.phi_extent())
+		self.H0 = int(math.ceil(self.theta_span / theta_res - 1e-9))
+		self.W0 = int(math.ceil(self.phi_span / phi_res - 1e-9))
+		self.dtheta0 = self.theta_span / self.H0  # deg
+		self.dphi0 = self.phi_span / self.W0      # deg
+		if max(self.H0, self.W0) << max_level >= 1 << 32:
+			# Morton key 는 좌표당 32bit (_part1by1) → 넘으면 key 가 겹침
+			raise ValueError(f"base grid {self.H0}x{self.W0} at max_level {max_level} exceeds 32-bit quadtree coordinates")
+		qi, qj = np.meshgrid(np.arange(self.H0), np.arange(self.W0), indexing='ij')
+		self._set_leaves(np.zeros(qi.size, dtype=np.int8), qi.ravel().astype(np.int64), qj.ravel().astype(np.int64))
+		self.buf = LPFBuffers.allocate((self.n_leaves,), cfg.bounces)
+		self._distribution: Optional[Callable[[Any, Any], Any]] = None
+		self._vectorized: Optional[bool] = None
+
+	# ---------------- quadtree 인덱스 ----------------
+	@property
+	def n_leaves(self) -> int:
+		return int(self.level.size)
+
+	def _set_leaves(self, level: np.ndarray, qi: np.ndarray, qj: np.ndarray) -> np.ndarray:
+		"""leaf 배열을 key 순으로 정렬해 저장. 반환: 정렬 순서 (입력 인덱스)."""
+		shift = (self.max_level - level.astype(np.int64)).astype(np.uint64)
+		keys = morton_encode(qi.astype(np.uint64) << shift, qj.astype(np.uint64) << shift)
+		order = np.argsort(keys, kind='stable')
+		self.level, self.qi, self.qj = level[order], qi[order], qj[order]
+		self.keys = keys[order]
+		self.key_span = np.uint64(1) << (np.uint64(2) * shift[order])
+		return order
+
+	def leaf_bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+		"""(theta0, theta1, phi0, phi1) degrees, 각각 (N,)."""
+		scale = 2.0 ** -self.level.astype(np.float64)
+		dth, dph = self.dtheta0 * scale, self.dphi0 * scale
+		th0, ph0 = self.qi * dth, self.qj * dph
+		return th0, th0 + dth, ph0, ph0 + dph
+
+	def leaf_centers(self) -> Tuple[np.ndarray, np.ndarray]:
+		th0, th1, ph0, ph1 = self.leaf_bounds()
+		return 0.5 * (th0 + th1), 0.5 * (ph0 + ph1)
+
+	def solid_angle(self) -> np.ndarray:
+		"""leaf 별 입체각 (sr)."""
+		th0, th1, ph0, ph1 = self.leaf_bounds()
+		return (np.cos(np.radians(th0)) - np.cos(np.radians(th1))) * np.radians(ph1 - ph0)
+
+	def locate(self, theta_deg, phi_deg) -> np.ndarray:
+		"""각 방향을 포함하는 leaf 인덱스 (영역 밖 / 제거된 영역은 -1)."""
+		theta_deg = np.asarray(theta_deg, dtype=np.float64)
+		phi_deg = np.asarray(phi_deg, dtype=np.float64)
+		if self.phi_span >= 360:
+			phi_deg = np.mod(phi_deg, 360.0)
+		n = 1 << self.max_level
+		fi = np.floor(theta_deg / self.dtheta0 * n).astype(np.int64)
+		fj = np.floor(phi_deg / self.dphi0 * n).astype(np.int64)
+		fi = np.where(theta_deg == self.theta_span, self.H0 * n - 1, fi)  # theta 상한 포함
+		if self.phi_span < 360:
+			fj = np.where(phi_deg == self.phi_span, self.W0 * n - 1, fj)  # phi 상한도 포함 (360 은 wrap)
+		inside = (fi >= 0) & (fi < self.H0 * n) & (fj >= 0) & (fj < self.W0 * n)
+		key = morton_encode(np.clip(fi, 0, None), np.clip(fj, 0, None))
+		idx = np.searchsorted(self.keys, key, side='right') - 1
+		hit = inside & (idx >= 0)
+		safe = np.clip(idx, 0, None)
+		hit &= key < self.keys[safe] + self.key_span[safe]
+		return np.where(hit, idx, -1)
+
+	# ---------------- 세분화 ----------------
+	@staticmethod
+	def _children(level, qi, qj):
+		a = np.array([0, 0, 1, 1], dtype=np.int64)
+		b = np.array([0, 1, 0, 1], dtype=np.int64)
+		lv = np.repeat(level + 1, 4).astype(np.int8)
+		ci = (2 * qi[:, None] + a[None, :]).ravel()
+		cj = (2 * qj[:, None] + b[None, :]).ravel()
+		return lv, ci, cj
+
+	def _density(self, th_deg: np.ndarray, ph_deg: np.ndarray) -> np.ndarray:
+		return np.maximum(evaluate_distribution(self._distribution, th_deg, ph_deg, self._vectorized), 0.0)
+
+	def _probe(self) -> Tuple[np.ndarray, np.ndarray]:
+		"""leaf 중심 밀도 (N,) 와 4개 자식 중심 밀도 (N,4)."""
+		th0, th1, ph0, ph1 = self.leaf_bounds()
+		thc, phc = 0.5 * (th0 + th1), 0.5 * (ph0 + ph1)
+		qt, qp = 0.25 * (th1 - th0), 0.25 * (ph1 - ph0)
+		cth = thc[:, None] + np.array([-1, -1, 1, 1])[None, :] * qt[:, None]
+		cph = phc[:, None] + np.array([-1, 1, -1, 1])[None, :] * qp[:, None]
+		return self._density(thc, phc), self._density(cth, cph)
+
+	def gradient_criterion(self, threshold: float) -> np.ndarray:
+		"""에너지 변화 기준: max|ρ_child - ρ_center| / max ρ > threshold 인 leaf (N,) bool."""
+		if self._distribution is None:
+			raise RuntimeError("build_from_source_distribution() first")
+		dc, dk = self._probe()
+		peak = max(float(dc.max(initial=0.0)), float(dk.max(initial=0.0)))
+		if peak <= 0:
+			return np.zeros(self.n_leaves, dtype=bool)
+		return np.abs(dk - dc[:, None]).max(axis=1) / peak > threshold
+
+	def refine(self, mask: np.ndarray) -> int:
+		"""mask (N,) 가 True 인 leaf 를 4분할 (max_level 인 leaf 는 무시). 반환: 분할된 leaf 수.
+
+		분할되지 않은 leaf 는 모든 step 을 유지한다. 자식은 첫 step 만 가지며,
+		부모의 첫 step 에너지를 자식의 (밀도 x 입체각) 비율로 나눠 받는다 (총 에너지 보존, 재추적 필요).
+		"""
+		mask = np.asarray(mask, dtype=bool) & (self.level < self.max_level)
+		n_split = int(mask.sum())
+		if n_split == 0:
+			return 0
+		old_buf, old_n = self.buf, self.n_leaves
+		keep = np.nonzero(~mask)[0]
+		parents = np.nonzero(mask)[0]
+		lv, ci, cj = self._children(self.level[parents], self.qi[parents], self.qj[parents])
+		order = self._set_leaves(
+			np.concatenate([self.level[keep], lv]),
+			np.concatenate([self.qi[keep], ci]),
+			np.concatenate([self.qj[keep], cj]),
+		)
+		src = np.concatenate([keep, np.repeat(parents, 4)])[order]     # 새 leaf -> 원래 leaf
+		is_child = (np.arange(order.size) >= keep.size)[order]
+		self.buf = LPFBuffers.allocate((self.n_leaves,), self.cfg.bounces)
+		kept = np.nonzero(~is_child)[0]
+		for name, arr in self.buf.arrays().items():
+			arr[kept] = old_buf.arrays()[name][src[kept]]
+		child = np.nonzero(is_child)[0]
+		w = self.solid_angle()[child]
+		if self._distribution is not None:
+			thc, phc = self.leaf_centers()
+			w = w * self._density(thc[child], phc[child])
+		parent_of = src[child]
+		w_sum = np.bincount(parent_of, weights=w, minlength=old_n)[parent_of]
+		frac = np.where(w_sum > 0, w / np.where(w_sum > 0, w_sum, 1.0), 0.25)
+		self._init_first_step(child, old_buf.energy[parent_of, 0] * frac)
+		return n_split
+
+	def refine_by_error(self, error: np.ndarray, threshold: float) -> int:
+		"""leaf 별 외부 오차 (예: LAD 오차) 가 threshold 를 넘는 leaf 분할."""
+		return self.refine(np.asarray(error) > threshold)
+
+	# ---------------- 초기화 ----------------
+	def _init_first_step(self, idx: np.ndarray, energies: np.ndarray):
+		thc, phc = self.leaf_centers()
+		self.buf.clear(idx)
+		self.buf.vertex[idx, 0] = np.asarray(self.cfg.source_origin, dtype=np.float32)
+		self.buf.theta[idx, 0] = np.radians(thc[idx])
+		self.buf.phi[idx, 0] = np.radians(phc[idx])
+		self.buf.energy[idx, 0] = energies
+		self.buf.n_steps[idx] = 1
+
+	def build_from_source_distribution(self, distribution: Callable[[Any, Any], Any], vectorized: Optional[bool] = None, grad_threshold: float = 0.05, drop_empty: bool = True):
+		"""base 격자에서 시작해 gradient_criterion 이 참인 leaf 를 max_level 까지 반복 분할 후 첫 step 초기화.
+		drop_empty=True 면 중심/자식 probe 가 모두 0 인 leaf 는 제거 (광선 없음, locate() 는 -1).
+		"""
+		self._distribution = distribution
+		self._vectorized = vectorized
+		while True:
+			dc, dk = self._probe()
+			if drop_empty:
+				alive = (dc > 0) | (dk > 0).any(axis=1)
+				if not alive.all() and alive.any():
+					self._set_leaves(self.level[alive], self.qi[alive], self.qj[alive])
+					dc, dk = dc[alive], dk[alive]
+			peak = max(float(dc.max(initial=0.0)), float(dk.max(initial=0.0)))
+			if peak <= 0:
+				break
+			mask = (np.abs(dk - dc[:, None]).max(axis=1) / peak > grad_threshold) & (self.level < self.max_level)
+			if not mask.any():
+				break
+			keep = ~mask
+			lv, ci, cj = self._children(self.level[mask], self.qi[mask], self.qj[mask])
+			self._set_leaves(
+				np.concatenate([self.level[keep], lv]),
+				np.concatenate([self.qi[keep], ci]),
+				np.concatenate([self.qj[keep], cj]),
+			)
+		thc, phc = self.leaf_centers()
+		e = self._density(thc, phc) * self.solid_angle()
+		total = e.sum()
+		if total <= 0:
+			# 균일(입체각 비례) fall-back
+			e = self.solid_angle()
+			total = e.sum()
+		self.buf = LPFBuffers.allocate((self.n_leaves,), self.cfg.bounces)
+		self._init_first_step(np.arange(self.n_leaves), e / total)
+
+	# ---------------- 업데이트 (leaf 인덱스) ----------------
+	def _leaves(self, leaf_idx) -> np.ndarray:
+		idx = np.asarray(leaf_idx, dtype=np.intp).ravel()
+		if idx.size and (idx.min() < 0 or idx.max() >= self.n_leaves):
+			raise IndexError("leaf index out of range (locate() 결과 -1 포함?)")
+		return idx
+
+	def append_interactions(self, leaf_idx, vertices: np.ndarray, theta, phi, energy, final_vertices: Optional[np.ndarray] = None, strict: bool = True) -> np.ndarray:
+		"""wavefront 일괄 append. leaf_idx (N,) 는 locate() 결과, 나머지 인자/반환은 LPF.append_interactions 와 같다."""
+		return self.buf.append_steps(self._leaves(leaf_idx), vertices, theta, phi, energy, final_vertices, strict)
+
+	def append_interactions_at(self, theta_deg, phi_deg, vertices: np.ndarray, theta, phi, energy, final_vertices: Optional[np.ndarray] = None, strict: bool = True) -> np.ndarray:
+		"""광원 방향 (theta_deg, phi_deg) 으로 leaf 를 찾아 append (locate() + append_interactions)."""
+		return self.append_interactions(self.locate(theta_deg, phi_deg), vertices, theta, phi, energy, final_vertices, strict)
+
+	def update_steps(self, step_index, mask: np.ndarray, *, vertex: Optional[np.ndarray] = None, theta=None, phi=None, energy=None, final_vertex: Optional[np.ndarray] = None):
+		"""mask (N,) 가 True 인 leaf 의 step 일괄 수정. 값은 스칼라, leaf 전체 (N,) / (N,3) 또는 True leaf 순서로 압축된 배열."""
+		mask = np.asarray(mask, dtype=bool)
+		if mask.shape != (self.n_leaves,):
+			raise ValueError("mask shape must be (n_leaves,)")
+		self.buf.update_steps(step_index, mask, vertex=vertex, theta=theta, phi=phi, energy=energy, final_vertex=final_vertex)
+
+	# ---------------- 검증 ----------------
+	def step_mask(self) -> np.ndarray:
+		"""(N,b) bool: 실제로 채워진 step 위치."""
+		return self.buf.step_mask()
+
+	def connectivity_violations(self, tol: float = 1e-6, per_segment: bool = False) -> np.ndarray:
+		"""leaf 별 연결성 위반 (N,) bool (per_segment 면 (N,b-1))."""
+		return self.buf.connectivity_violations(tol, per_segment)
+
+	# ---------------- 쿼리/통계 ----------------
+	def energy_sum(self) -> float:
+		return float(np.sum(self.buf.energy, where=self.step_mask(), dtype=np.float64))
+
+	def distribution(self, step: int = 0) -> np.ndarray:
+		"""leaf 별 step 에너지 (N,) float32 (없는 step 은 0)."""
+		if not (0 <= step < self.buf.bounces):
+			return np.zeros(self.n_leaves, dtype=np.float32)
+		return np.where(self.buf.n_steps > step, self.buf.energy[:, step], 0.0).astype(np.float32)
+
+	def directions(self) -> np.ndarray:
+		"""(N,b,3) float32 단위 방향 벡터."""
+		return sph_to_cart_array(self.buf.theta, self.buf.phi)
@@ -6,6 +6,8 @@
 
 메트릭스 정의:
   - 행/열 크기 = floor(source_angle / ray_resolution) + 1
+    (phi_span / phi_resolution 지정 시 열 크기는 phi 기준, phi_span=360 이면 끝점 제외)
+  - 적응형(quadtree) 샘플링은 loda.fields.adaptive_lpf.AdaptiveLPF 참고
   - 각 셀(row=i, col=j)는 하나의 RayPath를 가진다.
   - RayPath는 최대 b (bounce 수) 단계의 ray_data 시퀀스 + 마지막 도착 절점을 포함할 수 있다.
 
@@ -24,23 +26,40 @@ Config 파라미터:
 
 핵심 메서드:
   - LPFConfig.compute_size() → (H,W)
-  - LPF.build_from_source_distribution(dist_func)
+  - LPF.build_from_source_distribution(dist_func, vectorized=None)  (배열 분포 함수 일괄 평가)
   - get_path(i,j) / set_path(i,j,path)
-  - update_ray_step(i,j,step, new_data)
-  - enforce_connectivity(path)
-  - export_numpy() 직렬화
+  - update_ray_step(i,j,step, new_data) / update_steps(step, mask, ...) (마스크 일괄 수정)
+  - append_interaction(i,j,...) / append_interactions(idx_i, idx_j, ...) (wavefront 일괄 append)
+  - enforce_connectivity(path) / connectivity_violations() (전체 필드 위반 마스크)
+  - export_numpy() 직렬화 (dict/list 형태)
+  - save(dir) / LPF.load(dir, mmap_mode='r') 바이너리 저장 (header.json + 배열별 .npy, memmap 로드)
+
+저장 구조 (Structure-of-Arrays):
+  - 셀별 Python 객체 대신 LPFBuffers 가 (H,W,b,...) float32 배열을 미리 할당
+      vertex (H,W,b,3), theta/phi/energy (H,W,b), final_vertex (H,W,b,3), n_steps (H,W)
+  - final_vertex 가 없는 단계는 NaN 으로 표시
+  - 일괄 기록/검증 (append_steps / update_steps / connectivity_violations) 은 LPFBuffers 에 있고
+    LPF (셀 (H,W)) 와 AdaptiveLPF (leaf (N,)) 가 공유
+  - get_path(i,j) 는 RayPathView (버퍼 위의 뷰)를 반환 → 기존 호출부 호환
+  - 셀당 메모리: b*36 + 2 bytes
 
 NOTE:
-  - 방향 표현: 내부 저장은 (theta, phi) (라디안). 필요 시 3D 벡터 변환 헬퍼 추가 예정.
-  - 성능 최적화(NumPy 벡터화, torch 변환)는 후속 단계.
+  - 방향 표현: 내부 저장은 (theta, phi) (라디안). directions() 가 (H,W,b,3) cartesian 캐시 제공
+    (theta/phi 변경 시에만 재계산), 배열 변환은 sph_to_cart_array / cart_to_sph_array.
+  - torch 연동: as_tensors(device) 는 CPU 에서 torch.from_numpy 로 버퍼와 메모리 공유 (복사 없음),
+    GPU 등 다른 device 결과는 write_back(tensors) 로 버퍼에 제자리 반영.
 """
 
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from typing import Optional, List, Tuple, Callable, Dict, Any
+import json
 import math
+import os
 import numpy as np
 from loda.config import LPFConfig
+from loda.utils.grid import uniform_angle_grid
+from loda.utils.math3d import sph_to_cart_array, cart_to_sph_array
 
 @dataclass
 class RayData:
@@ -96,18 +115,354 @@ class RayPath:
 				raise ValueError(f"Connectivity violation at segment {i}->{i+1}")
 
 
+# ---------------- SoA 저장소 ----------------
+BUFFER_NAMES = ('vertex', 'theta', 'phi', 'energy', 'final_vertex', 'n_steps')
+
+@dataclass
+class LPFBuffers:
+	"""LPF 전체 필드를 담는 연속 배열 묶음.
+
+	셀 차원(cell shape) 뒤에 step 축(b)이 붙는다. LPF 는 cell shape=(H,W).
+	final_vertex 의 NaN 은 '도착 절점 없음'을 뜻한다.
+	"""
+	vertex: np.ndarray        # (*cell, b, 3) float32
+	theta: np.ndarray         # (*cell, b) float32 (rad)
+	phi: np.ndarray           # (*cell, b) float32 (rad)
+	energy: np.ndarray        # (*cell, b) float32
+	final_vertex: np.ndarray  # (*cell, b, 3) float32, NaN = None
+	n_steps: np.ndarray       # (*cell,) int16
+	angle_version: int = field(default=0, compare=False)  # theta/phi 변경 카운터 (방향 캐시 무효화용)
+
+	@classmethod
+	def allocate(cls, shape: Tuple[int, ...], bounces: int) -> 'LPFBuffers':
+		shape = tuple(shape)
+		return cls(
+			vertex=np.zeros(shape + (bounces, 3), dtype=np.float32),
+			theta=np.zeros(shape + (bounces,), dtype=np.float32),
+			phi=np.zeros(shape + (bounces,), dtype=np.float32),
+			energy=np.zeros(shape + (bounces,), dtype=np.float32),
+			final_vertex=np.full(shape + (bounces, 3), np.nan, dtype=np.float32),
+			n_steps=np.zeros(shape, dtype=np.int16),
+		)
+
+	@property
+	def shape(self) -> Tuple[int, ...]:
+		return self.n_steps.shape
+
+	@property
+	def bounces(self) -> int:
+		return self.theta.shape[-1]
+
+	@property
+	def nbytes(self) -> int:
+		return sum(a.nbytes for a in self.arrays().values())
+
+	def arrays(self) -> Dict[str, np.ndarray]:
+		return {
+			'vertex': self.vertex,
+			'theta': self.theta,
+			'phi': self.phi,
+			'energy': self.energy,
+			'final_vertex': self.final_vertex,
+			'n_steps': self.n_steps,
+		}
+
+	def save(self, directory: str):
+		"""배열마다 <name>.npy 로 저장 (연속 레이아웃, np.load mmap 가능)."""
+		os.makedirs(directory, exist_ok=True)
+		for name, arr in self.arrays().items():
+			np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(arr))
+
+	@classmethod
+	def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'LPFBuffers':
+		"""save() 결과 로드. mmap_mode='r'/'r+'/'c' 면 np.memmap 기반 (접근한 페이지만 읽음), None 이면 메모리로 읽음."""
+		arrs = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode) for name in BUFFER_NAMES}
+		return cls(**arrs)
+
+	def touch_angles(self):
+		"""theta/phi 가 바뀌었음을 표시 (LPF.directions() 캐시 무효화). 배열을 직접 수정했다면 호출할 것."""
+		self.angle_version += 1
+
+	def append_steps(self, flat, vertices: np.ndarray, theta, phi, energy, final_vertices: Optional[np.ndarray] = None, strict: bool = True) -> np.ndarray:
+		"""평탄 셀 인덱스 flat (N,) 에 다음 step 일괄 기록 (LPF.append_interactions 의 본체, 인자 규칙 동일)."""
+		flat = np.asarray(flat, dtype=np.intp).ravel()
+		n = flat.size
+		b = self.bounces
+		if n > 1 and np.unique(flat).size != n:  # O(n log n), 필드 크기와 무관
+			raise ValueError("append_interactions: duplicate cells in one batch")
+		n_steps = self.n_steps.reshape(-1)
+		k = n_steps[flat].astype(np.intp)
+		ok = k < b
+		if strict and not ok.all():
+			raise ValueError(f"Cannot append: max bounces reached for {int((~ok).sum())} cell(s)")
+		vertices = np.broadcast_to(np.asarray(vertices, dtype=np.float32), (n, 3))
+		theta = np.broadcast_to(np.asarray(theta, dtype=np.float32), (n,))
+		phi = np.broadcast_to(np.asarray(phi, dtype=np.float32), (n,))
+		energy = np.maximum(np.broadcast_to(np.asarray(energy, dtype=np.float32), (n,)), 0.0)
+		if final_vertices is not None:
+			final_vertices = np.broadcast_to(np.asarray(final_vertices, dtype=np.float32), (n, 3))
+		if not ok.all():
+			flat, k = flat[ok], k[ok]
+			vertices, theta, phi, energy = vertices[ok], theta[ok], phi[ok], energy[ok]
+			if final_vertices is not None:
+				final_vertices = final_vertices[ok]
+		# (cells*b, ...) 평탄화 뷰에 단일 인덱스로 기록 (배열은 항상 C-contiguous → reshape 는 뷰)
+		fs = flat * b + k
+		fv = self.final_vertex.reshape(-1, 3)
+		# 직전 step 의 열린 구간을 새 vertex 로 닫음
+		prev = fs - 1
+		open_prev = (k > 0) & np.isnan(fv[prev, 0])
+		fv[prev[open_prev]] = vertices[open_prev]
+		self.vertex.reshape(-1, 3)[fs] = vertices
+		self.theta.reshape(-1)[fs] = theta
+		self.phi.reshape(-1)[fs] = phi
+		self.energy.reshape(-1)[fs] = energy
+		fv[fs] = np.nan if final_vertices is None else final_vertices
+		n_steps[flat] = k + 1
+		self.touch_angles()
+		return ok
+
+	def update_steps(self, step_index, mask: np.ndarray, *, vertex=None, theta=None, phi=None, energy=None, final_vertex=None):
+		"""mask (cell shape) 가 True 인 셀들의 step 일괄 수정 (LPF.update_steps 참고)."""
+		mask = np.asarray(mask, dtype=bool)
+		cells = np.nonzero(mask)
+		k = np.asarray(step_index, dtype=np.intp)
+		k = k[mask] if k.ndim == mask.ndim else np.broadcast_to(k, cells[0].shape)
+		if ((k < 0) | (k >= self.n_steps[cells])).any():
+			raise IndexError("step_index out of range")
+		idx = cells + (k,)
+
+		def pick(v, vec: bool):
+			v = np.asarray(v, dtype=np.float32)
+			return v[mask] if v.ndim == mask.ndim + (1 if vec else 0) and v.shape[:mask.ndim] == mask.shape else v
+
+		if vertex is not None:
+			self.vertex[idx] = pick(vertex, True)
+		if theta is not None:
+			self.theta[idx] = pick(theta, False)
+		if phi is not None:
+			self.phi[idx] = pick(phi, False)
+		if theta is not None or phi is not None:
+			self.touch_angles()
+		if energy is not None:
+			self.energy[idx] = np.maximum(pick(energy, False), 0.0)
+		if final_vertex is not None:
+			self.final_vertex[idx] = pick(final_vertex, True)
+
+	def step_mask(self) -> np.ndarray:
+		"""(*cell, b) bool: 실제로 채워진 step 위치."""
+		return np.arange(self.bounces) < self.n_steps[..., None]
+
+	def connectivity_violations(self, tol: float = 1e-6, per_segment: bool = False) -> np.ndarray:
+		"""연결성 위반 마스크 (*cell,) (per_segment 면 (*cell, b-1)). 규칙은 LPF.connectivity_violations 참고."""
+		b = self.bounces
+		if b < 2:
+			shape = self.shape + ((0,) if per_segment else ())
+			return np.zeros(shape, dtype=bool)
+		fv = self.final_vertex[..., :-1, :]
+		ref = np.where(np.isnan(fv), self.vertex[..., :-1, :], fv)
+		d = ref - self.vertex[..., 1:, :]
+		bad = np.einsum('...k,...k->...', d, d) > tol * tol
+		bad &= np.arange(1, b) < self.n_steps[..., None]
+		return bad if per_segment else bad.any(axis=-1)
+
+	def clear(self, index=Ellipsis):
+		"""셀(들)의 모든 step 을 비운다. index 는 셀 차원 인덱스."""
+		self.touch_angles()
+		self.vertex[index] = 0.0
+		self.theta[index] = 0.0
+		self.phi[index] = 0.0
+		self.energy[index] = 0.0
+		self.final_vertex[index] = np.nan
+		self.n_steps[index] = 0
+
+
+class RayDataView:
+	"""LPFBuffers 의 한 step 을 RayData 처럼 노출하는 뷰 (복사 없음)."""
+	__slots__ = ('_buf', '_idx')
+
+	def __init__(self, buf: LPFBuffers, idx: Tuple[int, ...]):
+		self._buf = buf
+		self._idx = idx
+
+	@property
+	def vertex(self) -> np.ndarray:
+		return self._buf.vertex[self._idx]
+
+	@vertex.setter
+	def vertex(self, v):
+		self._buf.vertex[self._idx] = v
+
+	@property
+	def theta(self) -> float:
+		return float(self._buf.theta[self._idx])
+
+	@theta.setter
+	def theta(self, v: float):
+		self._buf.theta[self._idx] = v
+		self._buf.touch_angles()
+
+	@property
+	def phi(self) -> float:
+		return float(self._buf.phi[self._idx])
+
+	@phi.setter
+	def phi(self, v: float):
+		self._buf.phi[self._idx] = v
+		self._buf.touch_angles()
+
+	@property
+	def energy(self) -> float:
+		return float(self._buf.energy[self._idx])
+
+	@energy.setter
+	def energy(self, v: float):
+		self._buf.energy[self._idx] = v
+
+	@property
+	def final_vertex(self) -> Optional[np.ndarray]:
+		fv = self._buf.final_vertex[self._idx]
+		return None if np.isnan(fv[0]) else fv
+
+	@final_vertex.setter
+	def final_vertex(self, v: Optional[np.ndarray]):
+		self._buf.final_vertex[self._idx] = np.nan if v is None else v
+
+	def to_dict(self) -> Dict[str, Any]:
+		fv = self.final_vertex
+		return {
+			'vertex': self.vertex.copy(),
+			'theta': self.theta,
+			'phi': self.phi,
+			'energy': self.energy,
+			'final_vertex': fv.copy() if fv is not None else None
+		}
+
+	def __repr__(self) -> str:
+		return f"RayDataView(idx={self._idx}, theta={self.theta:.4f}, phi={self.phi:.4f}, energy={self.energy:.4g})"
+
+
+class _StepList:
+	"""RayPathView.steps: 리스트와 같은 인터페이스 (len / index / iter / append / clear)."""
+	__slots__ = ('_buf', '_cell')
+
+	def __init__(self, buf: LPFBuffers, cell: Tuple[int, ...]):
+		self._buf = buf
+		self._cell = cell
+
+	def __len__(self) -> int:
+		return int(self._buf.n_steps[self._cell])
+
+	def __getitem__(self, k):
+		n = len(self)
+		if isinstance(k, slice):
+			return [self[x] for x in range(*k.indices(n))]
+		if k < 0:
+			k += n
+		if not (0 <= k < n):
+			raise IndexError("step index out of range")
+		return RayDataView(self._buf, self._cell + (k,))
+
+	def __iter__(self):
+		for k in range(len(self)):
+			yield RayDataView(self._buf, self._cell + (k,))
+
+	def append(self, rd):
+		k = len(self)
+		if k >= self._buf.bounces:
+			raise ValueError("Exceeded max bounces for this RayPath")
+		idx = self._cell + (k,)
+		self._buf.vertex[idx] = rd.vertex
+		self._buf.theta[idx] = rd.theta
+		self._buf.phi[idx] = rd.phi
+		self._buf.energy[idx] = rd.energy
+		self._buf.final_vertex[idx] = np.nan if rd.final_vertex is None else rd.final_vertex
+		self._buf.n_steps[self._cell] = k + 1
+		self._buf.touch_angles()
+
+	def clear(self):
+		self._buf.clear(self._cell)
+
+
+class RayPathView(RayPath):
+	"""LPF 셀 (i,j) 의 RayPath 뷰. 수정 사항은 LPF 버퍼에 바로 반영된다."""
+
+	def __init__(self, buf: LPFBuffers, cell: Tuple[int, ...]):
+		self._buf = buf
+		self._cell = cell
+
+	@property
+	def steps(self) -> _StepList:
+		return _StepList(self._buf, self._cell)
+
+	@property
+	def max_bounces(self) -> int:
+		return self._buf.bounces
+
+	def __repr__(self) -> str:
+		return f"RayPathView(cell={self._cell}, steps={len(self.steps)}, max_bounces={self.max_bounces})"
+
+
+class _PathList:
+	"""LPF.paths: 셀 리스트와 같은 인터페이스 (len / index / iter), 원소당 O(1)."""
+	__slots__ = ('_buf', '_W')
+
+	def __init__(self, buf: LPFBuffers, W: int):
+		self._buf = buf
+		self._W = W
+
+	def __len__(self) -> int:
+		return int(self._buf.n_steps.size)
+
+	def __getitem__(self, idx):
+		n = len(self)
+		if isinstance(idx, slice):
+			return [self[x] for x in range(*idx.indices(n))]
+		if idx < 0:
+			idx += n
+		if not (0 <= idx < n):
+			raise IndexError("path index out of range")
+		return RayPathView(self._buf, divmod(int(idx), self._W))
+
+	def __iter__(self):
+		for idx in range(len(self)):
+			yield RayPathView(self._buf, divmod(idx, self._W))
+
+
+def evaluate_distribution(distribution: Callable[[Any, Any], Any], th_deg: np.ndarray, ph_deg: np.ndarray, vectorized: Optional[bool] = None) -> np.ndarray:
+	"""배광 분포를 theta/phi(deg) 그리드에서 평가 → float64 배열 (음수 미처리).
+	vectorized 의미는 LPF.build_from_source_distribution 참고.
+	"""
+	if vectorized is not False:
+		try:
+			e = np.asarray(distribution(th_deg, ph_deg), dtype=np.float64)
+			return np.array(np.broadcast_to(e, th_deg.shape), dtype=np.float64)
+		except (TypeError, ValueError):
+			if vectorized:
+				raise
+	energies = np.empty(th_deg.shape, dtype=np.float64)
+	for idx in np.ndindex(*th_deg.shape):
+		energies[idx] = distribution(float(th_deg[idx]), float(ph_deg[idx]))
+	return energies
+
+
 class LPF:
 	"""Light Path Field 2D 컨테이너.
 
 	내부 표현:
-	  - self.paths: 길이 H*W 의 RayPath 리스트
-	  - (i,j) 인덱싱 → idx = i*W + j
+	  - self.buf: LPFBuffers, cell shape (H,W)
+	  - get_path(i,j) → RayPathView (버퍼 뷰)
 	"""
-	def __init__(self, cfg: LPFConfig):
+	def __init__(self, cfg: LPFConfig, buffers: Optional[LPFBuffers] = None):
 		self.cfg = cfg
 		self.H, self.W = cfg.compute_size()
-		self.paths: List[RayPath] = [RayPath(max_bounces=cfg.bounces) for _ in range(self.H * self.W)]
+		if buffers is None:
+			buffers = LPFBuffers.allocate((self.H, self.W), cfg.bounces)
+		elif buffers.shape != (self.H, self.W) or buffers.bounces != cfg.bounces:
+			raise ValueError("buffers shape mismatch with LPF config")
+		self.buf = buffers
 		self.meta: Dict[str, Any] = {}
+		self._dir_cache: Optional[Tuple[int, np.ndarray]] = None
 
 	# ---------------- 인덱스 도우미 ----------------
 	def _index(self, i: int, j: int) -> int:
@@ -115,96 +470,162 @@ class LPF:
 			raise IndexError("(i,j) out of bounds")
 		return i * self.W + j
 
+	def _cell(self, i: int, j: int) -> Tuple[int, int]:
+		self._index(i, j)
+		return (int(i), int(j))
+
 	# ---------------- 접근자 ----------------
-	def get_path(self, i: int, j: int) -> RayPath:
-		return self.paths[self._index(i, j)]
+	@property
+	def paths(self) -> '_PathList':
+		"""호환용: 길이 H*W 의 RayPathView 시퀀스 (idx = i*W + j). 원소는 접근할 때 만드는 뷰."""
+		return _PathList(self.buf, self.W)
+
+	def nbytes(self) -> int:
+		return self.buf.nbytes
+
+	def get_path(self, i: int, j: int) -> RayPathView:
+		return RayPathView(self.buf, self._cell(i, j))
 
 	def set_path(self, i: int, j: int, path: RayPath):
 		if path.max_bounces != self.cfg.bounces:
 			raise ValueError("path max_bounces mismatch with LPF config")
-		self.paths[self._index(i, j)] = path
+		cell = self._cell(i, j)
+		# 같은 셀의 뷰가 들어와도 안전하도록 먼저 복사
+		steps = [RayData(**s.to_dict()) for s in path.steps]
+		self.buf.clear(cell)
+		dst = _StepList(self.buf, cell)
+		for rd in steps:
+			dst.append(rd)
 
 	# ---------------- 초기화 ----------------
-	def build_from_source_distribution(self, distribution: Callable[[float, float], float]):
+	def angle_grid(self) -> Tuple[np.ndarray, np.ndarray]:
+		"""셀별 (theta_deg, phi_deg) meshgrid, 각각 (H,W)."""
+		theta_res, phi_res = self.cfg.resolutions()
+		return uniform_angle_grid(self.H, self.W, theta_res, phi_resolution_deg=phi_res)
+
+	def build_from_source_distribution(self, distribution: Callable[[Any, Any], Any], vectorized: Optional[bool] = None, total: Optional[float] = None):
 		"""배광 분포 함수 distribution(theta_deg, phi_deg)->상대에너지 사용하여 첫 step 초기화.
-		phi 축도 동일 해상도로 가정(0~source_angle). 후속 구현에서 phi 0~360 확장 가능.
+		phi 범위/해상도는 cfg.phi_span / cfg.phi_resolution (기본: 0~source_angle, ray_resolution).
+
+		vectorized:
+		  - True : distribution 에 (H,W) theta/phi 그리드를 한 번에 전달 (배열 반환, 스칼라는 broadcast)
+		  - False: 셀마다 스칼라 호출 (기존 방식)
+		  - None : 배열 호출을 먼저 시도하고 TypeError/ValueError 시 스칼라 방식으로 fall-back
+		total: 정규화 분모 (None 이면 이 그리드의 합). 타일처럼 전체의 일부일 때 전체 합을 전달
 		"""
-		H, W = self.H, self.W
-		origin = np.asarray(self.cfg.source_origin, dtype=np.float32)
-		total = 0.0
-		energies = np.zeros((H, W), dtype=np.float64)
-		for i in range(H):
-			theta_deg = i * self.cfg.ray_resolution
-			for j in range(W):
-				phi_deg = j * self.cfg.ray_resolution
-				e = distribution(theta_deg, phi_deg)
-				if e < 0:
-					e = 0.0
-				energies[i, j] = e
-				total += e
+		th_deg, ph_deg = self.angle_grid()
+		energies = evaluate_distribution(distribution, th_deg, ph_deg, vectorized)
+		np.maximum(energies, 0.0, out=energies)
+		if total is not None:
+			self._init_first_step(th_deg, ph_deg, energies / total)
+			return
+		total = energies.sum()
 		if total <= 0:
 			# 균일 분배 fall-back
 			energies[:] = 1.0
 			total = energies.sum()
 		energies /= total  # 정규화
-		for i in range(H):
-			theta_deg = i * self.cfg.ray_resolution
-			for j in range(W):
-				phi_deg = j * self.cfg.ray_resolution
-				path = self.get_path(i, j)
-				if path.steps:  # 재초기화 시 비움
-					path.steps.clear()
-				rd = RayData(
-					vertex=origin.copy(),
-					theta=math.radians(theta_deg),
-					phi=math.radians(phi_deg),
-					energy=float(energies[i, j]),
-					final_vertex=None
-				)
-				path.add_step(rd)
+		self._init_first_step(th_deg, ph_deg, energies)
+
+	def _init_first_step(self, th_deg: np.ndarray, ph_deg: np.ndarray, energies: np.ndarray):
+		# 첫 step 일괄 기록 (재초기화 시 비움)
+		self.buf.clear()
+		self.buf.vertex[:, :, 0] = np.asarray(self.cfg.source_origin, dtype=np.float32)
+		self.buf.theta[:, :, 0] = np.radians(th_deg)
+		self.buf.phi[:, :, 0] = np.radians(ph_deg)
+		self.buf.energy[:, :, 0] = energies
+		self.buf.n_steps[:] = 1
 
 	# ---------------- 업데이트 ----------------
 	def update_ray_step(self, i: int, j: int, step_index: int, *, vertex: Optional[np.ndarray] = None, theta: Optional[float] = None, phi: Optional[float] = None, energy: Optional[float] = None, final_vertex: Optional[np.ndarray] = None):
-		path = self.get_path(i, j)
-		if step_index >= len(path.steps):
+		cell = self._cell(i, j)
+		if step_index >= self.buf.n_steps[cell]:
 			raise IndexError("step_index out of range")
-		rd = path.steps[step_index]
+		idx = cell + (step_index,)
 		if vertex is not None:
-			rd.vertex = vertex.astype(np.float32)
+			self.buf.vertex[idx] = vertex
 		if theta is not None:
-			rd.theta = theta
+			self.buf.theta[idx] = theta
 		if phi is not None:
-			rd.phi = phi
+			self.buf.phi[idx] = phi
+		if theta is not None or phi is not None:
+			self.buf.touch_angles()
 		if energy is not None:
-			rd.energy = max(0.0, energy)
+			self.buf.energy[idx] = max(0.0, energy)
 		if final_vertex is not None:
-			rd.final_vertex = final_vertex.astype(np.float32)
+			self.buf.final_vertex[idx] = final_vertex
 
 	def append_interaction(self, i: int, j: int, vertex: np.ndarray, theta: float, phi: float, energy: float, final_vertex: Optional[np.ndarray] = None):
-		path = self.get_path(i, j)
-		if len(path.steps) >= path.max_bounces:
+		"""(i,j) 경로에 상호작용 step 추가.
+		직전 step 의 final_vertex 가 비어 있으면 새 vertex 로 닫는다 (k 의 도착점 == k+1 의 vertex).
+		"""
+		self._cell(i, j)
+		fv = None if final_vertex is None else np.asarray(final_vertex)[None]
+		if not self.append_interactions([i], [j], np.asarray(vertex)[None], theta, phi, energy, fv).all():
 			raise ValueError("Cannot append: max bounces reached")
-		rd = RayData(vertex=vertex.astype(np.float32), theta=theta, phi=phi, energy=max(0.0, energy), final_vertex=final_vertex.astype(np.float32) if final_vertex is not None else None)
-		path.add_step(rd)
+
+	def _cells(self, idx_i, idx_j) -> Tuple[np.ndarray, np.ndarray]:
+		ii = np.asarray(idx_i, dtype=np.intp).ravel()
+		jj = np.asarray(idx_j, dtype=np.intp).ravel()
+		if ii.shape != jj.shape:
+			raise ValueError("idx_i / idx_j length mismatch")
+		if ii.size and (ii.min() < 0 or ii.max() >= self.H or jj.min() < 0 or jj.max() >= self.W):
+			raise IndexError("(i,j) out of bounds")
+		return ii, jj
+
+	def append_interactions(self, idx_i, idx_j, vertices: np.ndarray, theta, phi, energy, final_vertices: Optional[np.ndarray] = None, strict: bool = True) -> np.ndarray:
+		"""wavefront 단위 일괄 append. N 개의 (i,j) 셀에 다음 step 을 한 번에 기록.
+
+		vertices/final_vertices: (N,3), theta/phi/energy: (N,) 또는 스칼라 (final_vertices 의 NaN 행 = 없음).
+		한 호출 안에서 같은 셀이 중복되면 ValueError.
+		bounce 한도에 도달한 셀: strict=True 면 ValueError (아무것도 기록 안 함), False 면 건너뜀.
+		반환: (N,) bool, 실제로 기록된 항목.
+		"""
+		ii, jj = self._cells(idx_i, idx_j)
+		return self.buf.append_steps(ii * self.W + jj, vertices, theta, phi, energy, final_vertices, strict)
+
+	def update_steps(self, step_index, mask: np.ndarray, *, vertex: Optional[np.ndarray] = None, theta=None, phi=None, energy=None, final_vertex: Optional[np.ndarray] = None):
+		"""mask (H,W) 가 True 인 셀들의 step 을 일괄 수정 (update_ray_step 의 벡터 버전).
+
+		step_index: int 또는 (H,W) 정수 배열 (셀별 step, 예: n_steps-1).
+		값: 스칼라, 필드 전체 배열 ((H,W) / (H,W,3)) 또는 mask 의 True 셀 순서(C-order)로 압축된 (N,) / (N,3).
+		"""
+		mask = np.asarray(mask, dtype=bool)
+		if mask.shape != (self.H, self.W):
+			raise ValueError("mask shape must be (H,W)")
+		self.buf.update_steps(step_index, mask, vertex=vertex, theta=theta, phi=phi, energy=energy, final_vertex=final_vertex)
 
 	# ---------------- 검증 ----------------
-	def enforce_all_connectivity(self):
-		for p in self.paths:
-			p.enforce_connectivity()
+	def step_mask(self) -> np.ndarray:
+		"""(H,W,b) bool: 실제로 채워진 step 위치."""
+		return self.buf.step_mask()
+
+	def connectivity_violations(self, tol: float = 1e-6, per_segment: bool = False) -> np.ndarray:
+		"""연결성 위반 마스크 (예외 없이 전체 필드를 한 번에 검사).
+		segment k->k+1: ref = final_vertex_k (없으면 vertex_k), |ref - vertex_{k+1}| > tol 이면 위반.
+		반환: (H,W) bool, per_segment=True 면 (H,W,b-1) bool.
+		"""
+		return self.buf.connectivity_violations(tol, per_segment)
+
+	def enforce_all_connectivity(self, tol: float = 1e-6) -> np.ndarray:
+		"""전체 연결성 검사. 위반이 있으면 개수와 첫 위치를 담아 ValueError, 없으면 (H,W) 마스크 반환."""
+		seg = self.connectivity_violations(tol, per_segment=True)
+		mask = seg.any(axis=-1)
+		if mask.any():
+			i, j = (int(x) for x in np.argwhere(mask)[0])
+			k = int(np.argmax(seg[i, j]))
+			raise ValueError(f"Connectivity violation in {int(mask.sum())} cell(s); first at ({i},{j}) segment {k}->{k+1}")
+		return mask
 
 	# ---------------- 쿼리/통계 ----------------
 	def energy_sum(self) -> float:
-		return float(sum((s.energy for p in self.paths for s in p.steps)))
+		return float(np.sum(self.buf.energy, where=self.step_mask(), dtype=np.float64))
 
 	def distribution_map(self, step: int = 0) -> np.ndarray:
 		"""특정 step의 에너지 맵 (존재하지 않는 step은 0)."""
-		m = np.zeros((self.H, self.W), dtype=np.float32)
-		for i in range(self.H):
-			for j in range(self.W):
-				path = self.get_path(i, j)
-				if step < len(path.steps):
-					m[i, j] = path.steps[step].energy
-		return m
+		if not (0 <= step < self.buf.bounces):
+			return np.zeros((self.H, self.W), dtype=np.float32)
+		return np.where(self.buf.n_steps > step, self.buf.energy[..., step], 0.0).astype(np.float32)
 
 	# ---------------- 직렬화 ----------------
 	def export_numpy(self) -> Dict[str, Any]:
@@ -218,12 +639,92 @@ class LPF:
 				'ray_resolution': self.cfg.ray_resolution,
 				'bounces': self.cfg.bounces,
 				'source_origin': self.cfg.source_origin,
+				'phi_span': self.cfg.phi_span,
+				'phi_resolution': self.cfg.phi_resolution,
 				'size': (self.H, self.W)
 			},
 			'paths': data
 		}
 
+	HEADER_FILE = 'header.json'
+	FORMAT_VERSION = 1
+
+	def save(self, directory: str):
+		"""바이너리 저장: directory/header.json (LPFConfig, 크기) + 배열별 .npy."""
+		self.buf.save(directory)
+		cfg = asdict(self.cfg)
+		cfg['source_origin'] = list(cfg['source_origin'])
+		header = {
+			'format': 'loda.lpf',
+			'version': self.FORMAT_VERSION,
+			'config': cfg,
+			'size': [self.H, self.W],
+		}
+		with open(os.path.join(directory, self.HEADER_FILE), 'w', encoding='utf-8') as f:
+			json.dump(header, f, indent=2)
+
+	@classmethod
+	def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'LPF':
+		"""save() 로 저장한 필드 열기. 기본은 읽기 전용 memmap (수정하려면 mmap_mode='r+' 또는 'c')."""
+		with open(os.path.join(directory, cls.HEADER_FILE), 'r', encoding='utf-8') as f:
+			header = json.load(f)
+		if header.get('format') != 'loda.lpf' or header.get('version') != cls.FORMAT_VERSION:
+			raise ValueError(f"Unsupported LPF file format in {directory}")
+		cfg = dict(header['config'])
+		cfg['source_origin'] = tuple(cfg['source_origin'])
+		return cls(LPFConfig(**cfg), buffers=LPFBuffers.load(directory, mmap_mode=mmap_mode))
+
+	# ---------------- torch 브리지 ----------------
+	def as_tensors(self, device: Optional[Any] = None) -> Dict[str, Any]:
+		"""버퍼 배열들을 torch 텐서 dict 로 반환 (키는 LPFBuffers.arrays() 와 동일).
+		device 가 None/'cpu' 면 torch.from_numpy 로 메모리를 공유하므로 텐서의 in-place 수정이 곧 LPF 수정이다.
+		그 외 device 는 복사본이므로 결과를 write_back() 으로 되돌려야 한다.
+		공유 텐서로 theta/phi 를 직접 바꿨다면 invalidate_directions() 를 호출할 것.
+		"""
+		try:
+			import torch
+		except ImportError as e:  # torch 는 선택 의존성
+			raise ImportError("LPF.as_tensors requires torch (pip install torch)") from e
+		out = {}
+		for name, arr in self.buf.arrays().items():
+			t = torch.from_numpy(arr)
+			out[name] = t if device is None else t.to(device)
+		return out
+
+	def write_back(self, tensors: Dict[str, Any]):
+		"""텐서(또는 ndarray) 결과를 같은 이름의 버퍼에 제자리 복사. 이미 버퍼와 메모리를 공유하는 텐서는 건너뜀."""
+		arrays = self.buf.arrays()
+		for name, t in tensors.items():
+			if name not in arrays:
+				raise KeyError(f"unknown LPF buffer '{name}'")
+			dst = arrays[name]
+			if isinstance(t, np.ndarray):
+				src = t
+			else:
+				if t.device.type == 'cpu' and t.data_ptr() == dst.ctypes.data:
+					continue
+				src = t.detach().cpu().numpy()
+			if src.shape != dst.shape:
+				raise ValueError(f"shape mismatch for '{name}': {src.shape} vs {dst.shape}")
+			np.copyto(dst, src, casting='same_kind')
+			if name in ('theta', 'phi'):
+				self.buf.touch_angles()
+
 	# ---------------- 유틸 ----------------
+	def directions(self) -> np.ndarray:
+		"""(H,W,b,3) float32 단위 방향 벡터 (theta/phi 의 cartesian 형태, 읽기 전용).
+		필드별로 캐시되며 theta/phi 가 LPF API 로 바뀔 때만 다시 계산한다.
+		"""
+		version = self.buf.angle_version
+		if self._dir_cache is None or self._dir_cache[0] != version:
+			dirs = sph_to_cart_array(self.buf.theta, self.buf.phi)
+			dirs.flags.writeable = False
+			self._dir_cache = (version, dirs)
+		return self._dir_cache[1]
+
+	def invalidate_directions(self):
+		self.buf.touch_angles()
+
 	@staticmethod
 	def sph_to_cart(theta: float, phi: float) -> np.ndarray:
 		st = math.sin(theta)
@@ -237,6 +738,10 @@ class LPF:
 		phi = math.atan2(y, x)
 		return theta, phi
 
+	# 배열 버전: (N,) theta/phi <-> (N,3)
+	sph_to_cart_array = staticmethod(sph_to_cart_array)
+	cart_to_sph_array = staticmethod(cart_to_sph_array)
+
 
 # ---- 사용 예시 ----
 # cfg = LPFConfig(source_angle=120, ray_resolution=10, bounces=2)
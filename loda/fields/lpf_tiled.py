@@ -0,0 +1,246 @@
+"""Tiled LPF (메모리보다 큰 Light Path Field)
+
+목적:
+  - (H,W) 그리드를 tile_size x tile_size 타일로 분할, 타일별 LPFBuffers 를 디스크에 저장
+  - 상주 타일은 LRU 캐시로 관리, memory_budget 바이트를 넘으면 가장 오래된 타일부터 내보냄 (dirty 면 저장)
+  - build / trace(map_tiles) / distribution_map / energy_sum 을 타일 단위로 스트리밍
+
+디스크 레이아웃:
+  root/header.json                 (format 'loda.lpf.tiled', LPFConfig, size, tile_size)
+  root/tile_<ti>_<tj>/<name>.npy   (LPFBuffers.save 형식)
+  - 아직 기록되지 않은 타일은 파일 없이 빈 버퍼로 취급
+  - 기존 root 를 열 때 header (LPFConfig, size, tile_size) 가 다르면 ValueError (overwrite=True 면 기존 타일 삭제)
+  - 타일 저장은 임시 디렉터리에 쓴 뒤 교체 (중단되어도 이전 완전한 타일 또는 새 타일만 남음)
+
+사용 예:
+  tl = TiledLPF(cfg, '/mnt/data/lpf_tiles', tile_size=2048, memory_budget=8 << 30)
+  tl.build_from_source_distribution(dist)
+  tl.map_tiles(lambda tile: tracer.step(tile))   # tile 은 LPFTile (로컬 인덱스 LPF)
+  tl.flush()
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Optional, Tuple, Callable, Dict, Any, Iterator
+import json
+import os
+import shutil
+import numpy as np
+from loda.config import LPFConfig
+from loda.fields.lpf import LPF, LPFBuffers, evaluate_distribution
+from loda.utils.grid import uniform_angle_grid
+
+
+class LPFTile(LPF):
+	"""TiledLPF 의 한 타일을 LPF 인터페이스로 노출.
+	인덱스는 타일 로컬 (0..h-1, 0..w-1), offset=(i0,j0) 은 전체 그리드에서의 시작 셀.
+	"""
+	def __init__(self, cfg: LPFConfig, buffers: LPFBuffers, offset: Tuple[int, int]):
+		self.cfg = cfg
+		self.buf = buffers
+		self.H, self.W = buffers.shape
+		self.offset = offset
+		self.meta: Dict[str, Any] = {}
+		self._dir_cache = None
+
+	def angle_grid(self) -> Tuple[np.ndarray, np.ndarray]:
+		theta_res, phi_res = self.cfg.resolutions()
+		return uniform_angle_grid(self.H, self.W, theta_res, offset=self.offset, phi_resolution_deg=phi_res)
+
+	def save(self, directory: str):
+		"""타일은 단독 LPF 로 저장하지 않는다 (header 크기가 전체 그리드와 달라짐). TiledLPF.flush() 사용."""
+		raise TypeError("LPFTile cannot be saved as a standalone LPF; use TiledLPF.flush()")
+
+
+class TiledLPF:
+	"""디스크 타일 + LRU 상주 캐시 기반 LPF."""
+	HEADER_FILE = 'header.json'
+	FORMAT_VERSION = 1
+
+	def __init__(self, cfg: LPFConfig, root: str, tile_size: int = 1024, memory_budget: int = 2 << 30, overwrite: bool = False):
+		self.cfg = cfg
+		self.root = root
+		self.H, self.W = cfg.compute_size()
+		self.tile_size = int(tile_size)
+		self.memory_budget = int(memory_budget)
+		if self.tile_size < 1:
+			raise ValueError("tile_size must be >= 1")
+		tile_bytes = self.tile_size * self.tile_size * (cfg.bounces * 36 + 2)
+		if tile_bytes > self.memory_budget:
+			raise ValueError(f"memory_budget ({self.memory_budget} B) smaller than one tile ({tile_bytes} B)")
+		self.n_ti = -(-self.H // self.tile_size)
+		self.n_tj = -(-self.W // self.tile_size)
+		self._cache: 'OrderedDict[Tuple[int, int], LPFBuffers]' = OrderedDict()
+		self._dirty: set = set()
+		self.stats = {'loads': 0, 'evictions': 0, 'writes': 0}
+		os.makedirs(root, exist_ok=True)
+		self._check_header(overwrite)
+		self._write_header()
+
+	@classmethod
+	def open(cls, root: str, memory_budget: int = 2 << 30) -> 'TiledLPF':
+		with open(os.path.join(root, cls.HEADER_FILE), 'r', encoding='utf-8') as f:
+			header = json.load(f)
+		if header.get('format') != 'loda.lpf.tiled' or header.get('version') != cls.FORMAT_VERSION:
+			raise ValueError(f"Unsupported tiled LPF format in {root}")
+		cfg = dict(header['config'])
+		cfg['source_origin'] = tuple(cfg['source_origin'])
+		return cls(LPFConfig(**cfg), root, tile_size=header['tile_size'], memory_budget=memory_budget)
+
+	def _header(self) -> Dict[str, Any]:
+		cfg = asdict(self.cfg)
+		cfg['source_origin'] = list(cfg['source_origin'])
+		return {
+			'format': 'loda.lpf.tiled',
+			'version': self.FORMAT_VERSION,
+			'config': cfg,
+			'size': [self.H, self.W],
+			'tile_size': self.tile_size,
+		}
+
+	def _check_header(self, overwrite: bool):
+		# 다른 LPFConfig/tile_size 로 만든 타일이 남아 있으면 섞이지 않도록 거부 (또는 삭제)
+		path = os.path.join(self.root, self.HEADER_FILE)
+		if os.path.exists(path):
+			with open(path, 'r', encoding='utf-8') as f:
+				stored = json.load(f)
+			if stored == self._header():
+				return
+			if not overwrite:
+				raise ValueError(f"{self.root} holds a tiled LPF with a different header "
+					f"(size {stored.get('size')}, tile_size {stored.get('tile_size')}); pass overwrite=True to discard it")
+		elif not overwrite:
+			return
+		for name in os.listdir(self.root):
+			if name.startswith('tile_'):
+				shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+	def _write_header(self):
+		path = os.path.join(self.root, self.HEADER_FILE)
+		tmp = f"{path}.{os.getpid()}.tmp"
+		with open(tmp, 'w', encoding='utf-8') as f:
+			json.dump(self._header(), f, indent=2)
+		os.replace(tmp, path)
+
+	# ---------------- 타일 인덱싱 ----------------
+	def tile_bounds(self, ti: int, tj: int) -> Tuple[int, int, int, int]:
+		"""(i0, i1, j0, j1) 반열린 구간."""
+		if not (0 <= ti < self.n_ti and 0 <= tj < self.n_tj):
+			raise IndexError("tile index out of bounds")
+		i0, j0 = ti * self.tile_size, tj * self.tile_size
+		return i0, min(i0 + self.tile_size, self.H), j0, min(j0 + self.tile_size, self.W)
+
+	def tile_of(self, i: int, j: int) -> Tuple[int, int]:
+		return i // self.tile_size, j // self.tile_size
+
+	def _tile_dir(self, key: Tuple[int, int]) -> str:
+		return os.path.join(self.root, f"tile_{key[0]:05d}_{key[1]:05d}")
+
+	# ---------------- LRU 캐시 ----------------
+	def resident_bytes(self) -> int:
+		return sum(b.nbytes for b in self._cache.values())
+
+	def tile(self, ti: int, tj: int, write: bool = False) -> LPFTile:
+		"""타일을 상주시키고 LPFTile 로 반환. write=True 면 dirty 로 표시 (eviction/flush 시 저장).
+		반환된 타일은 다음 tile() 호출에서 내보내질 수 있으므로 그 전까지만 사용할 것.
+		"""
+		key = (ti, tj)
+		i0, i1, j0, j1 = self.tile_bounds(ti, tj)
+		buf = self._cache.get(key)
+		if buf is None:
+			d = self._tile_dir(key)
+			if not os.path.exists(d) and os.path.exists(d + '.old'):
+				os.replace(d + '.old', d)  # 교체 도중 중단: 이전 완전한 타일 복구
+			if os.path.exists(os.path.join(d, 'n_steps.npy')):
+				buf = LPFBuffers.load(d, mmap_mode=None)
+				self.stats['loads'] += 1
+			else:
+				buf = LPFBuffers.allocate((i1 - i0, j1 - j0), self.cfg.bounces)
+			self._cache[key] = buf
+			self._evict(keep=key)
+		else:
+			self._cache.move_to_end(key)
+		if write:
+			self._dirty.add(key)
+		return LPFTile(self.cfg, buf, (i0, j0))
+
+	def _evict(self, keep: Tuple[int, int]):
+		while self.resident_bytes() > self.memory_budget and len(self._cache) > 1:
+			key = next(iter(self._cache))
+			if key == keep:
+				self._cache.move_to_end(key)
+				continue
+			buf = self._cache.pop(key)
+			if key in self._dirty:
+				self._save_tile(key, buf)
+			self.stats['evictions'] += 1
+
+	def _save_tile(self, key: Tuple[int, int], buf: LPFBuffers):
+		# tmp 에 전부 쓴 뒤 교체 (디렉터리는 비어 있지 않으면 os.replace 로 덮을 수 없으므로 기존 것을 .old 로 옮김)
+		d = self._tile_dir(key)
+		tmp, old = f"{d}.{os.getpid()}.tmp", d + '.old'
+		shutil.rmtree(tmp, ignore_errors=True)
+		buf.save(tmp)
+		if os.path.exists(d):
+			shutil.rmtree(old, ignore_errors=True)
+			os.replace(d, old)
+		os.replace(tmp, d)
+		shutil.rmtree(old, ignore_errors=True)
+		self._dirty.discard(key)
+		self.stats['writes'] += 1
+
+	def flush(self):
+		"""dirty 타일을 모두 디스크에 기록 (상주 상태는 유지)."""
+		for key in list(self._dirty):
+			self._save_tile(key, self._cache[key])
+
+	def iter_tiles(self, write: bool = False) -> Iterator[LPFTile]:
+		"""row-major 순서로 타일 순회 (한 번에 하나씩 상주)."""
+		for ti in range(self.n_ti):
+			for tj in range(self.n_tj):
+				yield self.tile(ti, tj, write=write)
+
+	def map_tiles(self, fn: Callable[[LPFTile], Any], write: bool = True) -> list:
+		"""각 타일에 fn(tile) 적용 (예: tracer bounce). 결과 리스트 반환."""
+		return [fn(t) for t in self.iter_tiles(write=write)]
+
+	# ---------------- 초기화 ----------------
+	def build_from_source_distribution(self, distribution: Callable[[Any, Any], Any], vectorized: Optional[bool] = None):
+		"""LPF.build_from_source_distribution 의 타일 스트리밍 버전.
+		1차 패스로 전체 합을 구하고 2차 패스에서 정규화된 첫 step 을 타일별로 기록 (분포는 두 번 평가).
+		"""
+		total = 0.0
+		for ti in range(self.n_ti):
+			for tj in range(self.n_tj):
+				th, ph = self._tile_grid(ti, tj)
+				total += np.maximum(evaluate_distribution(distribution, th, ph, vectorized), 0.0).sum()
+		if total <= 0:
+			# 균일 분배 fall-back
+			distribution, vectorized, total = (lambda th, ph: 1.0), True, float(self.H * self.W)
+		for t in self.iter_tiles(write=True):
+			# 타일은 전체 합으로 정규화 (LPF.build_from_source_distribution(total=...))
+			t.build_from_source_distribution(distribution, vectorized, total=total)
+
+	def _tile_grid(self, ti: int, tj: int) -> Tuple[np.ndarray, np.ndarray]:
+		i0, i1, j0, j1 = self.tile_bounds(ti, tj)
+		theta_res, phi_res = self.cfg.resolutions()
+		return uniform_angle_grid(i1 - i0, j1 - j0, theta_res, offset=(i0, j0), phi_resolution_deg=phi_res)
+
+	# ---------------- 쿼리/통계 ----------------
+	def energy_sum(self) -> float:
+		return float(sum(t.energy_sum() for t in self.iter_tiles()))
+
+	def distribution_map(self, step: int = 0, out: Optional[np.ndarray] = None) -> np.ndarray:
+		"""(H,W) float32 에너지 맵. RAM 에 들어가지 않으면 out 에 np.lib.format.open_memmap 등을 전달."""
+		if out is None:
+			out = np.zeros((self.H, self.W), dtype=np.float32)
+		elif out.shape != (self.H, self.W):
+			raise ValueError("out shape must be (H,W)")
+		for t in self.iter_tiles():
+			i0, j0 = t.offset
+			out[i0:i0 + t.H, j0:j0 + t.W] = t.distribution_map(step)
+		return out
+
+	def connectivity_violation_count(self, tol: float = 1e-6) -> int:
+		return int(sum(int(t.connectivity_violations(tol).sum()) for t in self.iter_tiles()))
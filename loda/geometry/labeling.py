@@ -1,12 +1,155 @@
 """Labeling 규칙.
 - 이름/색/레이어 -> label 결정
-현재 스텁: 단순 이름 기반 매핑.
+
+LabelRules: 설정 (labeling.yaml 형식) 의 규칙 목록을 컴파일
+- name 은 정규식 (search), color / layer 는 정확 일치 (ignore_case 면 대소문자 무시)
+- 조건이 하나뿐인 규칙: name 규칙들은 우선순위 순 alternation 정규식 하나, color/layer 규칙은 dict 조회
+  조건이 여러 개인 규칙만 순서대로 개별 검사. 먼저 정의된 규칙이 우선
+- 어떤 규칙에도 안 맞으면 default: 'name' (이름 대문자, 기존 동작) | 고정 label | null (미지정)
+- label_ids(names, colors, layers, vocabulary, face_ids): face 표 전체를 한 번에 처리
+  (고유 (이름, 색, 레이어) 조합만 규칙 평가 후 역인덱스로 펼침) -> vocabulary (MaterialTable 또는 이름 목록) 인덱스 int32,
+  없는 label = -1. face_ids 를 주면 메쉬 삼각형 순서로 gather
+assign_label(): DEFAULT_RULES (LENS*, *REFLECT*) 의 단건 조회
+OCCReader(label_rules=...) 가 body 이름을 이 규칙으로 label 하고 CAD face 별 label id 를 SceneGraph 에 저장
 """
-from typing import Dict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence
+import re
+import numpy as np
+import yaml
+
+_RULE_KEYS = ('label', 'name', 'color', 'layer')
+_NO_MATCH = object()
+
+
+@dataclass
+class LabelRule:
+    label: str
+    name: Optional[str] = None   # 정규식 (search)
+    color: Optional[str] = None  # 정확 일치
+    layer: Optional[str] = None  # 정확 일치
+
+    @property
+    def conditions(self) -> List[str]:
+        return [k for k in ('name', 'color', 'layer') if getattr(self, k) is not None]
+
+
+class LabelRules:
+    def __init__(self, rules: Sequence[LabelRule], default: Optional[str] = 'name', ignore_case: bool = True):
+        self.rules = list(rules)
+        self.default = default
+        self.ignore_case = ignore_case
+        self.labels: List[str] = list(dict.fromkeys(r.label for r in self.rules))
+        flags = re.IGNORECASE if ignore_case else 0
+        name_only, self._exact, self._mixed = [], {'color': {}, 'layer': {}}, []
+        for i, r in enumerate(self.rules):
+            cond = r.conditions
+            if not cond:
+                raise ValueError(f"labeling rule {i} ('{r.label}') has no name/color/layer condition")
+            try:
+                name_re = re.compile(r.name, flags) if r.name is not None else None
+            except re.error as e:
+                raise ValueError(f"labeling rule {i} ('{r.label}'): bad name pattern {r.name!r}: {e}") from e
+            if cond == ['name']:
+                name_only.append((i, r.name))
+            elif len(cond) == 1:
+                self._exact[cond[0]].setdefault(self._norm(getattr(r, cond[0])), i)
+            else:
+                self._mixed.append((i, name_re, r.color, r.layer))
+        # 앞에서부터 시도되는 lookahead alternation: 처음 성공한 그룹 = 가장 앞선 규칙
+        self._name_re = re.compile('|'.join(f"(?P<r{i}>(?=.*?(?:{p})))" for i, p in name_only), flags | re.DOTALL) if name_only else None
+        self._memo: Dict[tuple, Optional[str]] = {}
+
+    def _norm(self, v: Optional[str]) -> str:
+        v = '' if v is None else str(v)
+        return v.upper() if self.ignore_case else v
+
+    def _fallback(self, name: str) -> Optional[str]:
+        if self.default == 'name':
+            return name.upper() if self.ignore_case else name
+        return self.default
+
+    def _resolve(self, name: str, color: str, layer: str) -> Optional[str]:
+        best = len(self.rules)
+        if self._name_re is not None:
+            m = self._name_re.match(name)
+            if m is not None:
+                best = int(m.lastgroup[1:])
+        for field, value in (('color', color), ('layer', layer)):
+            i = self._exact[field].get(self._norm(value))
+            if i is not None and i < best:
+                best = i
+        for i, name_re, c, l in self._mixed:
+            if i >= best:
+                break
+            if ((name_re is None or name_re.search(name)) and (c is None or self._norm(c) == self._norm(color))
+                    and (l is None or self._norm(l) == self._norm(layer))):
+                best = i
+                break
+        return self.rules[best].label if best < len(self.rules) else self._fallback(name)
+
+    def describe(self) -> Dict[str, Any]:
+        """캐시 키용 (규칙 내용이 같으면 같은 값)."""
+        return {'rules': [{k: getattr(r, k) for k in _RULE_KEYS if getattr(r, k) is not None} for r in self.rules],
+                'default': self.default, 'ignore_case': self.ignore_case}
+
+    def vocabulary(self, names: Sequence[str] = ()) -> List[str]:
+        """규칙 label + names 에 대한 fall-back label (등장 순서) → label_ids 의 기본 어휘."""
+        extra = (self.label_of(str(n)) for n in names)
+        return list(dict.fromkeys(self.labels + [l for l in extra if l is not None]))
+
+    def label_of(self, name: str, color: str = '', layer: str = '') -> Optional[str]:
+        key = (name, color or '', layer or '')
+        label = self._memo.get(key, _NO_MATCH)
+        if label is _NO_MATCH:
+            label = self._memo[key] = self._resolve(*key)
+        return label
+
+    def label_ids(self, names, colors=None, layers=None, vocabulary=None, face_ids=None) -> np.ndarray:
+        """face 표 (F,) -> (F,) int32 label id (vocabulary 인덱스, 없으면 -1).
+        vocabulary: MaterialTable (.names) | label 이름 목록 | None (self.labels).
+        face_ids: 메쉬 삼각형별 face 인덱스 -> 결과를 삼각형 순서 (T,) 로 gather.
+        """
+        names = np.asarray(names, dtype=str).ravel()
+        colors, layers = (np.broadcast_to(np.asarray('' if a is None else a, dtype=str).ravel(), names.shape) for a in (colors, layers))
+        keys = np.char.add(np.char.add(np.char.add(np.char.add(names, '\x1f'), colors), '\x1f'), layers)
+        _, first, inv = np.unique(keys, return_index=True, return_inverse=True)
+        vocab = getattr(vocabulary, 'names', vocabulary) if vocabulary is not None else self.labels
+        index = {n: i for i, n in enumerate(vocab)}
+        uniq_ids = np.array([index.get(self.label_of(str(names[j]), str(colors[j]), str(layers[j])), -1) for j in first], dtype=np.int32)
+        ids = uniq_ids[inv.reshape(-1)]
+        return ids[np.asarray(face_ids, dtype=np.int64)] if face_ids is not None else ids
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], where: str = '<labeling>') -> 'LabelRules':
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{where}: top level must be a mapping")
+        for k in data:
+            if k not in ('rules', 'default', 'ignore_case'):
+                raise ValueError(f"{where}: unknown key '{k}' (expected rules/default/ignore_case)")
+        rules = []
+        for i, spec in enumerate(data.get('rules') or []):
+            loc = f"{where}: rules[{i}]"
+            if not isinstance(spec, dict):
+                raise ValueError(f"{loc} must be a mapping")
+            for k, v in spec.items():
+                if k not in _RULE_KEYS:
+                    raise ValueError(f"{loc}: unknown key '{k}' (expected one of {list(_RULE_KEYS)})")
+                if not isinstance(v, str):
+                    raise ValueError(f"{loc}.{k}: expected str, got {type(v).__name__}")
+            if 'label' not in spec:
+                raise ValueError(f"{loc}: missing 'label'")
+            rules.append(LabelRule(**spec))
+        return cls(rules, data.get('default', 'name'), bool(data.get('ignore_case', True)))
+
+    @classmethod
+    def load(cls, path: str) -> 'LabelRules':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(yaml.safe_load(f), where=path)
+
+
+DEFAULT_RULES = LabelRules([LabelRule('LENS', name='^LENS'), LabelRule('REFLECTOR', name='REFLECT')])
 
 def assign_label(name: str, color: str = '', layer: str = '') -> str:
-    if name.upper().startswith('LENS'):
-        return 'LENS'
-    if 'REFLECT' in name.upper():
-        return 'REFLECTOR'
-    return name.upper()
+    return DEFAULT_RULES.label_of(name, color, layer)
@@ -1,8 +1,15 @@
 """Meshing preset 스켈레톤.
 허용오차(deflection) 및 품질 프리셋 정의.
+
+MeshingPolicy: label 별 프리셋 (assign_label 결과 기준) + 선택적 국소 세분화 (RefineCriteria)
+- 예: POLICIES['optical'] = LENS/REFLECTOR 0.05 mm, HOUSING 2 mm, 그 외 medium
+- refine_mesh: 곡률 (같은 CAD face 안 인접 삼각형 법선 각) 또는 광선 hit 밀도 (hits/mm²) 가 임계값을 넘는
+  삼각형만 분할. 분할된 변을 공유하는 이웃도 1->2/1->3 분할 (T-junction 없음),
+  새 정점은 Phong tessellation (정점 법선 접평면 투영) 으로 곡면 쪽으로 이동
 """
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any, Tuple
+import numpy as np
 
 @dataclass
 class MeshingPreset:
@@ -18,3 +25,178 @@ PRESETS: Dict[str, MeshingPreset] = {
 
 def get_preset(name: str) -> MeshingPreset:
     return PRESETS.get(name, PRESETS['medium'])
+
+
+@dataclass
+class RefineCriteria:
+    curvature_deg: Optional[float] = None   # 인접 삼각형 법선 각이 이보다 크면 분할
+    hit_density: Optional[float] = None     # hits / mm² 가 이보다 크면 분할 (hits 필요)
+    max_iterations: int = 2
+    min_edge_mm: float = 0.0                # 가장 긴 변이 이보다 짧으면 더 나누지 않음
+    feature_angle_deg: float = 60.0         # 이보다 큰 꺾임은 CAD 모서리로 보고 곡률에서 제외
+    phong_alpha: float = 0.75
+
+@dataclass
+class MeshingPolicy:
+    name: str
+    default: MeshingPreset
+    per_label: Dict[str, MeshingPreset] = field(default_factory=dict)
+    refine: Optional[RefineCriteria] = None
+    refine_labels: Optional[Tuple[str, ...]] = None  # None = 모든 label
+
+    def preset_for(self, label: Optional[str]) -> MeshingPreset:
+        return self.per_label.get(label, self.default) if label is not None else self.default
+
+    def refines(self, label: Optional[str]) -> bool:
+        return self.refine is not None and (self.refine_labels is None or label in self.refine_labels)
+
+    def describe(self) -> Dict[str, Any]:
+        """캐시 키용 (내용이 같으면 같은 값)."""
+        p = lambda m: [m.linear_deflection, m.angular_deflection_deg]
+        return {'default': p(self.default), 'per_label': {k: p(v) for k, v in sorted(self.per_label.items())},
+                'refine': None if self.refine is None else vars(self.refine),
+                'refine_labels': None if self.refine_labels is None else sorted(self.refine_labels)}
+
+POLICIES: Dict[str, MeshingPolicy] = {
+    'optical': MeshingPolicy('optical', PRESETS['medium'], {
+        'LENS': MeshingPreset('lens', 0.05, 2.0),
+        'REFLECTOR': MeshingPreset('reflector', 0.05, 2.0),
+        'HOUSING': MeshingPreset('housing', 2.0, 20.0),
+    }, refine=RefineCriteria(curvature_deg=8.0, max_iterations=1), refine_labels=('LENS', 'REFLECTOR')),
+}
+
+def get_policy(spec) -> MeshingPolicy:
+    """MeshingPolicy | POLICIES 이름 | MeshingPreset/PRESETS 이름 (전체 동일 프리셋) -> MeshingPolicy."""
+    if isinstance(spec, MeshingPolicy):
+        return spec
+    if isinstance(spec, MeshingPreset):
+        return MeshingPolicy(spec.name, spec)
+    if spec in POLICIES:
+        return POLICIES[spec]
+    return MeshingPolicy(str(spec), get_preset(spec))
+
+
+# ---------------- 국소 세분화 ----------------
+def _face_normals(V: np.ndarray, F: np.ndarray):
+    n = np.cross(V[F[:, 1]] - V[F[:, 0]], V[F[:, 2]] - V[F[:, 0]])
+    area2 = np.linalg.norm(n, axis=1)
+    return n / np.maximum(area2, 1e-20)[:, None], 0.5 * area2
+
+def _edges(F: np.ndarray):
+    # 삼각형 변 (F,3) -> 고유 변 인덱스. 변 k 는 (F[:,k], F[:,(k+1)%3])
+    e = np.stack([F, np.roll(F, -1, axis=1)], axis=2).reshape(-1, 2)
+    uniq, inv = np.unique(np.sort(e, axis=1), axis=0, return_inverse=True)
+    return uniq, inv.reshape(-1, 3)
+
+def curvature_angles(V: np.ndarray, F: np.ndarray, face_ids: np.ndarray, feature_angle_deg: float = 60.0) -> np.ndarray:
+    """삼각형별 이웃 (같은 CAD face, feature 각 미만) 과의 최대 법선 각 [deg]."""
+    n, _ = _face_normals(V, F)
+    _, tri_edge = _edges(F)
+    flat = tri_edge.ravel()
+    tri = np.repeat(np.arange(F.shape[0]), 3)
+    order = np.argsort(flat, kind='stable')
+    e_sorted, t_sorted = flat[order], tri[order]
+    pair = np.nonzero(e_sorted[1:] == e_sorted[:-1])[0]  # 다양체 변: 연속 두 항목
+    a, b = t_sorted[pair], t_sorted[pair + 1]
+    ang = np.degrees(np.arccos(np.clip(np.einsum('ij,ij->i', n[a], n[b]), -1.0, 1.0)))
+    ok = (face_ids[a] == face_ids[b]) & (ang < feature_angle_deg)
+    out = np.zeros(F.shape[0])
+    np.maximum.at(out, a[ok], ang[ok])
+    np.maximum.at(out, b[ok], ang[ok])
+    return out
+
+def _vertex_normals(V, F, n, area):
+    vn = np.zeros_like(V)
+    for k in range(3):
+        np.add.at(vn, F[:, k], n * area[:, None])
+    return vn / np.maximum(np.linalg.norm(vn, axis=1, keepdims=True), 1e-20)
+
+def _split(V, F, fid, hits, mark, alpha, feature_angle_deg):
+    """mark 삼각형의 세 변 + 그 변을 공유하는 이웃을 분할 (red-green)."""
+    n, area = _face_normals(V, F)
+    vn = _vertex_normals(V, F, n, area)
+    edges, tri_edge = _edges(F)
+    split_edge = np.zeros(edges.shape[0], dtype=bool)
+    split_edge[tri_edge[mark].ravel()] = True
+    se = np.nonzero(split_edge)[0]
+    a, b = edges[se, 0], edges[se, 1]
+    m = 0.5 * (V[a] + V[b])
+    # Phong: 중점을 양 끝 정점 접평면에 투영한 평균 쪽으로 (급한 꺾임은 평면 중점 유지)
+    pa = m - np.einsum('ij,ij->i', m - V[a], vn[a])[:, None] * vn[a]
+    pb = m - np.einsum('ij,ij->i', m - V[b], vn[b])[:, None] * vn[b]
+    smooth = np.einsum('ij,ij->i', vn[a], vn[b]) > np.cos(np.radians(feature_angle_deg))
+    m = np.where(smooth[:, None], (1 - alpha) * m + alpha * 0.5 * (pa + pb), m)
+    mid_index = np.full(edges.shape[0], -1, dtype=np.int64)
+    mid_index[se] = V.shape[0] + np.arange(se.size)
+    V = np.concatenate([V, m])
+    newF, newI, newH = [], [], []
+    mids = mid_index[tri_edge]  # (F,3), 변 k 의 중점 (-1 = 분할 안 함)
+    cnt = (mids >= 0).sum(axis=1)
+    for k in range(4):
+        sel = np.nonzero(cnt == k)[0]
+        if sel.size == 0:
+            continue
+        T, M = F[sel], mids[sel]
+        if k == 0:
+            parts = [T]
+        elif k == 3:
+            parts = [np.stack([T[:, 0], M[:, 0], M[:, 2]], 1), np.stack([T[:, 1], M[:, 1], M[:, 0]], 1),
+                     np.stack([T[:, 2], M[:, 2], M[:, 1]], 1), M]
+        else:
+            # 분할 변이 k 번째 위치에 오도록 회전 후 팬 분할
+            r = np.argmax(M >= 0, axis=1) if k == 1 else np.argmin(M >= 0, axis=1) + 1
+            idx = (r[:, None] + np.arange(3)) % 3
+            T = np.take_along_axis(T, idx, 1); M = np.take_along_axis(M, idx, 1)
+            if k == 1:  # 변 0 (T0-T1) 분할
+                parts = [np.stack([T[:, 0], M[:, 0], T[:, 2]], 1), np.stack([M[:, 0], T[:, 1], T[:, 2]], 1)]
+            else:       # 변 0, 1 분할 (변 2 = T2-T0 유지)
+                parts = [np.stack([T[:, 0], M[:, 0], T[:, 2]], 1), np.stack([M[:, 0], M[:, 1], T[:, 2]], 1),
+                         np.stack([M[:, 0], T[:, 1], M[:, 1]], 1)]
+        for P in parts:
+            newF.append(P); newI.append(fid[sel])
+            if hits is not None:
+                sub_area = 0.5 * np.linalg.norm(np.cross(V[P[:, 1]] - V[P[:, 0]], V[P[:, 2]] - V[P[:, 0]]), axis=1)
+                newH.append(hits[sel] * sub_area / np.maximum(area[sel], 1e-20))
+    F = np.concatenate(newF); fid = np.concatenate(newI)
+    return V, F, fid, (np.concatenate(newH) if hits is not None else None)
+
+def refine_mesh(mesh, criteria: RefineCriteria, hits: Optional[np.ndarray] = None):
+    """기준을 넘는 삼각형만 세분화한 새 메쉬 (mesh 와 같은 타입: vertices/faces/face_ids).
+    hits: (F,) 삼각형별 광선 hit 수 (hit_density 기준용), 분할 시 면적 비로 나눠 전달.
+    """
+    V = np.asarray(mesh.vertices, dtype=np.float64)
+    F = np.asarray(mesh.faces, dtype=np.int64)
+    fid = np.asarray(mesh.face_ids)
+    h = None if hits is None else np.asarray(hits, dtype=np.float64)
+    for _ in range(criteria.max_iterations):
+        if F.shape[0] == 0:
+            break
+        n, area = _face_normals(V, F)
+        mark = np.zeros(F.shape[0], dtype=bool)
+        if criteria.curvature_deg is not None:
+            mark |= curvature_angles(V, F, fid, criteria.feature_angle_deg) > criteria.curvature_deg
+        if criteria.hit_density is not None and h is not None:
+            mark |= h / np.maximum(area, 1e-20) > criteria.hit_density
+        if criteria.min_edge_mm > 0:
+            longest = np.max(np.linalg.norm(V[F] - V[np.roll(F, -1, axis=1)], axis=2), axis=1)
+            mark &= longest > criteria.min_edge_mm
+        if not mark.any():
+            break
+        V, F, fid, h = _split(V, F, fid, h, mark, criteria.phong_alpha, criteria.feature_angle_deg)
+    return type(mesh)(V.astype(np.float32), F.astype(np.int32), fid.astype(np.int32))
+
+def refine_scene(scene, criteria: RefineCriteria, hits_by_mesh: Optional[Dict[str, np.ndarray]] = None, labels=None):
+    """SceneGraph.meshes 를 제자리 세분화 (예: 추적 후 hit 밀도 기반). labels 가 주어지면 해당 label 메쉬만."""
+    hits_by_mesh = hits_by_mesh or {}
+    mesh_labels = {}
+    stack = [scene.root]
+    while stack:
+        node = stack.pop()
+        if node.mesh_ref is not None:
+            mesh_labels.setdefault(node.mesh_ref, node.label)
+        stack.extend(node.children)
+    for ref, m in list(scene.meshes.items()):
+        if labels is not None and mesh_labels.get(ref) not in labels:
+            continue
+        scene.meshes[ref] = refine_mesh(m, criteria, hits_by_mesh.get(ref))
+    scene._flat = None  # 메쉬 AABB 가 바뀜
@@ -4,10 +4,40 @@
 - STEP -> SceneGraph, AxisRegistry, FaceMap
 - 단위/축 정규화
 
-현재는 실제 pythonocc-core 의존성 없이 인터페이스만 제공.
+테셀레이션 + 캐시:
+- load(step_path, preset) 는 meshing 프리셋 (linear/angular deflection) 으로 테셀레이션 (pythonocc-core, 지연 import)
+  preset 은 PRESETS/POLICIES 이름, MeshingPreset 또는 MeshingPolicy (body 별 label 결과로 프리셋 선택,
+  policy.refine 이 있으면 해당 label body 를 worker 안에서 refine_mesh)
+- label: OCCReader(label_rules=LabelRules | labeling.yaml 경로, 기본 DEFAULT_RULES) 로 body 이름 -> label.
+  CAD face 표 전체를 label_ids() 한 번으로 SceneGraph.face_label_ids (face id -> label_names 인덱스) 에 저장,
+  삼각형 순서는 SceneGraph.triangle_label_ids(mesh_ref)
+- 결과 (삼각형 배열, face -> label, SceneGraph, AxisRegistry) 는 내용 주소 캐시에 저장
+  키 = sha256(STEP 파일 내용 sha256, 정책 (프리셋 값), label 규칙, 캐시 포맷 버전) → 파일 내용이 같으면 경로/mtime 과 무관하게 적중
+- 캐시 레이아웃: <cache_dir>/<key>/scene.json + mesh_<k>_{vertices,faces,face_ids}.npy + face_label_ids.npy (np.load mmap_mode='r')
+  임시 디렉터리에 쓴 뒤 os.replace 로 교체 (동시 실행 안전)
+- cache_dir 기본값: $LODA_CACHE_DIR/mesh (없으면 ~/.cache/loda/mesh)
+- step_path 가 없으면 기존처럼 빈 그래프 반환
+
+병렬 테셀레이션:
+- XDE 트리 발견 (순차) 후 고유 body 형상을 BRep 파일로 넘겨 ProcessPoolExecutor(n_workers) 에서 body 별 테셀레이션
+- 결과는 발견 순서로 병합, CAD face id 는 병합 시 전역 연번 부여 → 출력은 n_workers 와 무관
+- .stl / .obj 는 pythonocc 없이 읽음 (read_mesh_file), 같은 body 작업/병합 경로 사용
+- SceneGraph.merged_mesh(): 인스턴스 변환을 적용한 world 좌표 단일 인덱스 메쉬 (face_ids 는 SceneGraph.faces 키)
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional, Any
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from loda.geometry.meshing import MeshingPolicy, get_policy, refine_mesh
+from loda.geometry.labeling import LabelRules, DEFAULT_RULES
+
+CACHE_VERSION = 2
+_IDENTITY = [1,0,0,0, 0,1,0,0, 0,0,1,0, 0,0,0,1]
 
 @dataclass
 class Axis:
@@ -25,19 +55,513 @@ class SceneNode:
     mesh_ref: Optional[str] = None
     label: Optional[str] = None
 
+@dataclass
+class TriMesh:
+    vertices: np.ndarray  # (V,3) float32
+    faces: np.ndarray     # (F,3) int32
+    face_ids: np.ndarray  # (F,) int32, 삼각형 -> CAD face id (SceneGraph.faces 키)
+
+@dataclass
+class FlatScene:
+    """SceneGraph.flatten() 결과. 인스턴스 = mesh_ref 가 있는 노드 (DFS 전위 순서)."""
+    world: np.ndarray        # (K,4,4) float32 world 변환
+    mesh_id: np.ndarray      # (K,) int32, mesh_names 인덱스
+    mesh_names: List[str]
+    labels: List[Optional[str]]
+    names: List[str]
+    aabb_min: np.ndarray     # (K,3) float32 world AABB (메쉬 없음 = NaN)
+    aabb_max: np.ndarray     # (K,3) float32
+    changed: np.ndarray      # (k,) int64, 마지막 flatten 에서 갱신된 인스턴스 (TLAS refit 용)
+    version: int = 0
+
+    def __len__(self) -> int:
+        return int(self.mesh_id.size)
+
+
 @dataclass
 class SceneGraph:
     root: SceneNode
     faces: Dict[int, str]  # faceId -> label/material key
+    meshes: Dict[str, TriMesh] = field(default_factory=dict)  # mesh_ref -> 삼각형 메쉬
+    face_label_ids: Optional[np.ndarray] = None  # (n_faces,) int32, face id -> label_names 인덱스 (-1 = 없음)
+    label_names: List[str] = field(default_factory=list)
+    _flat: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    def flatten(self) -> FlatScene:
+        """인스턴스별 world 변환/메쉬 id/label/AABB 를 연속 배열로.
+        결과는 캐시, 다음 호출에서는 transform 이 바뀐 노드의 서브트리 (DFS 에서 연속 구간) 만 다시 계산.
+        트리 구조/mesh_ref/label 이 바뀌면 전체 재구성. 반환 객체는 호출 간 같은 인스턴스 (제자리 갱신).
+        """
+        nodes, parent = [], []
+        stack = [(self.root, -1)]
+        while stack:
+            node, p = stack.pop()
+            parent.append(p)
+            nodes.append(node)
+            i = len(nodes) - 1
+            stack.extend((c, i) for c in reversed(node.children))
+        sig = [(id(n), n.mesh_ref, n.label, len(n.children)) for n in nodes]
+        local = np.array([np.asarray(n.transform, dtype=np.float64).reshape(4, 4) for n in nodes])
+        c = self._flat
+        if c is None or c['sig'] != sig or c['mesh_keys'] != list(self.meshes):
+            return self._flatten_full(nodes, np.array(parent, dtype=np.int64), sig, local)
+        changed_nodes = np.nonzero(np.any(local != c['local'], axis=(1, 2)))[0]
+        flat = c['flat']
+        flat.changed = np.zeros(0, dtype=np.int64)
+        if changed_nodes.size == 0:
+            return flat
+        c['local'] = local
+        world, end, node_inst = c['world'], c['end'], c['node_inst']
+        done = -1
+        upd = []
+        for i in changed_nodes:
+            if i < done:
+                continue  # 이미 갱신한 서브트리 안
+            for j in range(i, end[i]):
+                pw = world[c['parent'][j]] if c['parent'][j] >= 0 else np.eye(4)
+                world[j] = pw @ local[j]
+            done = end[i]
+            upd.append(node_inst[i:end[i]])
+        inst = np.concatenate(upd)
+        inst = inst[inst >= 0]
+        self._update_instances(flat, inst, world[c['inst_node'][inst]])
+        flat.changed = inst
+        flat.version += 1
+        return flat
+
+    def _flatten_full(self, nodes, parent, sig, local) -> FlatScene:
+        M = len(nodes)
+        world = np.empty((M, 4, 4))
+        end = np.arange(1, M + 1, dtype=np.int64)
+        for j in range(M):
+            world[j] = (world[parent[j]] if parent[j] >= 0 else np.eye(4)) @ local[j]
+        for j in range(M - 1, 0, -1):
+            # 전위 순서: 자식의 서브트리 끝이 부모 서브트리 끝의 후보
+            end[parent[j]] = max(end[parent[j]], end[j])
+        inst_node = np.array([j for j, n in enumerate(nodes) if n.mesh_ref is not None], dtype=np.int64)
+        node_inst = np.full(M, -1, dtype=np.int64)
+        node_inst[inst_node] = np.arange(inst_node.size)
+        mesh_names = list(self.meshes)
+        for j in inst_node:
+            if nodes[j].mesh_ref not in mesh_names:
+                mesh_names.append(nodes[j].mesh_ref)
+        K = inst_node.size
+        prev = self._flat['flat'] if self._flat is not None else None
+        flat = FlatScene(
+            world=np.zeros((K, 4, 4), dtype=np.float32),
+            mesh_id=np.array([mesh_names.index(nodes[j].mesh_ref) for j in inst_node], dtype=np.int32),
+            mesh_names=mesh_names,
+            labels=[nodes[j].label for j in inst_node],
+            names=[nodes[j].name for j in inst_node],
+            aabb_min=np.zeros((K, 3), dtype=np.float32),
+            aabb_max=np.zeros((K, 3), dtype=np.float32),
+            changed=np.arange(K, dtype=np.int64),
+            version=prev.version + 1 if prev is not None else 0,
+        )
+        # 메쉬 로컬 AABB (메쉬별 한 번)
+        lo = np.full((len(mesh_names), 3), np.nan); hi = np.full((len(mesh_names), 3), np.nan)
+        for k, name in enumerate(mesh_names):
+            m = self.meshes.get(name)
+            if m is not None and len(m.vertices):
+                v = np.asarray(m.vertices, dtype=np.float64)
+                lo[k], hi[k] = v.min(axis=0), v.max(axis=0)
+        self._flat = {'sig': sig, 'mesh_keys': list(self.meshes), 'local': local, 'world': world, 'parent': parent,
+                      'end': end, 'inst_node': inst_node, 'node_inst': node_inst, 'mesh_lo': lo, 'mesh_hi': hi, 'flat': flat}
+        self._update_instances(flat, np.arange(K), world[inst_node])
+        return flat
+
+    def _update_instances(self, flat: FlatScene, inst: np.ndarray, world: np.ndarray):
+        # world (k,4,4) 기록 + 8 꼭짓점 변환으로 world AABB
+        flat.world[inst] = world
+        mid = flat.mesh_id[inst]
+        lo, hi = self._flat['mesh_lo'][mid], self._flat['mesh_hi'][mid]
+        corners = np.stack([np.where(np.array(b, dtype=bool), hi, lo) for b in np.ndindex(2, 2, 2)], axis=1)  # (k,8,3)
+        w = np.einsum('kij,kcj->kci', world[:, :3, :3], corners) + world[:, None, :3, 3]
+        flat.aabb_min[inst] = w.min(axis=1)
+        flat.aabb_max[inst] = w.max(axis=1)
+
+    def triangle_label_ids(self, mesh_ref: str) -> np.ndarray:
+        """메쉬 삼각형 순서의 label id (T,) int32 (label_names 인덱스)."""
+        if self.face_label_ids is None:
+            raise ValueError("scene has no face label ids")
+        return self.face_label_ids[np.asarray(self.meshes[mesh_ref].face_ids, dtype=np.int64)]
+
+    def merged_mesh(self) -> TriMesh:
+        """모든 인스턴스를 world 좌표로 합친 메쉬 (DFS 순서)."""
+        flat = self.flatten()
+        V, F, I = [], [], []
+        base = 0
+        for k in range(len(flat)):
+            m = self.meshes.get(flat.mesh_names[flat.mesh_id[k]])
+            if m is None:
+                continue
+            W = flat.world[k].astype(np.float64)
+            v = np.asarray(m.vertices, dtype=np.float64)
+            V.append((v @ W[:3, :3].T + W[:3, 3]).astype(np.float32))
+            F.append(np.asarray(m.faces, dtype=np.int64) + base)
+            I.append(np.asarray(m.face_ids))
+            base += v.shape[0]
+        if not V:
+            return TriMesh(np.zeros((0, 3), np.float32), np.zeros((0, 3), np.int32), np.zeros(0, np.int32))
+        return TriMesh(np.concatenate(V), np.concatenate(F).astype(np.int32), np.concatenate(I).astype(np.int32))
 
 @dataclass
 class AxisRegistry:
     axes: Dict[str, Axis]
 
+
+def default_cache_dir() -> str:
+    root = os.environ.get('LODA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'loda'))
+    return os.path.join(root, 'mesh')
+
+def file_sha256(path: str, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _node_to_dict(n: SceneNode) -> Dict[str, Any]:
+    return {'name': n.name, 'transform': [float(v) for v in n.transform], 'mesh_ref': n.mesh_ref, 'label': n.label,
+            'children': [_node_to_dict(c) for c in n.children]}
+
+def _node_from_dict(d: Dict[str, Any]) -> SceneNode:
+    return SceneNode(d['name'], d['transform'], [_node_from_dict(c) for c in d['children']], d.get('mesh_ref'), d.get('label'))
+
+
 class OCCReader:
-    def load(self, step_path: str) -> Tuple[SceneGraph, AxisRegistry]:
-        # Placeholder: return empty graph
-        root = SceneNode(name='ROOT', transform=[1,0,0,0, 0,1,0,0, 0,0,1,0, 0,0,0,1], children=[])
-        sg = SceneGraph(root=root, faces={})
-        reg = AxisRegistry(axes={})
+    def __init__(self, cache_dir: Optional[str] = None, use_cache: bool = True, n_workers: int = 1, label_rules=None):
+        """label_rules: LabelRules | labeling.yaml 경로 | None (DEFAULT_RULES)."""
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.use_cache = use_cache
+        self.n_workers = int(n_workers)
+        if label_rules is None:
+            label_rules = DEFAULT_RULES
+        elif isinstance(label_rules, str):
+            label_rules = LabelRules.load(label_rules)
+        self.label_rules: LabelRules = label_rules
+        self.last_cache_hit = False
+
+    def cache_key(self, step_path: str, preset) -> str:
+        blob = json.dumps({'v': CACHE_VERSION, 'step': file_sha256(step_path),
+                           'policy': get_policy(preset).describe(), 'labels': self.label_rules.describe()}, sort_keys=True)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:32]
+
+    def load(self, step_path: str, preset='medium') -> Tuple[SceneGraph, AxisRegistry]:
+        self.last_cache_hit = False
+        if not os.path.exists(step_path):
+            # Placeholder: return empty graph
+            root = SceneNode(name='ROOT', transform=list(_IDENTITY), children=[])
+            return SceneGraph(root=root, faces={}), AxisRegistry(axes={})
+        preset = get_policy(preset)
+        entry = os.path.join(self.cache_dir, self.cache_key(step_path, preset)) if self.use_cache else None
+        if entry is not None and os.path.exists(os.path.join(entry, 'scene.json')):
+            self.last_cache_hit = True
+            return self._read_cache(entry)
+        sg, reg = self._tessellate(step_path, preset)
+        if entry is not None:
+            self._write_cache(entry, sg, reg)
         return sg, reg
+
+    # ---------------- 캐시 ----------------
+    def _write_cache(self, entry: str, sg: SceneGraph, reg: AxisRegistry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        meshes = {}
+        for k, (name, m) in enumerate(sg.meshes.items()):
+            for part in ('vertices', 'faces', 'face_ids'):
+                np.save(os.path.join(tmp, f"mesh_{k}_{part}.npy"), np.asarray(getattr(m, part)))
+            meshes[name] = k
+        if sg.face_label_ids is not None:
+            np.save(os.path.join(tmp, 'face_label_ids.npy'), np.asarray(sg.face_label_ids, dtype=np.int32))
+        doc = {
+            'format': 'loda.mesh',
+            'version': CACHE_VERSION,
+            'root': _node_to_dict(sg.root),
+            'faces': {str(k): v for k, v in sg.faces.items()},
+            'meshes': meshes,
+            'label_names': list(sg.label_names),
+            'axes': {k: {'origin': list(a.origin), 'z': list(a.z), 'x': list(a.x), 'y': list(a.y)} for k, a in reg.axes.items()},
+        }
+        with open(os.path.join(tmp, 'scene.json'), 'w', encoding='utf-8') as f:
+            json.dump(doc, f)
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # 다른 프로세스가 먼저 기록 (같은 키 = 같은 내용)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _read_cache(self, entry: str) -> Tuple[SceneGraph, AxisRegistry]:
+        with open(os.path.join(entry, 'scene.json'), 'r', encoding='utf-8') as f:
+            doc = json.load(f)
+        if doc.get('format') != 'loda.mesh' or doc.get('version') != CACHE_VERSION:
+            raise ValueError(f"Unsupported mesh cache entry {entry}")
+        meshes = {name: TriMesh(*(np.load(os.path.join(entry, f"mesh_{k}_{p}.npy"), mmap_mode='r') for p in ('vertices', 'faces', 'face_ids')))
+                  for name, k in doc['meshes'].items()}
+        ids_path = os.path.join(entry, 'face_label_ids.npy')
+        ids = np.load(ids_path, mmap_mode='r') if os.path.exists(ids_path) else None
+        sg = SceneGraph(_node_from_dict(doc['root']), {int(k): v for k, v in doc['faces'].items()}, meshes, ids, doc.get('label_names', []))
+        axes = {k: Axis(k, tuple(a['origin']), tuple(a['z']), tuple(a['x']), tuple(a['y'])) for k, a in doc['axes'].items()}
+        return sg, AxisRegistry(axes)
+
+    # ---------------- 테셀레이션 ----------------
+    def _tessellate(self, step_path: str, preset: MeshingPolicy) -> Tuple[SceneGraph, AxisRegistry]:
+        """발견 (순차) -> body 별 테셀레이션 (프로세스 풀) -> 발견 순서대로 병합 (face id 전역 부여)."""
+        ext = os.path.splitext(step_path)[1].lower()
+        with tempfile.TemporaryDirectory(prefix='loda_tess_') as work:
+            if ext in MESH_EXTENSIONS:
+                root, axes, bodies = read_mesh_file(step_path, self.label_rules)
+            else:
+                root, axes, bodies = self._discover_step(step_path, work)
+            jobs = []
+            for _, name, job in bodies:
+                label = self.label_rules.label_of(name)
+                p = preset.preset_for(label)
+                jobs.append((job, (p.linear_deflection, p.angular_deflection_deg), preset.refine if preset.refines(label) else None))
+            if self.n_workers > 1 and len(jobs) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.n_workers, len(jobs))) as ex:
+                    results = list(ex.map(_tessellate_body, jobs))
+            else:
+                results = [_tessellate_body(j) for j in jobs]
+        meshes: Dict[str, TriMesh] = {}
+        next_face = 0
+        for (key, _, _), (mesh, n_faces) in zip(bodies, results):
+            mesh.face_ids = (mesh.face_ids + next_face).astype(np.int32)
+            next_face += n_faces
+            meshes[key] = mesh
+        # CAD face 표 (face id 순서 = body 발견 순서) 를 한 번에 label
+        body_names = [name for _, name, _ in bodies]
+        face_names = np.repeat(np.asarray(body_names, dtype=str), [n for _, n in results]) if bodies else np.zeros(0, dtype=str)
+        vocab = self.label_rules.vocabulary(body_names)
+        ids = self.label_rules.label_ids(face_names, vocabulary=vocab)
+        faces = {k: (vocab[i] if i >= 0 else None) for k, i in enumerate(ids.tolist())}
+        return SceneGraph(root, faces, meshes, ids, vocab), axes
+
+    def _discover_step(self, step_path: str, work_dir: str):
+        """XDE 트리 순회. 반환: (root, AxisRegistry, [(mesh_ref, body 이름, ('brep', 경로))]), 고유 형상은 BRep 파일로 기록."""
+        try:
+            from OCC.Core.STEPCAFControl import STEPCAFControl_Reader
+            from OCC.Core.TDocStd import TDocStd_Document
+            from OCC.Core.XCAFDoc import XCAFDoc_DocumentTool
+            from OCC.Core.TDF import TDF_LabelSequence, TDF_Label
+            from OCC.Core.IFSelect import IFSelect_RetDone
+            from OCC.Core.BRepTools import breptools
+        except ImportError as e:
+            raise ImportError("STEP tessellation requires pythonocc-core (conda install -c conda-forge pythonocc-core); "
+                              "STL/OBJ files are read without it") from e
+        doc = TDocStd_Document("loda")
+        reader = STEPCAFControl_Reader()
+        reader.SetNameMode(True)
+        if reader.ReadFile(step_path) != IFSelect_RetDone:
+            raise ValueError(f"failed to read STEP file: {step_path}")
+        reader.Transfer(doc)
+        shape_tool = XCAFDoc_DocumentTool.ShapeTool(doc.Main())
+        bodies: List[Tuple[str, str, Tuple]] = []
+        seen = set()
+        axes: Dict[str, Axis] = {}
+
+        def trsf_rows(loc) -> List[float]:
+            t = loc.Transformation()
+            return [t.Value(r, c) for r in (1, 2, 3) for c in (1, 2, 3, 4)] + [0.0, 0.0, 0.0, 1.0]
+
+        def visit(label, transform, world) -> SceneNode:
+            name = label.GetLabelName() or label.EntryDumpToString()
+            if name.upper().startswith('AXIS'):
+                M = np.asarray(world, dtype=np.float64).reshape(4, 4)
+                axes[name] = Axis(name, tuple(M[:3, 3]), tuple(M[:3, 2]), tuple(M[:3, 0]), tuple(M[:3, 1]))
+            node = SceneNode(name, transform, [])
+            if shape_tool.IsAssembly(label):
+                comps = TDF_LabelSequence()
+                shape_tool.GetComponents(label, comps)
+                for i in range(1, comps.Length() + 1):
+                    comp = comps.Value(i)
+                    ref = TDF_Label()
+                    shape_tool.GetReferredShape(comp, ref)
+                    local = trsf_rows(shape_tool.GetLocation(comp))
+                    child_world = (np.asarray(world).reshape(4, 4) @ np.asarray(local).reshape(4, 4)).ravel().tolist()
+                    child = visit(ref, local, child_world)
+                    comp_name = comp.GetLabelName()
+                    if comp_name:
+                        child.name = comp_name
+                    node.children.append(child)
+            else:
+                key = label.EntryDumpToString()  # 같은 참조 형상은 BLAS 하나 (인스턴싱)
+                if key not in seen:
+                    seen.add(key)
+                    path = os.path.join(work_dir, f"body_{len(bodies)}.brep")
+                    breptools.Write(shape_tool.GetShape(label), path)
+                    bodies.append((key, name, ('brep', path)))
+                node.mesh_ref = key
+                node.label = self.label_rules.label_of(name)
+            return node
+
+        roots = TDF_LabelSequence()
+        shape_tool.GetFreeShapes(roots)
+        root = SceneNode('ROOT', list(_IDENTITY), [visit(roots.Value(i), list(_IDENTITY), list(_IDENTITY)) for i in range(1, roots.Length() + 1)])
+        return root, AxisRegistry(axes), bodies
+
+
+# ---------------- body 단위 작업 (프로세스 풀에서 실행, 모듈 수준 함수) ----------------
+def _tessellate_body(args) -> Tuple[TriMesh, int]:
+    """-> (TriMesh (face_ids 는 body 로컬 0..n-1), n_faces)."""
+    job, (linear_deflection, angular_deflection_deg), refine = args
+    if job[0] == 'brep':
+        mesh, n_faces = _mesh_brep(job[1], linear_deflection, angular_deflection_deg)
+    elif job[0] == 'poly':
+        mesh, n_faces = _mesh_polygons(job[1], job[2], job[3])
+    else:
+        raise ValueError(f"unknown body job '{job[0]}'")
+    if refine is not None:
+        mesh = refine_mesh(mesh, refine)
+    return mesh, n_faces
+
+def _mesh_brep(path: str, linear_deflection: float, angular_deflection_deg: float) -> Tuple[TriMesh, int]:
+    from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+    from OCC.Core.BRepTools import breptools
+    from OCC.Core.BRep import BRep_Builder, BRep_Tool
+    from OCC.Core.TopoDS import TopoDS_Shape, topods
+    from OCC.Core.TopExp import TopExp_Explorer
+    from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+    from OCC.Core.TopLoc import TopLoc_Location
+    shape = TopoDS_Shape()
+    breptools.Read(shape, path, BRep_Builder())
+    BRepMesh_IncrementalMesh(shape, linear_deflection, False, np.radians(angular_deflection_deg), True)
+    verts, tris, fids = [], [], []
+    base = 0
+    n_faces = 0
+    exp = TopExp_Explorer(shape, TopAbs_FACE)
+    while exp.More():
+        face = topods.Face(exp.Current())
+        exp.Next()
+        loc = TopLoc_Location()
+        tri = BRep_Tool.Triangulation(face, loc)
+        if tri is None:
+            continue
+        trsf = loc.Transformation()
+        nodes = [tri.Node(i).Transformed(trsf) for i in range(1, tri.NbNodes() + 1)]
+        verts.append(np.array([[p.X(), p.Y(), p.Z()] for p in nodes], dtype=np.float32))
+        t = np.array([tri.Triangle(i).Get() for i in range(1, tri.NbTriangles() + 1)], dtype=np.int32) - 1
+        if face.Orientation() == TopAbs_REVERSED:
+            t = t[:, [0, 2, 1]]
+        tris.append(t + base)
+        fids.append(np.full(t.shape[0], n_faces, dtype=np.int32))
+        base += len(nodes)
+        n_faces += 1
+    if not verts:
+        return _empty_mesh(), 0
+    return TriMesh(np.concatenate(verts), np.concatenate(tris), np.concatenate(fids)), n_faces
+
+def _mesh_polygons(vertices: np.ndarray, polygons: List[List[int]], face_of_polygon: List[int]) -> Tuple[TriMesh, int]:
+    """다각형 (vertices 인덱스) -> 팬 삼각분할, 중복 정점 병합, 퇴화 삼각형 제거."""
+    tris, fids = [], []
+    for poly, f in zip(polygons, face_of_polygon):
+        for k in range(1, len(poly) - 1):
+            tris.append((poly[0], poly[k], poly[k + 1]))
+            fids.append(f)
+    if not tris:
+        return _empty_mesh(), 0
+    V = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+    T = np.asarray(tris, dtype=np.int64)
+    uniq, inv = np.unique(V, axis=0, return_inverse=True)
+    T = inv.reshape(-1)[T]
+    ok = (T[:, 0] != T[:, 1]) & (T[:, 1] != T[:, 2]) & (T[:, 0] != T[:, 2])
+    fids = np.asarray(fids, dtype=np.int32)
+    return TriMesh(uniq.astype(np.float32), T[ok].astype(np.int32), fids[ok]), int(max(face_of_polygon) + 1)
+
+def _empty_mesh() -> TriMesh:
+    return TriMesh(np.zeros((0, 3), np.float32), np.zeros((0, 3), np.int32), np.zeros(0, np.int32))
+
+
+# ---------------- 순수 Python 메쉬 파일 (STL/OBJ) ----------------
+MESH_EXTENSIONS = ('.stl', '.obj')
+
+def read_mesh_file(path: str, label_rules: Optional[LabelRules] = None):
+    """STL (ascii/binary) / OBJ -> (root, AxisRegistry, [(mesh_ref, body 이름, ('poly', V, polys, face_of_poly))]).
+    body = STL solid 블록 / OBJ 'o' (없으면 'g') 그룹. OBJ 의 'g' 그룹은 body 안에서 CAD face 하나로 취급.
+    노드 label 은 label_rules (기본 DEFAULT_RULES).
+    """
+    rules = label_rules if label_rules is not None else DEFAULT_RULES
+    ext = os.path.splitext(path)[1].lower()
+    raw = _read_obj(path) if ext == '.obj' else _read_stl(path)
+    bodies, children = [], []
+    for name, V, polys, face_of in raw:
+        key = f"{len(bodies)}:{name}"
+        bodies.append((key, name, ('poly', V, polys, face_of)))
+        children.append(SceneNode(name, list(_IDENTITY), [], mesh_ref=key, label=rules.label_of(name)))
+    return SceneNode('ROOT', list(_IDENTITY), children), AxisRegistry({}), bodies
+
+def _read_stl(path: str):
+    base = os.path.splitext(os.path.basename(path))[0]
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) >= 84:
+        n = int(np.frombuffer(data, dtype='<u4', count=1, offset=80)[0])
+        if len(data) == 84 + 50 * n:
+            rec = np.frombuffer(data, dtype=np.dtype([('n', '<f4', 3), ('v', '<f4', (3, 3)), ('attr', '<u2')]), count=n, offset=84)
+            V = rec['v'].reshape(-1, 3)
+            polys = np.arange(3 * n).reshape(n, 3).tolist()
+            return [(base, V, polys, [0] * n)]
+    bodies, name, verts = [], base, []
+    for line in data.decode('latin-1').splitlines():
+        tok = line.split()
+        if not tok:
+            continue
+        if tok[0] == 'solid':
+            name, verts = (tok[1] if len(tok) > 1 else base), []
+        elif tok[0] == 'vertex':
+            verts.append([float(t) for t in tok[1:4]])
+        elif tok[0] == 'endsolid':
+            bodies.append(_stl_body(name, verts))
+            verts = []
+    if verts:
+        bodies.append(_stl_body(name, verts))
+    return bodies
+
+def _stl_body(name, verts):
+    V = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+    n = V.shape[0] // 3
+    return name, V[:3 * n], np.arange(3 * n).reshape(n, 3).tolist(), [0] * n
+
+def _read_obj(path: str):
+    V: List[List[float]] = []
+    bodies: List[Tuple[str, List[List[int]], List[int], Dict[str, int]]] = []
+    cur = None
+    group = 'default'
+    base = os.path.splitext(os.path.basename(path))[0]
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        lines = f.read().splitlines()
+    use_o = any(l.startswith('o ') for l in lines)
+    for line in lines:
+        tok = line.split()
+        if not tok or tok[0].startswith('#'):
+            continue
+        if tok[0] == 'v':
+            V.append([float(t) for t in tok[1:4]])
+        elif tok[0] == 'o' or (tok[0] == 'g' and not use_o):
+            cur = (' '.join(tok[1:]) or base, [], [], {})
+            bodies.append(cur)
+            group = 'default'
+        elif tok[0] == 'g':
+            group = ' '.join(tok[1:]) or 'default'
+        elif tok[0] == 'f':
+            if cur is None:
+                cur = (base, [], [], {})
+                bodies.append(cur)
+            idx = [int(t.split('/')[0]) for t in tok[1:]]
+            cur[1].append([i - 1 if i > 0 else len(V) + i for i in idx])
+            cur[2].append(cur[3].setdefault(group, len(cur[3])))
+    out = []
+    Varr = np.asarray(V, dtype=np.float32).reshape(-1, 3)
+    for name, polys, face_of, _ in bodies:
+        if not polys:
+            continue
+        # body 가 참조하는 정점만 전달 (worker 로 보내는 데이터 축소)
+        used, inv = np.unique(np.concatenate([np.asarray(p) for p in polys]), return_inverse=True)
+        k, local = 0, []
+        for p in polys:
+            local.append(inv[k:k + len(p)].tolist())
+            k += len(p)
+        out.append((name, Varr[used], local, face_of))
+    return out
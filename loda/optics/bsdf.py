@@ -1,19 +1,427 @@
 """BSDF 스켈레톤: dielectric, mirror, ggx, absorb.
-샘플/평가 함수 자리에 placeholder.
+
+배열 커널 (모두 (N,3) 입력, 재질 그룹 단위로 한 번에 호출):
+- dielectric : Snell + Fresnel (비편광), R 확률로 반사/굴절 선택 (TIR 은 반사). roughness>0 이면 GGX 미세면
+- mirror     : 완전 반사, throughput = reflectance (roughness>0 이면 GGX)
+- ggx        : GGX 미세면 반사 (VNDF 샘플링), throughput = reflectance * G1(wo)
+- absorb     : absorbance 만큼 흡수, 나머지는 Lambert 확산 반사
+
+규약:
+- wi: 입사 광선의 진행 방향 (표면을 향함), wo: 나가는 진행 방향
+- normal: 단위 법선. dielectric 은 바깥(ior=1 쪽)을 향한다고 가정 → wi·n < 0 이면 재질로 진입
+- evaluate(normal, wi, wo) 는 BSDF 값 f (delta 성분은 0)
+- 난수는 np.random.Generator (rng) 로만 사용
+- coating ('ar_550nm' 등): 단층 1/4 파장 MgF2 박막 해석식, abbe 가 있으면 Cauchy 분산 ior(λ)
+- sample_spectral: hero-wavelength lane (N,k) throughput, 분산 굴절은 'dispersed' 표시 (loda.optics.spectral)
+- make_bsdf(..., lut=True): Fresnel/albedo LUT 를 구워 캐시 (loda.optics.bsdf_lut)
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import numpy as np
+from loda.optics.registry import MATERIAL_TYPES
+
+_EPS = 1e-7
+
+
+# ---------------- 벡터 도우미 ----------------
+def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum('ij,ij->i', a, b)
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    return v / (np.linalg.norm(v, axis=-1, keepdims=True) + 1e-12)
+
+def reflect(d: np.ndarray, n: np.ndarray) -> np.ndarray:
+    return d - 2.0 * _dot(d, n)[:, None] * n
+
+def refract(d: np.ndarray, n: np.ndarray, eta: np.ndarray):
+    """n 은 d 와 반대쪽을 향함 (d·n<0), eta = n1/n2. 반환 (t (N,3), tir (N,) bool)."""
+    cos_i = -_dot(d, n)
+    sin2_t = eta * eta * np.maximum(0.0, 1.0 - cos_i * cos_i)
+    tir = sin2_t > 1.0
+    cos_t = np.sqrt(np.maximum(0.0, 1.0 - sin2_t))
+    t = eta[:, None] * d + (eta * cos_i - cos_t)[:, None] * n
+    return _normalize(t), tir
+
+def fresnel_dielectric(cos_i: np.ndarray, eta: np.ndarray) -> np.ndarray:
+    """비편광 Fresnel 반사율. cos_i>=0, eta = n1/n2. TIR 이면 1."""
+    cos_i = np.clip(cos_i, 0.0, 1.0)
+    sin2_t = eta * eta * (1.0 - cos_i * cos_i)
+    cos_t = np.sqrt(np.maximum(0.0, 1.0 - sin2_t))
+    rs = (eta * cos_i - cos_t) / (eta * cos_i + cos_t + _EPS)
+    rp = (cos_i - eta * cos_t) / (cos_i + eta * cos_t + _EPS)
+    return np.where(sin2_t >= 1.0, 1.0, 0.5 * (rs * rs + rp * rp))
+
+def dispersion_ior(ior, wavelength_nm, abbe=None):
+    """Cauchy 분산: n(λ) = A + B/λ², nd=ior (587.6nm), Abbe 수 Vd. abbe 가 없으면 상수."""
+    ior = np.asarray(ior, dtype=np.float64)
+    if abbe is None or wavelength_nm is None:
+        return ior
+    lf, lc, ld = 486.1, 656.3, 587.6
+    B = (ior - 1.0) / (abbe * (1.0 / lf**2 - 1.0 / lc**2))
+    return ior + B * (1.0 / np.asarray(wavelength_nm, dtype=np.float64) ** 2 - 1.0 / ld**2)
+
+def parse_coating(coating):
+    """'ar_550nm' -> (n_coat=1.38 (MgF2), 설계 파장 550). 'none'/None -> None."""
+    if not coating or str(coating).lower() == 'none':
+        return None
+    c = str(coating).lower()
+    if c.startswith('ar_') and c.endswith('nm'):
+        return 1.38, float(c[3:-2])
+    raise ValueError(f"unknown coating '{coating}'")
+
+def fresnel_coated(cos_i: np.ndarray, n_sub: np.ndarray, wavelength_nm, n_coat: float, design_nm: float) -> np.ndarray:
+    """공기 -> 단층 1/4 파장 박막 (n_coat, 두께 design/(4 n_coat)) -> 기판 반사율 (s/p 평균)."""
+    cos_i = np.clip(np.asarray(cos_i, dtype=np.float64), 0.0, 1.0)
+    wl = np.asarray(wavelength_nm, dtype=np.float64)
+    sin2 = 1.0 - cos_i * cos_i
+    cos_c = np.sqrt(np.maximum(0.0, 1.0 - sin2 / n_coat**2))
+    cos_s = np.sqrt(np.maximum(0.0, 1.0 - sin2 / n_sub**2)).astype(np.complex128)
+    delta = 2.0 * np.pi * n_coat * (design_nm / (4.0 * n_coat)) * cos_c / wl
+    ph = np.exp(-2j * delta)
+    R = 0.0
+    for pol in ('s', 'p'):
+        if pol == 's':
+            r01 = (cos_i - n_coat * cos_c) / (cos_i + n_coat * cos_c + _EPS)
+            r12 = (n_coat * cos_c - n_sub * cos_s) / (n_coat * cos_c + n_sub * cos_s + _EPS)
+        else:
+            r01 = (n_coat * cos_i - cos_c) / (n_coat * cos_i + cos_c + _EPS)
+            r12 = (n_sub * cos_c - n_coat * cos_s) / (n_sub * cos_c + n_coat * cos_s + _EPS)
+        r = (r01 + r12 * ph) / (1.0 + r01 * r12 * ph)
+        R = R + 0.5 * np.abs(r) ** 2
+    return np.asarray(R, dtype=np.float64)
+
+def two_sided_fresnel(f_outside, cos_i: np.ndarray, entering: np.ndarray, ior: np.ndarray) -> np.ndarray:
+    """바깥 입사 기준 반사율 f_outside(cos) 로 양방향 반사율 계산.
+    무손실 박막은 가역적이므로 안쪽 입사는 Snell 로 대응되는 바깥 각도에서 평가, TIR 이면 1.
+    """
+    sin_o = np.where(entering, 0.0, ior * np.sqrt(np.maximum(0.0, 1.0 - cos_i * cos_i)))
+    tir = sin_o >= 1.0
+    cos_out = np.where(entering, cos_i, np.sqrt(np.maximum(0.0, 1.0 - np.minimum(sin_o, 1.0) ** 2)))
+    return np.where(tir, 1.0, f_outside(cos_out))
+
+def _basis(n: np.ndarray):
+    # 법선 기준 정규직교 기저 (Duff et al. 2017, 분기 없음)
+    sign = np.where(n[:, 2] >= 0.0, 1.0, -1.0)
+    a = -1.0 / (sign + n[:, 2])
+    b = n[:, 0] * n[:, 1] * a
+    t = np.stack([1.0 + sign * n[:, 0] ** 2 * a, sign * b, -sign * n[:, 0]], axis=-1)
+    s = np.stack([b, sign + n[:, 1] ** 2 * a, -n[:, 1]], axis=-1)
+    return t, s
+
+def _to_local(v, t, s, n):
+    return np.stack([_dot(v, t), _dot(v, s), _dot(v, n)], axis=-1)
+
+def _to_world(v, t, s, n):
+    return v[:, 0:1] * t + v[:, 1:2] * s + v[:, 2:3] * n
+
+
+# ---------------- GGX ----------------
+def ggx_D(cos_m: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    a2 = alpha * alpha
+    d = cos_m * cos_m * (a2 - 1.0) + 1.0
+    return np.where(cos_m > 0, a2 / (np.pi * d * d + 1e-20), 0.0)
+
+def ggx_G1(cos_w: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    c2 = np.clip(cos_w * cos_w, 1e-12, 1.0)
+    tan2 = (1.0 - c2) / c2
+    return 2.0 / (1.0 + np.sqrt(1.0 + alpha * alpha * tan2))
+
+def ggx_sample_vndf(v_local: np.ndarray, alpha: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> np.ndarray:
+    """가시 법선 분포 샘플 (Heitz 2018). v_local: 표면에서 나가는 방향 (z>0), 반환 미세면 법선 (N,3)."""
+    vh = _normalize(np.stack([alpha * v_local[:, 0], alpha * v_local[:, 1], v_local[:, 2]], axis=-1))
+    lensq = vh[:, 0] ** 2 + vh[:, 1] ** 2
+    inv = np.where(lensq > 0, 1.0 / np.sqrt(np.where(lensq > 0, lensq, 1.0)), 0.0)
+    T1 = np.where((lensq > 0)[:, None], np.stack([-vh[:, 1] * inv, vh[:, 0] * inv, np.zeros_like(inv)], axis=-1), np.array([1.0, 0.0, 0.0]))
+    T2 = np.cross(vh, T1)
+    r = np.sqrt(u1)
+    phi = 2.0 * np.pi * u2
+    t1 = r * np.cos(phi)
+    t2 = r * np.sin(phi)
+    s = 0.5 * (1.0 + vh[:, 2])
+    t2 = (1.0 - s) * np.sqrt(np.maximum(0.0, 1.0 - t1 * t1)) + s * t2
+    nh = t1[:, None] * T1 + t2[:, None] * T2 + np.sqrt(np.maximum(0.0, 1.0 - t1 * t1 - t2 * t2))[:, None] * vh
+    return _normalize(np.stack([alpha * nh[:, 0], alpha * nh[:, 1], np.maximum(1e-6, nh[:, 2])], axis=-1))
+
+
+# ---------------- 재질 커널 ----------------
+def _prep(normal, wi):
+    n = np.atleast_2d(np.asarray(normal, dtype=np.float64))
+    d = np.atleast_2d(np.asarray(wi, dtype=np.float64))
+    n = np.broadcast_to(_normalize(n), d.shape)
+    return n, _normalize(d)
+
+def _param(params: Dict[str, Any], key: str, default: float, n: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(params.get(key, default), dtype=np.float64), (n,))
+
+def _facing(n: np.ndarray, d: np.ndarray) -> np.ndarray:
+    # d 와 반대쪽(입사측)을 향하도록 법선 뒤집기
+    return np.where((_dot(d, n) > 0)[:, None], -n, n)
+
+def sample_conductor(normal, wi, reflectance, roughness, rng) -> Dict[str, np.ndarray]:
+    """mirror / ggx 반사. roughness=GGX alpha (0 이면 완전 반사)."""
+    n, d = _prep(normal, wi)
+    N = d.shape[0]
+    R = np.broadcast_to(np.asarray(reflectance, dtype=np.float64), (N,))
+    alpha = np.broadcast_to(np.asarray(roughness, dtype=np.float64), (N,))
+    nf = _facing(n, d)
+    wo = reflect(d, nf)
+    thr = R.copy()
+    rough = alpha > 1e-4
+    if rough.any():
+        idx = np.nonzero(rough)[0]
+        t, s = _basis(nf[idx])
+        v = _to_local(-d[idx], t, s, nf[idx])
+        a = alpha[idx]
+        m = ggx_sample_vndf(v, a, rng.random(idx.size), rng.random(idx.size))
+        o = 2.0 * _dot(v, m)[:, None] * m - v
+        ok = o[:, 2] > 0
+        wo[idx] = _to_world(o, t, s, nf[idx])
+        thr[idx] = np.where(ok, R[idx] * ggx_G1(o[:, 2], a), 0.0)
+    return {'wo': wo.astype(np.float32), 'throughput': thr.astype(np.float32), 'transmitted': np.zeros(N, dtype=bool)}
+
+def sample_dielectric(normal, wi, ior, roughness, rng, fresnel=None) -> Dict[str, np.ndarray]:
+    """Fresnel 확률 반사/굴절. 선택 확률이 Fresnel 값과 같으므로 throughput 은 1 (거친 면은 G1(wo) 가중).
+    fresnel: 선택. fresnel(cos_i, entering) -> F (코팅/LUT), 없으면 비코팅 Fresnel.
+    """
+    n, d = _prep(normal, wi)
+    N = d.shape[0]
+    ior = np.broadcast_to(np.asarray(ior, dtype=np.float64), (N,))
+    alpha = np.broadcast_to(np.asarray(roughness, dtype=np.float64), (N,))
+    entering = _dot(d, n) < 0
+    eta = np.where(entering, 1.0 / ior, ior)
+    nf = _facing(n, d)
+    m = nf
+    rough = alpha > 1e-4
+    if rough.any():
+        idx = np.nonzero(rough)[0]
+        t, s = _basis(nf[idx])
+        v = _to_local(-d[idx], t, s, nf[idx])
+        m = nf.copy()
+        m[idx] = _to_world(ggx_sample_vndf(v, alpha[idx], rng.random(idx.size), rng.random(idx.size)), t, s, nf[idx])
+    cos_i = np.abs(_dot(d, m))
+    F = fresnel_dielectric(cos_i, eta) if fresnel is None else fresnel(cos_i, entering)
+    refl = rng.random(N) < F
+    tr, tir = refract(d, m, eta)
+    refl |= tir
+    wo = np.where(refl[:, None], reflect(d, m), tr)
+    thr = np.ones(N)
+    if rough.any():
+        # 미세면 샘플 결과가 거시 법선 기준 잘못된 쪽이면 소멸, 아니면 G1(wo) 가중
+        cos_o = _dot(wo, nf)
+        wrong = np.where(refl, cos_o <= 0, cos_o >= 0)
+        thr = np.where(rough, np.where(wrong, 0.0, ggx_G1(np.abs(cos_o), alpha)), thr)
+    return {'wo': wo.astype(np.float32), 'throughput': thr.astype(np.float32), 'transmitted': ~refl, 'cos_m': cos_i, 'entering': entering}
+
+def sample_absorb(normal, wi, absorbance, rng) -> Dict[str, np.ndarray]:
+    """absorbance 흡수, 나머지 (1-absorbance) 는 코사인 가중 Lambert 반사."""
+    n, d = _prep(normal, wi)
+    N = d.shape[0]
+    A = np.broadcast_to(np.asarray(absorbance, dtype=np.float64), (N,))
+    nf = _facing(n, d)
+    u1, u2 = rng.random(N), rng.random(N)
+    r = np.sqrt(u1); phi = 2.0 * np.pi * u2
+    local = np.stack([r * np.cos(phi), r * np.sin(phi), np.sqrt(np.maximum(0.0, 1.0 - u1))], axis=-1)
+    t, s = _basis(nf)
+    wo = _to_world(local, t, s, nf)
+    return {'wo': wo.astype(np.float32), 'throughput': (1.0 - A).astype(np.float32), 'transmitted': np.zeros(N, dtype=bool)}
+
+def eval_conductor(normal, wi, wo, reflectance, roughness) -> np.ndarray:
+    n, d = _prep(normal, wi)
+    l = _normalize(np.atleast_2d(np.asarray(wo, dtype=np.float64)))
+    N = d.shape[0]
+    R = np.broadcast_to(np.asarray(reflectance, dtype=np.float64), (N,))
+    alpha = np.maximum(np.broadcast_to(np.asarray(roughness, dtype=np.float64), (N,)), 1e-4)
+    nf = _facing(n, d)
+    v = -d
+    cv, cl = _dot(v, nf), _dot(l, nf)
+    h = _normalize(v + l)
+    f = R * ggx_D(_dot(h, nf), alpha) * ggx_G1(cv, alpha) * ggx_G1(cl, alpha) / (4.0 * np.abs(cv) * np.abs(cl) + 1e-12)
+    delta = np.broadcast_to(np.asarray(roughness, dtype=np.float64), (N,)) <= 1e-4
+    return np.where((cl > 0) & ~delta, f, 0.0).astype(np.float32)
+
+def eval_dielectric(normal, wi, wo, ior, roughness) -> np.ndarray:
+    """거친 dielectric 의 반사+투과 BSDF (Walter 2007). 매끈한 면은 delta → 0."""
+    n, d = _prep(normal, wi)
+    l = _normalize(np.atleast_2d(np.asarray(wo, dtype=np.float64)))
+    N = d.shape[0]
+    ior = np.broadcast_to(np.asarray(ior, dtype=np.float64), (N,))
+    rough_in = np.broadcast_to(np.asarray(roughness, dtype=np.float64), (N,))
+    alpha = np.maximum(rough_in, 1e-4)
+    entering = _dot(d, n) < 0
+    eta_i = np.where(entering, 1.0, ior)
+    eta_o = np.where(entering, ior, 1.0)
+    nf = _facing(n, d)
+    v = -d
+    cv, cl = _dot(v, nf), _dot(l, nf)
+    is_refl = cl > 0
+    # 반사
+    hr = _normalize(v + l)
+    Fr = fresnel_dielectric(np.abs(_dot(v, hr)), eta_i / eta_o)
+    G = ggx_G1(np.abs(cv), alpha) * ggx_G1(np.abs(cl), alpha)
+    fr = Fr * ggx_D(_dot(hr, nf), alpha) * G / (4.0 * np.abs(cv * cl) + 1e-12)
+    # 투과
+    ht = -_normalize(eta_i[:, None] * v + eta_o[:, None] * l)
+    ht = np.where((_dot(ht, nf) < 0)[:, None], -ht, ht)
+    vh, lh = _dot(v, ht), _dot(l, ht)
+    Ft = fresnel_dielectric(np.abs(vh), eta_i / eta_o)
+    denom = (eta_i * vh + eta_o * lh) ** 2 + 1e-12
+    ft = np.abs(vh * lh) * eta_o ** 2 * (1.0 - Ft) * ggx_D(_dot(ht, nf), alpha) * G / (np.abs(cv * cl) * denom + 1e-12)
+    f = np.where(is_refl, fr, ft)
+    return np.where(rough_in > 1e-4, f, 0.0).astype(np.float32)
+
+def eval_absorb(normal, wi, wo, absorbance) -> np.ndarray:
+    n, d = _prep(normal, wi)
+    l = np.atleast_2d(np.asarray(wo, dtype=np.float64))
+    N = d.shape[0]
+    A = np.broadcast_to(np.asarray(absorbance, dtype=np.float64), (N,))
+    nf = _facing(n, d)
+    return np.where(_dot(l, nf) > 0, (1.0 - A) / np.pi, 0.0).astype(np.float32)
+
 
 class BSDF:
-    def __init__(self, mat_type: str, params: Dict[str, Any]):
+    def __init__(self, mat_type: str, params: Dict[str, Any], lut=None):
         self.type = mat_type
         self.params = params
+        self.lut = lut  # loda.optics.bsdf_lut.BSDFLut (선택)
+        self.coating = parse_coating(params.get('coating')) if mat_type == 'dielectric' else None
+
+    def ior_at(self, wavelength_nm=None):
+        wl = wavelength_nm if wavelength_nm is not None else self.params.get('wavelength_nm')
+        return dispersion_ior(self.params.get('ior', 1.5), wl, self.params.get('abbe'))
+
+    def _fresnel_fn(self, ior, wavelength_nm):
+        # LUT > 코팅 해석식 > (None) 비코팅 Fresnel
+        wl = wavelength_nm if wavelength_nm is not None else self.params.get('wavelength_nm', 550.0)
+        if self.lut is not None:
+            rough = self.params.get('roughness', 0.0)
+            return lambda c, ent: two_sided_fresnel(lambda co: self.lut.fresnel(co, rough, wl), c, ent, ior)
+        if self.coating is not None:
+            n_coat, design = self.coating
+            return lambda c, ent: two_sided_fresnel(lambda co: fresnel_coated(co, ior, wl, n_coat, design), c, ent, ior)
+        return None
+
+    def sample(self, normal, wi, rng=None, wavelength_nm=None) -> Dict[str, Any]:
+        """(N,3) 법선/입사 방향 -> {'wo': (N,3), 'throughput': (N,), 'transmitted': (N,) bool}.
+        (3,) 단일 입력이면 결과도 단일 광선 형태. wavelength_nm: 분산/코팅 평가 파장 (스칼라 또는 (N,)).
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        single = np.ndim(wi) == 1
+        n = np.atleast_2d(np.asarray(wi)).shape[0]
+        p = self.params
+        if self.type == 'dielectric':
+            ior = np.broadcast_to(self.ior_at(wavelength_nm), (n,))
+            out = sample_dielectric(normal, wi, ior, _param(p, 'roughness', 0.0, n), rng, fresnel=self._fresnel_fn(ior, wavelength_nm))
+        elif self.type == 'mirror':
+            out = sample_conductor(normal, wi, _param(p, 'reflectance', 1.0, n), _param(p, 'roughness', 0.0, n), rng)
+        elif self.type == 'ggx':
+            out = sample_conductor(normal, wi, _param(p, 'reflectance', 1.0, n), _param(p, 'roughness', 0.1, n), rng)
+        elif self.type == 'absorb':
+            out = sample_absorb(normal, wi, _param(p, 'absorbance', 1.0, n), rng)
+        else:  # 알 수 없는 재질: 통과
+            d = np.atleast_2d(np.asarray(wi, dtype=np.float32))
+            out = {'wo': d, 'throughput': np.ones(n, dtype=np.float32), 'transmitted': np.ones(n, dtype=bool)}
+        if single:
+            return {'wo': out['wo'][0], 'throughput': float(out['throughput'][0]), 'transmitted': bool(out['transmitted'][0])}
+        return out
+
+    def sample_spectral(self, normal, wi, wavelength_nm, rng=None) -> Dict[str, Any]:
+        """hero-wavelength 샘플: wavelength_nm (N,k), 열 0 = hero.
+        방향은 hero 파장으로 고르고, 동반 lane throughput 은 선택된 분기 (반사/굴절) 의 Fresnel 비로 보정.
+        분산 재질 (abbe) 의 굴절은 파장마다 방향이 다르므로 'dispersed' 로 표시 → spectral.terminate_secondary.
+        반환: wo (N,3), throughput (N,k), transmitted (N,), dispersed (N,).
+        (3,) 단일 입력 (wavelength_nm (k,)) 이면 wo (3,), throughput (k,), 나머지는 bool.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        single = np.ndim(wi) == 1
+        normal, wi = np.atleast_2d(np.asarray(normal, dtype=np.float64)), np.atleast_2d(np.asarray(wi, dtype=np.float64))
+        wl = np.atleast_2d(np.asarray(wavelength_nm, dtype=np.float64))
+        out = self.sample(normal, wi, rng, wavelength_nm=wl[:, 0])
+        thr = np.repeat(np.asarray(out['throughput'], dtype=np.float64)[:, None], wl.shape[1], axis=1)
+        dispersed = np.zeros(wl.shape[0], dtype=bool)
+        if self.type == 'dielectric' and wl.shape[1] > 1:
+            cos_m, ent, tr = out['cos_m'][:, None], out['entering'][:, None], out['transmitted']
+            ior = self.ior_at(wl)
+            fn = self._fresnel_fn(ior, wl)
+            F = fresnel_dielectric(cos_m, np.where(ent, 1.0 / ior, ior)) if fn is None else fn(np.broadcast_to(cos_m, wl.shape), np.broadcast_to(ent, wl.shape))
+            F0 = F[:, :1]
+            ratio = np.where(tr[:, None], (1.0 - F) / np.maximum(1.0 - F0, _EPS), F / np.maximum(F0, _EPS))
+            thr *= ratio
+            if self.params.get('abbe') is not None:
+                dispersed = tr.copy()
+        if single:
+            return {'wo': out['wo'][0], 'throughput': thr[0].astype(np.float32), 'transmitted': bool(out['transmitted'][0]), 'dispersed': bool(dispersed[0])}
+        return {'wo': out['wo'], 'throughput': thr.astype(np.float32), 'transmitted': out['transmitted'], 'dispersed': dispersed}
+
+    def albedo(self, cos_i, wavelength_nm=None) -> np.ndarray:
+        """방향 albedo (평균 throughput). LUT 가 있어야 함 (make_bsdf(..., lut=True))."""
+        if self.lut is None:
+            raise RuntimeError("albedo() requires a baked LUT (make_bsdf(..., lut=True))")
+        wl = wavelength_nm if wavelength_nm is not None else self.params.get('wavelength_nm', 550.0)
+        return self.lut.albedo(cos_i, self.params.get('roughness', 0.0), wl)
+
+    def evaluate(self, normal, wi, wo):
+        """BSDF 값 f(wi, wo) (N,) (delta 성분은 0). 단일 입력이면 float."""
+        single = np.ndim(wi) == 1
+        n = np.atleast_2d(np.asarray(wi)).shape[0]
+        p = self.params
+        if self.type == 'dielectric':
+            f = eval_dielectric(normal, wi, wo, _param(p, 'ior', 1.5, n), _param(p, 'roughness', 0.0, n))
+        elif self.type == 'mirror':
+            f = eval_conductor(normal, wi, wo, _param(p, 'reflectance', 1.0, n), _param(p, 'roughness', 0.0, n))
+        elif self.type == 'ggx':
+            f = eval_conductor(normal, wi, wo, _param(p, 'reflectance', 1.0, n), _param(p, 'roughness', 0.1, n))
+        elif self.type == 'absorb':
+            f = eval_absorb(normal, wi, wo, _param(p, 'absorbance', 1.0, n))
+        else:
+            f = np.ones(n, dtype=np.float32)
+        return float(f[0]) if single else f
+
+
+def make_bsdf(mat_type: str, params: Dict[str, Any], lut: bool = False, cache_dir: Optional[str] = None) -> BSDF:
+    """lut=True 면 (cos_theta_i, roughness, wavelength) Fresnel/albedo 표를 구워 디스크 캐시 (재질 파라미터 해시 키)."""
+    table = None
+    if lut:
+        from loda.optics.bsdf_lut import load_or_bake
+        table = load_or_bake(mat_type, params, cache_dir=cache_dir)
+    return BSDF(mat_type, params, lut=table)
+
+
+def make_bsdfs(registry, lut: bool = False, cache_dir: Optional[str] = None) -> Dict[str, BSDF]:
+    """OpticalRegistry.materials -> 재질 이름별 BSDF."""
+    return {name: make_bsdf(m.type, m.params, lut=lut, cache_dir=cache_dir) for name, m in registry.materials.items()}
+
 
-    def sample(self, normal, wi, rng) -> Dict[str, Any]:  # placeholder
-        return {"wo": wi, "throughput": 1.0}
+def bsdfs_from_table(table) -> list:
+    """MaterialTable 행 -> material id 순서 BSDF 목록 (표에 없는 코팅/LUT 는 make_bsdfs(registry) 사용)."""
+    out = []
+    for m, name in enumerate(table.names):
+        kind = MATERIAL_TYPES[int(table.type_id[m])]
+        params = {c: float(getattr(table, c)[m]) for c in ('ior', 'roughness', 'reflectance', 'absorbance')}
+        if np.isfinite(table.abbe[m]):
+            params['abbe'] = float(table.abbe[m])
+        out.append(BSDF(kind, params))
+    return out
 
-    def evaluate(self, normal, wi, wo) -> float:  # placeholder
-        return 1.0
 
+def sample_materials(table, material_ids, normal, wi, rng=None) -> Dict[str, np.ndarray]:
+    """재질이 섞인 광선 배치 샘플. table: registry.MaterialTable, material_ids: (N,) 정수.
+    재질 type 별로 묶어 커널을 한 번씩 호출 (파라미터는 SoA 표에서 광선별로 gather, 코팅/LUT 는 미적용).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n, d = _prep(normal, wi)
+    N = d.shape[0]
+    p = table.gather(material_ids)
+    out = {'wo': d.astype(np.float32), 'throughput': np.ones(N, dtype=np.float32), 'transmitted': np.ones(N, dtype=bool)}
+    for t, kind in enumerate(MATERIAL_TYPES):
+        idx = np.nonzero(p['type_id'] == t)[0]
+        if idx.size == 0:
+            continue
+        if kind == 'dielectric':
+            r = sample_dielectric(n[idx], d[idx], p['ior'][idx], p['roughness'][idx], rng)
+        elif kind == 'absorb':
+            r = sample_absorb(n[idx], d[idx], p['absorbance'][idx], rng)
+        else:
+            r = sample_conductor(n[idx], d[idx], p['reflectance'][idx], p['roughness'][idx], rng)
+        for k in out:
+            out[k][idx] = r[k]
+    return out
 
-def make_bsdf(mat_type: str, params: Dict[str, Any]) -> BSDF:
-    return BSDF(mat_type, params)
@@ -0,0 +1,151 @@
+"""BSDF LUT (사전 계산 표) + 디스크 캐시.
+
+표 축: (cos_theta_i, roughness, wavelength_nm)
+  - fresnel: 바깥(공기) 입사 반사율 (dielectric: 코팅/분산 포함, 도체: reflectance)
+  - albedo : 방향 albedo = 평균 throughput (고정 seed 몬테카를로, BSDF 커널 사용)
+
+캐시:
+  - 키 = sha256(재질 type, params, 축 설정, 포맷 버전)
+  - <cache_dir>/<key>.npy : (2, C, R, L) float32 [fresnel, albedo], np.load(mmap_mode='r') 로 열기
+  - <cache_dir>/<key>.json: 축 정보
+  - cache_dir 기본값: $LODA_CACHE_DIR/bsdf_lut (없으면 ~/.cache/loda/bsdf_lut)
+"""
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import numpy as np
+from loda.optics.bsdf import (dispersion_ior, parse_coating, fresnel_coated, fresnel_dielectric, two_sided_fresnel,
+                              sample_dielectric, sample_conductor, sample_absorb)
+
+LUT_VERSION = 1
+DEFAULT_AXES = {
+    'n_cos': 32,
+    'roughness': [0.0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.35, 0.5],
+    'wavelength_nm': [380, 430, 480, 530, 580, 630, 680, 730, 780],
+    'n_mc': 1024,
+}
+
+
+def default_cache_dir() -> str:
+    root = os.environ.get('LODA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'loda'))
+    return os.path.join(root, 'bsdf_lut')
+
+
+def _interp_index(axis: np.ndarray, x: np.ndarray):
+    # 선형 보간용 (하위 인덱스, 가중치), 축 밖은 clamp
+    x = np.clip(np.asarray(x, dtype=np.float64), axis[0], axis[-1])
+    if axis.size == 1:
+        return np.zeros(x.shape, dtype=np.int64), np.zeros(x.shape)
+    i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, axis.size - 2)
+    w = (x - axis[i]) / (axis[i + 1] - axis[i])
+    return i, w
+
+
+@dataclass
+class BSDFLut:
+    cos_axis: np.ndarray    # (C,)
+    rough_axis: np.ndarray  # (R,)
+    wl_axis: np.ndarray     # (L,)
+    data: np.ndarray        # (2, C, R, L) float32 (memmap 가능)
+
+    def _lookup(self, k: int, cos_i, roughness, wavelength_nm) -> np.ndarray:
+        cos_i = np.asarray(cos_i, dtype=np.float64)
+        shape = np.broadcast_shapes(cos_i.shape, np.shape(roughness), np.shape(wavelength_nm))
+        ic, wc = _interp_index(self.cos_axis, np.broadcast_to(cos_i, shape))
+        ir, wr = _interp_index(self.rough_axis, np.broadcast_to(roughness, shape))
+        il, wl = _interp_index(self.wl_axis, np.broadcast_to(wavelength_nm, shape))
+        tab = self.data[k]
+        C, R, L = tab.shape
+        out = np.zeros(shape)
+        for dc in (0, 1):
+            for dr in (0, 1):
+                for dl in (0, 1):
+                    w = (wc if dc else 1 - wc) * (wr if dr else 1 - wr) * (wl if dl else 1 - wl)
+                    out += w * tab[np.minimum(ic + dc, C - 1), np.minimum(ir + dr, R - 1), np.minimum(il + dl, L - 1)]
+        return out
+
+    def fresnel(self, cos_i, roughness, wavelength_nm) -> np.ndarray:
+        return self._lookup(0, cos_i, roughness, wavelength_nm)
+
+    def albedo(self, cos_i, roughness, wavelength_nm) -> np.ndarray:
+        return self._lookup(1, cos_i, roughness, wavelength_nm)
+
+
+def _axes(axes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    a = dict(DEFAULT_AXES)
+    a.update(axes or {})
+    return a
+
+
+def lut_key(mat_type: str, params: Dict[str, Any], axes: Optional[Dict[str, Any]] = None) -> str:
+    blob = json.dumps({'v': LUT_VERSION, 'type': mat_type, 'params': params, 'axes': _axes(axes)}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:32]
+
+
+def bake_lut(mat_type: str, params: Dict[str, Any], axes: Optional[Dict[str, Any]] = None, seed: int = 0) -> BSDFLut:
+    """재질 하나의 LUT 굽기. albedo 는 (cos, roughness, λ) 격자점마다 n_mc 샘플 평균."""
+    a = _axes(axes)
+    cos_axis = np.linspace(0.0, 1.0, int(a['n_cos']))
+    rough_axis = np.asarray(a['roughness'], dtype=np.float64)
+    wl_axis = np.asarray(a['wavelength_nm'], dtype=np.float64)
+    n_mc = int(a['n_mc'])
+    C, R, L = cos_axis.size, rough_axis.size, wl_axis.size
+    data = np.zeros((2, C, R, L), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    # 입사 방향 (바깥에서 +z 법선 면으로), cos=0 은 스침각 → 수치 안정 위해 작은 값
+    cc = np.maximum(cos_axis, 1e-4)
+    wi = np.stack([np.sqrt(1.0 - cc * cc), np.zeros(C), -cc], axis=-1)
+    normal = np.array([0.0, 0.0, 1.0])
+    coating = parse_coating(params.get('coating')) if mat_type == 'dielectric' else None
+    for l, wl in enumerate(wl_axis):
+        ior = float(dispersion_ior(params.get('ior', 1.5), wl, params.get('abbe')))
+        if mat_type == 'dielectric':
+            if coating is not None:
+                F = fresnel_coated(cos_axis, ior, wl, *coating)
+            else:
+                F = fresnel_dielectric(cos_axis, np.full(C, 1.0 / ior))
+        elif mat_type in ('mirror', 'ggx'):
+            F = np.full(C, params.get('reflectance', 1.0))
+        else:
+            F = np.zeros(C)
+        data[0, :, :, l] = F[:, None]
+        for r, rough in enumerate(rough_axis):
+            d = np.repeat(wi, n_mc, axis=0)
+            n = np.broadcast_to(normal, d.shape)
+            if mat_type == 'dielectric':
+                fr = None
+                if coating is not None:
+                    fr = lambda c, e, ior=ior, wl=wl: two_sided_fresnel(lambda co: fresnel_coated(co, ior, wl, *coating), c, e, ior)
+                out = sample_dielectric(n, d, ior, rough, rng, fresnel=fr)
+            elif mat_type in ('mirror', 'ggx'):
+                out = sample_conductor(n, d, params.get('reflectance', 1.0), rough, rng)
+            elif mat_type == 'absorb':
+                out = sample_absorb(n, d, params.get('absorbance', 1.0), rng)
+            else:
+                out = {'throughput': np.ones(d.shape[0])}
+            data[1, :, r, l] = out['throughput'].reshape(C, n_mc).mean(axis=1)
+    return BSDFLut(cos_axis, rough_axis, wl_axis, data)
+
+
+def load_or_bake(mat_type: str, params: Dict[str, Any], cache_dir: Optional[str] = None, axes: Optional[Dict[str, Any]] = None) -> BSDFLut:
+    """캐시에 있으면 memmap 으로 열고, 없으면 구워서 저장 후 반환."""
+    cache_dir = cache_dir or default_cache_dir()
+    key = lut_key(mat_type, params, axes)
+    npy = os.path.join(cache_dir, key + '.npy')
+    meta = os.path.join(cache_dir, key + '.json')
+    if os.path.exists(npy) and os.path.exists(meta):
+        with open(meta, 'r', encoding='utf-8') as f:
+            m = json.load(f)
+        return BSDFLut(np.asarray(m['cos_axis']), np.asarray(m['rough_axis']), np.asarray(m['wl_axis']), np.load(npy, mmap_mode='r'))
+    lut = bake_lut(mat_type, params, axes)
+    os.makedirs(cache_dir, exist_ok=True)
+    # 동시 실행 대비: 임시 파일에 쓴 뒤 교체 (json 을 마지막에 써서 완성 표시)
+    tmp = npy + f'.{os.getpid()}.tmp.npy'
+    np.save(tmp, lut.data)
+    os.replace(tmp, npy)
+    with open(meta + f'.{os.getpid()}.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'type': mat_type, 'params': params, 'cos_axis': lut.cos_axis.tolist(), 'rough_axis': lut.rough_axis.tolist(), 'wl_axis': lut.wl_axis.tolist()}, f, default=str)
+    os.replace(meta + f'.{os.getpid()}.tmp', meta)
+    return lut
@@ -17,22 +17,52 @@ class PlanarDetector:
         self.b = np.cross(self.normal, self.t)
         self.accum = np.zeros((self.res_y, self.res_x), dtype=np.float32)
 
+    def intersect_batch(self, O: np.ndarray, D: np.ndarray):
+        """(N,3) 원점/방향 -> t (N,), p (N,3), u (N,), v (N,), valid (N,) bool. invalid 항목의 t/p/u/v 는 NaN."""
+        O = np.atleast_2d(np.asarray(O, dtype=np.float64))
+        D = np.atleast_2d(np.asarray(D, dtype=np.float64))
+        n = self.normal.astype(np.float64)
+        c = self.center.astype(np.float64)
+        denom = D @ n
+        valid = np.abs(denom) >= 1e-8
+        t = ((c - O) @ n) / np.where(valid, denom, 1.0)
+        valid &= t > 1e-6
+        p = O + t[:, None]*D
+        dp = p - c
+        u = dp @ self.t.astype(np.float64); v = dp @ self.b.astype(np.float64)
+        valid &= (np.abs(u) <= self.width*0.5) & (np.abs(v) <= self.height*0.5)
+        nan = np.float64(np.nan)
+        return np.where(valid, t, nan), np.where(valid[:, None], p, nan), np.where(valid, u, nan), np.where(valid, v, nan), valid
+
     def intersect(self, o: np.ndarray, d: np.ndarray):
-        denom = float(self.normal @ d)
-        if abs(denom) < 1e-8:
-            return None
-        t = float(((self.center - o) @ self.normal)/denom)
-        if t <= 1e-6: 
-            return None
-        p = o + t*d
-        dp = p - self.center
-        u = float(dp @ self.t); v = float(dp @ self.b)
-        if abs(u) > self.width*0.5 or abs(v) > self.height*0.5:
+        t, p, u, v, valid = self.intersect_batch(np.asarray(o)[None], np.asarray(d)[None])
+        if not valid[0]:
             return None
-        return t, p, u, v
+        return float(t[0]), p[0], float(u[0]), float(v[0])
+
+    def add_batch(self, u: np.ndarray, v: np.ndarray, power):
+        """(u,v) 를 bin 으로 변환 (경계 밖은 가장자리로 clamp) 후 accum 에 일괄 누적. NaN 항목은 무시."""
+        u = np.asarray(u, dtype=np.float64).ravel()
+        v = np.asarray(v, dtype=np.float64).ravel()
+        power = np.broadcast_to(np.asarray(power, dtype=np.float64), u.shape)
+        ok = np.isfinite(u) & np.isfinite(v)
+        u, v, power = u[ok], v[ok], power[ok]
+        i = np.trunc(np.clip((u + self.width*0.5) / self.width * self.res_x, -1.0, self.res_x)).astype(np.int64)
+        j = np.trunc(np.clip((v + self.height*0.5) / self.height * self.res_y, -1.0, self.res_y)).astype(np.int64)
+        i = np.clip(i, 0, self.res_x-1); j = np.clip(j, 0, self.res_y-1)
+        # 맞은 픽셀만 갱신 (고유 인덱스별 합 후 한 번에 더함)
+        flat, inv = np.unique(j*self.res_x + i, return_inverse=True)
+        self.accum.reshape(-1)[flat] += np.bincount(inv.reshape(-1), weights=power).astype(np.float32)
 
     def add(self, u: float, v: float, power: float):
         i = int((u + self.width*0.5) / self.width * self.res_x)
         j = int((v + self.height*0.5) / self.height * self.res_y)
         i = max(0, min(self.res_x-1, i)); j = max(0, min(self.res_y-1, j))
         self.accum[j, i] += power
+
+    def score_batch(self, O: np.ndarray, D: np.ndarray, power) -> np.ndarray:
+        """intersect_batch + add_batch. 반환: valid mask (N,)."""
+        _, _, u, v, valid = self.intersect_batch(O, D)
+        power = np.broadcast_to(np.asarray(power, dtype=np.float64), valid.shape)
+        self.add_batch(u[valid], v[valid], power[valid])
+        return valid
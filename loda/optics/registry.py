@@ -1,10 +1,92 @@
 """Optical property registry.
 YAML (opticalproperty.yaml) 로드 & 검증 스켈레톤.
+
+- 스키마 (_SCHEMA) 로 한 번 검증: 알 수 없는 type/distribution, 숫자 범위, 잘못된 타입은 ValueError (위치 포함)
+- load() 결과는 절대 경로별 캐시: (mtime_ns, size) 가 같으면 재사용, 바뀌었으면 sha256 비교 후 다를 때만 재파싱
+  (캐시는 검증된 YAML dict, 호출마다 그 사본으로 새 레지스트리를 만듦 → 호출자끼리 params 를 공유하지 않음)
+- material_table(): 재질을 dense SoA 표로 컴파일 (material id = materials 정의 순서),
+  tracer 는 정수 material id 배열로 table.gather(ids) / table.ior[ids] 등을 직접 인덱싱
 """
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+import copy
+import hashlib
+import os
+import numpy as np
 import yaml
 
+MATERIAL_TYPES = ('dielectric', 'mirror', 'ggx', 'absorb')
+SOURCE_DISTRIBUTIONS = ('uniform', 'gaussian', 'tabulated', 'ies')
+SENSOR_TYPES = ('planar', 'spherical', 'surface_bin')
+
+# 필드: (허용 타입, 최소, 최대). None = 제한 없음
+_NUM = (int, float)
+_SCHEMA: Dict[str, Dict[str, Dict[str, Tuple]]] = {
+    'sources': {
+        'power': (_NUM, 0.0, None),
+        'fwhm_deg': (_NUM, 0.0, 180.0),
+        'fwhm': (_NUM, 0.0, 180.0),
+        'table_resolution_deg': (_NUM, 1e-6, 180.0),
+        'wavelength_nm': (_NUM, 100.0, 2000.0),
+        'spectrum': ((dict,), None, None),
+        'file': ((str,), None, None),
+        'theta_deg': ((list,), None, None),
+        'phi_deg': ((list,), None, None),
+        'intensity': ((list,), None, None),
+    },
+    'sensors': {
+        'size_mm': ((list,), None, None),
+        'res': ((list,), None, None),
+        'distance_mm': (_NUM, 0.0, None),
+        'theta_step_deg': (_NUM, 1e-6, 180.0),
+        'phi_step_deg': (_NUM, 1e-6, 360.0),
+        'theta_bins': ((int,), 1, None),
+        'phi_bins': ((int,), 1, None),
+        'spectral_edges_nm': ((list,), None, None),
+    },
+    'materials': {
+        'ior': (_NUM, 1.0, 5.0),
+        'abbe': (_NUM, 1.0, None),
+        'roughness': (_NUM, 0.0, 1.0),
+        'reflectance': (_NUM, 0.0, 1.0),
+        'absorbance': (_NUM, 0.0, 1.0),
+        'coating': ((str, type(None)), None, None),
+        'wavelength_nm': (_NUM, 100.0, 2000.0),
+    },
+}
+_TYPE_KEY = {'sources': ('distribution', SOURCE_DISTRIBUTIONS), 'sensors': ('type', SENSOR_TYPES), 'materials': ('type', MATERIAL_TYPES)}
+
+
+def validate(data: Any, where: str = '<registry>'):
+    """파싱된 YAML dict 검증. 첫 오류에서 ValueError."""
+    if data is None:
+        return
+    if not isinstance(data, dict):
+        raise ValueError(f"{where}: top level must be a mapping")
+    for section in data:
+        if section not in _SCHEMA:
+            raise ValueError(f"{where}: unknown section '{section}' (expected one of {sorted(_SCHEMA)})")
+    for section, fields in _SCHEMA.items():
+        entries = data.get(section) or {}
+        if not isinstance(entries, dict):
+            raise ValueError(f"{where}: '{section}' must be a mapping of name -> spec")
+        type_key, allowed = _TYPE_KEY[section]
+        for name, spec in entries.items():
+            loc = f"{where}: {section}.{name}"
+            if not isinstance(spec, dict):
+                raise ValueError(f"{loc} must be a mapping")
+            if type_key in spec and spec[type_key] not in allowed:
+                raise ValueError(f"{loc}.{type_key}: '{spec[type_key]}' not in {list(allowed)}")
+            for k, v in spec.items():
+                if k == type_key or k not in fields:
+                    continue  # 알 수 없는 키는 params 로 통과 (확장용)
+                types, lo, hi = fields[k]
+                if isinstance(v, bool) or not isinstance(v, types):
+                    raise ValueError(f"{loc}.{k}: expected {'/'.join(t.__name__ for t in types)}, got {type(v).__name__}")
+                if lo is not None and v < lo or hi is not None and v > hi:
+                    raise ValueError(f"{loc}.{k}: {v} outside [{lo}, {hi}]")
+
+
 @dataclass
 class SourceSpec:
     name: str
@@ -24,16 +106,75 @@ class MaterialSpec:
     type: str
     params: Dict[str, Any]
 
+
+@dataclass
+class MaterialTable:
+    """재질 SoA 표. 모든 배열은 (M,), 인덱스 = material id."""
+    names: List[str]
+    type_id: np.ndarray      # int8, MATERIAL_TYPES 인덱스
+    ior: np.ndarray          # float32
+    abbe: np.ndarray         # float32, 분산 없음 = NaN
+    roughness: np.ndarray    # float32
+    reflectance: np.ndarray  # float32
+    absorbance: np.ndarray   # float32
+
+    COLUMNS = ('type_id', 'ior', 'abbe', 'roughness', 'reflectance', 'absorbance')
+
+    @classmethod
+    def compile(cls, materials: Dict[str, MaterialSpec]) -> 'MaterialTable':
+        names = list(materials)
+        rows = [materials[n] for n in names]
+        def col(key, default_of):
+            return np.array([float(m.params.get(key, default_of(m))) for m in rows], dtype=np.float32)
+        # 기본값은 bsdf 커널과 동일
+        return cls(
+            names=names,
+            type_id=np.array([MATERIAL_TYPES.index(m.type) for m in rows], dtype=np.int8),
+            ior=col('ior', lambda m: 1.5),
+            abbe=col('abbe', lambda m: np.nan),
+            roughness=col('roughness', lambda m: 0.1 if m.type == 'ggx' else 0.0),
+            reflectance=col('reflectance', lambda m: 1.0),
+            absorbance=col('absorbance', lambda m: 1.0 if m.type == 'absorb' else 0.0),
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id_of(self, name: str) -> int:
+        return self.names.index(name)
+
+    def gather(self, material_ids) -> Dict[str, np.ndarray]:
+        """(N,) 정수 material id -> 열별 (N,) 배열."""
+        ids = np.asarray(material_ids, dtype=np.int64)
+        if ids.size and (ids.min() < 0 or ids.max() >= len(self)):
+            raise IndexError(f"material id out of range [0, {len(self)})")
+        return {c: getattr(self, c)[ids] for c in self.COLUMNS}
+
+
 @dataclass
 class OpticalRegistry:
     sources: Dict[str, SourceSpec]
     sensors: Dict[str, SensorSpec]
     materials: Dict[str, MaterialSpec]
+    _table: Optional[MaterialTable] = field(default=None, repr=False, compare=False)
+
+    def material_table(self) -> MaterialTable:
+        if self._table is None:
+            self._table = MaterialTable.compile(self.materials)
+        return self._table
+
+    def material_ids(self) -> Dict[str, int]:
+        return {n: i for i, n in enumerate(self.materials)}
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any], where: str = '<registry>') -> 'OpticalRegistry':
+        validate(data, where)
+        return OpticalRegistry._build(data)
 
     @staticmethod
-    def load(path: str) -> 'OpticalRegistry':
-        with open(path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+    def _build(data: Dict[str, Any]) -> 'OpticalRegistry':
+        # 검증된 dict -> 레지스트리 (params 는 data 의 값을 그대로 참조)
+        data = data or {}
         sources = {}
         for k, v in (data.get('sources') or {}).items():
             sources[k] = SourceSpec(k, v.get('power', 1.0), v.get('distribution','uniform'), {kk:vv for kk,vv in v.items() if kk not in ('power','distribution')})
@@ -44,3 +185,32 @@ class OpticalRegistry:
         for k, v in (data.get('materials') or {}).items():
             materials[k] = MaterialSpec(k, v.get('type','dielectric'), {kk:vv for kk,vv in v.items() if kk not in ('type',)})
         return OpticalRegistry(sources, sensors, materials)
+
+    @staticmethod
+    def load(path: str, use_cache: bool = True) -> 'OpticalRegistry':
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+        hit = _LOAD_CACHE.get(key) if use_cache else None
+        if hit is not None and hit[0] == stamp:
+            return OpticalRegistry._build(copy.deepcopy(hit[2]))
+        with open(key, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if hit is not None and hit[1] == digest:
+            # 내용은 같고 mtime 만 바뀜 (touch, checkout 등)
+            _LOAD_CACHE[key] = (stamp, digest, hit[2])
+            return OpticalRegistry._build(copy.deepcopy(hit[2]))
+        data = yaml.safe_load(raw.decode('utf-8'))
+        validate(data, path)
+        if use_cache:
+            _LOAD_CACHE[key] = (stamp, digest, data)
+            data = copy.deepcopy(data)
+        return OpticalRegistry._build(data)
+
+
+# 절대 경로 -> ((mtime_ns, size), sha256, 검증된 YAML dict)
+_LOAD_CACHE: Dict[str, Tuple[Tuple[int, int], str, Any]] = {}
+
+def clear_registry_cache():
+    _LOAD_CACHE.clear()
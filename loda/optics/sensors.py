@@ -1,34 +1,107 @@
 """센서 스켈레톤 (planar, spherical).
 각 센서는 accumulate(hit) 인터페이스 제공.
+accumulate_batch(...) 는 배열 단위 binning (맞은 bin 만 희소 누적), 스칼라 경로와 같은 bin 경계/범위 처리.
+분광 모드: accumulate_batch(..., wavelength_nm=(N,k)) 면 energy 도 (N,k) lane 에너지
+  - buffer: 복사량 (lane 합), photometric: 683 V(λ) 가중 광속 [lm]
+  - spectral_edges_nm 이 있으면 spectral (..., n_bins) 에 파장 bin 별 누적 (색수차 확인용)
 """
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Tuple, Optional
 import numpy as np
+from loda.optics.spectral import to_photometric
+
+def _scatter_add(buffer: np.ndarray, i: np.ndarray, j: np.ndarray, energy: np.ndarray, k: Optional[np.ndarray] = None):
+    # 범위 밖 (i,j[,k]) 는 버림, 같은 bin 중복은 고유 인덱스별 bincount 로 합산 → 맞은 bin 만 갱신 (O(hits))
+    ok = (i >= 0) & (i < buffer.shape[0]) & (j >= 0) & (j < buffer.shape[1])
+    flat = i * buffer.shape[1] + j
+    if k is not None:
+        ok &= (k >= 0) & (k < buffer.shape[2])
+        flat = flat * buffer.shape[2] + k
+    u, inv = np.unique(flat[ok], return_inverse=True)
+    buffer.reshape(-1)[u] += np.bincount(inv.reshape(-1), weights=np.broadcast_to(energy, ok.shape)[ok]).astype(buffer.dtype)
+
+class _SpectralMixin:
+    # PlanarSensor / SphericalSensor 공통: 분광 lane 누적
+    def _init_spectral(self, shape):
+        self.photometric = np.zeros(shape, dtype=np.float32)
+        edges = getattr(self, 'spectral_edges_nm', None)
+        self.spectral = None if edges is None else np.zeros(shape + (len(edges) - 1,), dtype=np.float32)
+
+    def _accumulate_lanes(self, i, j, energy, wavelength_nm):
+        # i, j: (N,) bin 인덱스, energy/wavelength_nm: (N,k)
+        wl = np.asarray(wavelength_nm, dtype=np.float64)
+        if wl.ndim == 1:
+            wl = wl[:, None]
+        e = np.broadcast_to(np.asarray(energy, dtype=np.float64).reshape(wl.shape[0], -1), wl.shape).ravel()
+        k = wl.shape[1]
+        i, j, wl = np.repeat(i, k), np.repeat(j, k), wl.ravel()
+        _scatter_add(self.buffer, i, j, e)
+        _scatter_add(self.photometric, i, j, to_photometric(e, wl))
+        if self.spectral is not None:
+            # bin 은 [e_k, e_k+1), 마지막 bin 만 닫힌 구간 (np.histogram 과 동일) → 마지막 모서리 파장도 포함
+            edges = np.asarray(self.spectral_edges_nm, dtype=np.float64)
+            b = np.searchsorted(edges, wl, side='right') - 1
+            b[wl == edges[-1]] = edges.size - 2
+            _scatter_add(self.spectral, i, j, e, b)
+
+    def _lane_sum(self, energy, n):
+        # 파장 없이 (N,k) 를 받으면 lane 합
+        e = np.asarray(energy, dtype=np.float64)
+        if e.ndim == 2:
+            e = e.sum(axis=1)
+        return np.broadcast_to(e, (n,))
+
+def _bin_index(f: np.ndarray) -> np.ndarray:
+    # 스칼라 경로의 int(...) 와 동일한 0 방향 절삭, 비유한 값은 -1 (버림)
+    f = np.where(np.isfinite(f), f, -1.0)
+    return np.trunc(np.clip(f, -1.0, 2.0**62)).astype(np.int64)
 
 @dataclass
-class PlanarSensor:
+class PlanarSensor(_SpectralMixin):
     size_mm: Tuple[float, float]
     res: Tuple[int, int]
     distance_mm: float
+    spectral_edges_nm: Optional[Tuple[float, ...]] = None
     def __post_init__(self):
         self.buffer = np.zeros(self.res, dtype=np.float32)
+        self._init_spectral(tuple(self.res))
     def accumulate(self, x, y, energy: float):
         i = int((x / self.size_mm[0] + 0.5) * self.res[0])
         j = int((y / self.size_mm[1] + 0.5) * self.res[1])
         if 0 <= i < self.res[0] and 0 <= j < self.res[1]:
             self.buffer[i, j] += energy
+    def accumulate_batch(self, x, y, energy, wavelength_nm=None):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        i = _bin_index((x / self.size_mm[0] + 0.5) * self.res[0])
+        j = _bin_index((y / self.size_mm[1] + 0.5) * self.res[1])
+        if wavelength_nm is not None:
+            self._accumulate_lanes(i, j, energy, wavelength_nm)
+        else:
+            _scatter_add(self.buffer, i, j, self._lane_sum(energy, x.size))
 
 @dataclass
-class SphericalSensor:
+class SphericalSensor(_SpectralMixin):
     theta_step_deg: float
     phi_step_deg: float
     distance_mm: float
+    spectral_edges_nm: Optional[Tuple[float, ...]] = None
     def __post_init__(self):
         th_bins = int(180 / self.theta_step_deg) + 1
         ph_bins = int(360 / self.phi_step_deg) + 1
         self.buffer = np.zeros((th_bins, ph_bins), dtype=np.float32)
+        self._init_spectral((th_bins, ph_bins))
     def accumulate(self, theta_deg: float, phi_deg: float, energy: float):
         i = int(theta_deg / self.theta_step_deg)
         j = int(phi_deg / self.phi_step_deg)
         if 0 <= i < self.buffer.shape[0] and 0 <= j < self.buffer.shape[1]:
             self.buffer[i, j] += energy
+    def accumulate_batch(self, theta_deg, phi_deg, energy, wavelength_nm=None):
+        theta_deg = np.asarray(theta_deg, dtype=np.float64).ravel()
+        phi_deg = np.asarray(phi_deg, dtype=np.float64).ravel()
+        i = _bin_index(theta_deg / self.theta_step_deg)
+        j = _bin_index(phi_deg / self.phi_step_deg)
+        if wavelength_nm is not None:
+            self._accumulate_lanes(i, j, energy, wavelength_nm)
+        else:
+            _scatter_add(self.buffer, i, j, self._lane_sum(energy, theta_deg.size))
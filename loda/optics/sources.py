@@ -1,30 +1,239 @@
 """광원 소스 스켈레톤.
-- 분포/alias-table (미구현) 자리
-- AXIS 정렬은 geometry.AxisRegistry 참조 예정
+- 분포/alias-table: (theta, phi) 강도 표 -> 입체각 가중 bin 확률 -> alias table (샘플당 O(1))
+  bin 내부는 cos(theta), phi 균등 (inverse CDF) 으로 샘플, 광선 에너지는 power/N (중요도 샘플링)
+- GaussianSource: I(theta) = exp(-theta^2 / 2 sigma^2) 를 세밀한 theta 표로 만들어 같은 경로로 샘플
+- UniformSource: 'uniform' 분포, 원뿔 (half_angle_deg, 기본 180 = 등방) 안 균등 또는 lambertian
+- TabulatedSource: 측정 배광 (IES LM-63 등) 표, phi 대칭(0 / 0-90 / 0-180 / 0-360) 확장
+- build_source: 알 수 없는 distribution 은 ValueError (예전처럼 +z 고정 SourceBase 로 대체하지 않음)
+- alias table 은 SourceSpec 내용(distribution, params) 기준으로 캐시
+- 분광 모드: sample_batch(n, rng, n_lambda=k) 면 광선마다 hero-wavelength k 개 (loda.optics.spectral),
+  energy 는 (N,k) lane 에너지, wavelength_nm (N,k). 분포는 params 의 spectrum / wavelength_nm
+- AXIS 정렬은 geometry.AxisRegistry 참조 예정 (현재 방향은 광원 국소 좌표, +z = 광축)
 """
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Optional, Tuple
+import json
 import math
+import os
+import numpy as np
+from loda.utils.sampling import build_alias_table, sample_alias
+from loda.optics.spectral import Spectrum, sample_spectral
 
 @dataclass
 class SampledRay:
     direction: tuple  # (x,y,z)
     energy: float
 
-class SourceBase:
-    def sample_direction(self, rng) -> SampledRay:  # placeholder
-        return SampledRay((0,0,1), 1.0)
+@dataclass
+class SampledRays:
+    directions: np.ndarray  # (N,3) float32
+    energy: np.ndarray      # (N,) float32, 분광 모드면 (N,k)
+    wavelength_nm: Optional[np.ndarray] = None  # (N,k) float32 (분광 모드), 열 0 = hero
+
+class SourceBase(ABC):
+    """광원 공통부. 하위 클래스는 sample_batch 를 구현 (방향 분포), 에너지/분광 lane 은 _rays 가 채움."""
+    power: float = 1.0
+    spectrum: Optional[Spectrum] = None
+    def sample_direction(self, rng) -> SampledRay:
+        r = self.sample_batch(1, rng)
+        return SampledRay(tuple(float(x) for x in r.directions[0]), float(r.energy[0]))
+    @abstractmethod
+    def sample_batch(self, n: int, rng=None, n_lambda: Optional[int] = None) -> SampledRays:
+        ...
+    def _rays(self, d: np.ndarray, rng, n_lambda: Optional[int]) -> SampledRays:
+        n = d.shape[0]
+        if not n_lambda:
+            return SampledRays(d, np.full(n, self.power / max(n, 1), dtype=np.float32))
+        spectrum = self.spectrum if self.spectrum is not None else Spectrum.from_params({})
+        wl, e = sample_spectral(spectrum, n, int(n_lambda), self.power, np.random.default_rng() if rng is None else rng)
+        return SampledRays(d, e, wl)
+
+
+@dataclass
+class AliasTable:
+    """(theta, phi) bin 위의 alias table. 모서리는 degree."""
+    theta_edges: np.ndarray  # (T+1,)
+    phi_edges: np.ndarray    # (P+1,)
+    prob: np.ndarray         # (T*P,)
+    alias: np.ndarray        # (T*P,)
+
+    @classmethod
+    def from_intensity(cls, theta_edges: np.ndarray, phi_edges: np.ndarray, intensity: np.ndarray) -> 'AliasTable':
+        """intensity (T,P) [cd 또는 상대값] -> bin 확률 ∝ I x 입체각."""
+        te = np.radians(np.asarray(theta_edges, dtype=np.float64))
+        pe = np.radians(np.asarray(phi_edges, dtype=np.float64))
+        omega = (np.cos(te[:-1]) - np.cos(te[1:]))[:, None] * np.diff(pe)[None, :]
+        prob, alias = build_alias_table(np.maximum(np.asarray(intensity, dtype=np.float64), 0.0) * omega)
+        return cls(np.asarray(theta_edges, dtype=np.float64), np.asarray(phi_edges, dtype=np.float64), prob, alias)
+
+    def sample(self, n: int, rng=None) -> np.ndarray:
+        """n 개 방향 (N,3) float32."""
+        rng = np.random.default_rng() if rng is None else rng
+        k = sample_alias(self.prob, self.alias, n, rng)
+        P = self.phi_edges.size - 1
+        ti, pi = np.divmod(k, P)
+        c0 = np.cos(np.radians(self.theta_edges[ti]))
+        c1 = np.cos(np.radians(self.theta_edges[ti + 1]))
+        cos_t = c0 + (c1 - c0) * rng.random(n)
+        phi = np.radians(self.phi_edges[pi] + (self.phi_edges[pi + 1] - self.phi_edges[pi]) * rng.random(n))
+        sin_t = np.sqrt(np.maximum(0.0, 1.0 - cos_t * cos_t))
+        return np.stack([sin_t * np.cos(phi), sin_t * np.sin(phi), cos_t], axis=-1).astype(np.float32)
+
+
+class TabulatedSource(SourceBase):
+    """표 기반 배광 (theta 수직각, phi 수평각 표본점). 각 표본점은 인접 표본 중점까지의 bin 을 대표."""
+    def __init__(self, theta_deg, phi_deg, intensity, power: float = 1.0, table: Optional[AliasTable] = None):
+        self.power = power
+        self.table = table if table is not None else AliasTable.from_intensity(*_tabulated_bins(theta_deg, phi_deg, intensity))
+    def sample_batch(self, n: int, rng=None, n_lambda: Optional[int] = None) -> SampledRays:
+        rng = np.random.default_rng() if rng is None else rng
+        return self._rays(self.table.sample(n, rng), rng, n_lambda)
+
+
+class UniformSource(SourceBase):
+    """광축 (+z) 기준 반각 half_angle_deg 원뿔 안 균등 (180 = 등방, 90 = 반구).
+    lambertian 이면 I ∝ cos(theta) (원뿔 안에서 cos^2 균등, half_angle 은 90 이하로 제한)."""
+    def __init__(self, half_angle_deg: float = 180.0, lambertian: bool = False, power: float = 1.0):
+        if not 0.0 < half_angle_deg <= 180.0:
+            raise ValueError(f"half_angle_deg must be in (0, 180], got {half_angle_deg}")
+        self.half_angle = min(half_angle_deg, 90.0) if lambertian else half_angle_deg
+        self.lambertian = lambertian
+        self.power = power
+    def sample_batch(self, n: int, rng=None, n_lambda: Optional[int] = None) -> SampledRays:
+        rng = np.random.default_rng() if rng is None else rng
+        c = math.cos(math.radians(self.half_angle))
+        u = rng.random(n)
+        if self.lambertian:
+            cos_t = np.sqrt(1.0 - u * (1.0 - c * c))
+        else:
+            cos_t = 1.0 - u * (1.0 - c)
+        phi = 2.0 * np.pi * rng.random(n)
+        sin_t = np.sqrt(np.maximum(0.0, 1.0 - cos_t * cos_t))
+        d = np.stack([sin_t * np.cos(phi), sin_t * np.sin(phi), cos_t], axis=-1).astype(np.float32)
+        return self._rays(d, rng, n_lambda)
+
 
-class GaussianSource(SourceBase):
-    def __init__(self, fwhm_deg: float):
+class GaussianSource(TabulatedSource):
+    def __init__(self, fwhm_deg: float, power: float = 1.0, table_resolution_deg: float = 0.1, table: Optional[AliasTable] = None):
         self.fwhm = fwhm_deg
         self.sigma = fwhm_deg / (2*math.sqrt(2*math.log(2)))
-    def sample_direction(self, rng) -> SampledRay:
-        # isotropic fallback
-        return SampledRay((0,0,1), 1.0)
+        if table is None:
+            table = AliasTable.from_intensity(*self.intensity_table(table_resolution_deg))
+        super().__init__(None, None, None, power=power, table=table)
+    def intensity_table(self, resolution_deg: float = 0.1):
+        theta_edges = np.linspace(0.0, 180.0, int(round(180.0 / resolution_deg)) + 1)
+        tc = 0.5 * (theta_edges[:-1] + theta_edges[1:])
+        I = np.exp(-0.5 * (tc / self.sigma) ** 2)[:, None]
+        return theta_edges, np.array([0.0, 360.0]), I
+
+
+def _midpoint_edges(x: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    if x.size == 1:
+        return np.array([lo, hi])
+    mid = 0.5 * (x[:-1] + x[1:])
+    return np.concatenate([[max(lo, x[0])], mid, [min(hi, x[-1])]])
+
+def _expand_phi_symmetry(phi: np.ndarray, I: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """IES 수평각 대칭 규칙: 마지막 각도 0 (회전대칭), 90 (4분면), 180 (좌우), 360 (전체)."""
+    last = float(phi[-1])
+    if phi.size == 1 or last == 0.0:
+        return np.array([0.0]), I[:, :1]
+    if last == 90.0:
+        phi = np.concatenate([phi, 180.0 - phi[-2::-1]]); I = np.concatenate([I, I[:, -2::-1]], axis=1)
+        last = 180.0
+    if last == 180.0:
+        phi = np.concatenate([phi, 360.0 - phi[-2::-1]]); I = np.concatenate([I, I[:, -2::-1]], axis=1)
+    return phi, I
+
+def _tabulated_bins(theta_deg, phi_deg, intensity):
+    """표본점 표 -> (theta_edges, phi_edges, I (T,P)). phi 는 [0,360) 를 감싸는 bin."""
+    th = np.asarray(theta_deg, dtype=np.float64).ravel()
+    I = np.asarray(intensity, dtype=np.float64)
+    ph = np.array([0.0]) if phi_deg is None else np.asarray(phi_deg, dtype=np.float64).ravel()
+    I = I.reshape(th.size, ph.size)
+    ph, I = _expand_phi_symmetry(ph, I)
+    if ph.size > 1 and ph[-1] >= 360.0:
+        ph, I = ph[:-1], I[:, :-1]  # 0 == 360
+    theta_edges = _midpoint_edges(th, 0.0, 180.0)
+    if ph.size == 1:
+        return theta_edges, np.array([0.0, 360.0]), I
+    # 각 표본 phi_m 은 (phi_{m-1}+phi_m)/2 ~ (phi_m+phi_{m+1})/2, 0 기준 wrap → 첫 bin 을 음수 시작으로 둠
+    nxt = np.concatenate([ph[1:], [ph[0] + 360.0]])
+    prv = np.concatenate([[ph[-1] - 360.0], ph[:-1]])
+    lo, hi = 0.5 * (prv + ph), 0.5 * (ph + nxt)
+    phi_edges = np.concatenate([lo, [hi[-1]]])
+    return theta_edges, phi_edges, I
+
+def load_ies(path: str) -> Dict[str, Any]:
+    """IES LM-63 최소 파서 (TILT=NONE 가정). 반환: theta_deg, phi_deg, intensity (T,P) [cd], lumens, absolute.
+    절대 측광 (lumens = -1) 이면 lumens 는 candela 표 적분값."""
+    with open(path, 'r', encoding='latin-1') as f:
+        lines = f.read().splitlines()
+    for k, line in enumerate(lines):
+        if line.strip().upper().startswith('TILT='):
+            if line.strip().upper() != 'TILT=NONE':
+                raise ValueError("only TILT=NONE IES files are supported")
+            nums = np.array(' '.join(lines[k + 1:]).replace(',', ' ').split(), dtype=np.float64)
+            break
+    else:
+        raise ValueError(f"not an IES file (no TILT line): {path}")
+    n_lamps, lumens, mult, n_v, n_h = nums[0], nums[1], nums[2], int(nums[3]), int(nums[4])
+    p = 13  # 고정 헤더 10개 + ballast, future, input watts
+    theta = nums[p:p + n_v]; p += n_v
+    phi = nums[p:p + n_h]; p += n_h
+    cd = nums[p:p + n_v * n_h].reshape(n_h, n_v).T * mult
+    if lumens < 0:  # 절대 측광 (LM-63 lumens = -1): 광속 = Σ I x 입체각
+        te, pe, I = _tabulated_bins(theta, phi, cd)
+        omega = (np.cos(np.radians(te[:-1])) - np.cos(np.radians(te[1:])))[:, None] * np.radians(np.diff(pe))[None, :]
+        flux = float(np.sum(np.maximum(I, 0.0) * omega))
+    else:
+        flux = float(n_lamps * lumens)
+    return {'theta_deg': theta, 'phi_deg': phi, 'intensity': cd, 'lumens': flux, 'absolute': bool(lumens < 0)}
+
+
+# ---- SourceSpec 별 alias table 캐시 ----
+_ALIAS_CACHE: Dict[Tuple[str, str], AliasTable] = {}
+
+def _spec_key(spec) -> Tuple[str, str]:
+    params = dict(spec.params)
+    if 'file' in params and os.path.exists(params['file']):
+        params['_mtime'] = os.path.getmtime(params['file'])  # 측정 파일이 바뀌면 다시 구축
+    return (spec.distribution, json.dumps(params, sort_keys=True, default=str))
+
+def clear_alias_cache():
+    _ALIAS_CACHE.clear()
+
+def alias_table_for(spec) -> Optional[AliasTable]:
+    """spec 에 해당하는 alias table (캐시). 표가 없는 분포는 None."""
+    key = _spec_key(spec)
+    table = _ALIAS_CACHE.get(key)
+    if table is not None:
+        return table
+    p = spec.params
+    if spec.distribution == 'gaussian':
+        g = GaussianSource(p.get('fwhm_deg', p.get('fwhm', 30)), table_resolution_deg=p.get('table_resolution_deg', 0.1))
+        table = g.table
+    elif spec.distribution in ('tabulated', 'ies'):
+        tab = load_ies(p['file']) if 'file' in p else p
+        table = AliasTable.from_intensity(*_tabulated_bins(tab['theta_deg'], tab.get('phi_deg'), tab['intensity']))
+    else:
+        return None
+    _ALIAS_CACHE[key] = table
+    return table
 
 
 def build_source(spec) -> SourceBase:
+    power = float(getattr(spec, 'power', 1.0))
+    table = alias_table_for(spec)
     if spec.distribution == 'gaussian':
-        return GaussianSource(spec.params.get('fwhm_deg', spec.params.get('fwhm', 30)))
-    return SourceBase()
+        src = GaussianSource(spec.params.get('fwhm_deg', spec.params.get('fwhm', 30)), power=power, table=table)
+    elif table is not None:
+        src = TabulatedSource(None, None, None, power=power, table=table)
+    elif spec.distribution == 'uniform':
+        p = spec.params
+        src = UniformSource(float(p.get('half_angle_deg', 180.0)), bool(p.get('lambertian', False)), power=power)
+    else:
+        raise ValueError(f"unsupported source distribution '{spec.distribution}'")
+    src.spectrum = Spectrum.from_params(spec.params)
+    return src
@@ -0,0 +1,107 @@
+"""분광 (다파장) 수송 도우미.
+
+- hero-wavelength 샘플링: 광선당 k 개 파장 (hero λ0 균등 샘플 + 구간을 k 등분 회전한 동반 파장)
+  → 광선 수는 그대로, 광선마다 (k,) 에너지 lane
+- lane 에너지 = power/N * S(λ_i) / (k * p(λ_i) * ∫S), p = 1/(λmax-λmin) → 모든 lane 합의 기댓값 = power
+- 단색 (wavelength_nm 스칼라) 소스는 모든 lane 이 같은 파장, lane 에너지 = power/(N k)
+- 분산 굴절 (파장마다 방향이 다름) 이 일어나면 동반 lane 은 버리고 hero lane 에 k 배 (terminate_secondary)
+- 광도 변환: Φv [lm] = 683 * Σ V(λ) Φe [W], V(λ) 는 CIE 1924 명소시 (5 nm 표, 선형 보간)
+"""
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+import numpy as np
+
+KM = 683.0  # lm/W (555 nm 최대 시감 효능)
+LAMBDA_MIN, LAMBDA_MAX = 380.0, 780.0
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz  # numpy < 2.0 에는 trapezoid 없음
+
+V_LAMBDA_NM = np.arange(380.0, 781.0, 5.0)
+V_LAMBDA = np.array([
+    0.000039, 0.000064, 0.00012, 0.000217, 0.000396, 0.00064, 0.00121, 0.00218, 0.004, 0.0073,
+    0.0116, 0.01684, 0.023, 0.0298, 0.038, 0.048, 0.06, 0.0739, 0.09098, 0.1126,
+    0.13902, 0.1693, 0.20802, 0.2586, 0.323, 0.4073, 0.503, 0.6082, 0.71, 0.7932,
+    0.862, 0.91485, 0.954, 0.9803, 0.99495, 1.0, 0.995, 0.9786, 0.952, 0.9154,
+    0.87, 0.8163, 0.757, 0.6949, 0.631, 0.5668, 0.503, 0.4412, 0.381, 0.321,
+    0.265, 0.217, 0.175, 0.1382, 0.107, 0.0816, 0.061, 0.04458, 0.032, 0.0232,
+    0.017, 0.01192, 0.00821, 0.005723, 0.004102, 0.002929, 0.002091, 0.001484, 0.001047, 0.00074,
+    0.00052, 0.000361, 0.000249, 0.000172, 0.00012, 0.0000848, 0.00006, 0.0000424, 0.00003, 0.0000212,
+    0.000015,
+])
+
+
+def luminous_efficiency(wavelength_nm) -> np.ndarray:
+    """V(λ), 표 밖은 0."""
+    wl = np.asarray(wavelength_nm, dtype=np.float64)
+    return np.interp(wl, V_LAMBDA_NM, V_LAMBDA, left=0.0, right=0.0)
+
+
+def to_photometric(energy, wavelength_nm) -> np.ndarray:
+    """복사 에너지 [W] -> 광속 [lm] (원소별)."""
+    return KM * luminous_efficiency(wavelength_nm) * np.asarray(energy, dtype=np.float64)
+
+
+@dataclass
+class Spectrum:
+    """상대 분광 분포 S(λ). wavelength_nm 이 하나면 단색."""
+    wavelength_nm: np.ndarray  # (M,) 오름차순
+    power: np.ndarray          # (M,) 상대값
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> 'Spectrum':
+        """SourceSpec.params: spectrum {wavelength_nm: [...], power: [...]} > wavelength_nm (단색) > 등에너지 백색."""
+        spec = params.get('spectrum')
+        if spec is not None:
+            wl = np.asarray(spec['wavelength_nm'], dtype=np.float64)
+            p = np.asarray(spec['power'], dtype=np.float64)
+            if wl.shape != p.shape or wl.ndim != 1 or wl.size < 2 or (np.diff(wl) <= 0).any() or (p < 0).any() or p.sum() <= 0:
+                raise ValueError("spectrum needs increasing wavelength_nm and non-negative power of the same length")
+            return cls(wl, p)
+        if params.get('wavelength_nm') is not None:
+            return cls(np.array([float(params['wavelength_nm'])]), np.array([1.0]))
+        return cls(np.array([LAMBDA_MIN, LAMBDA_MAX]), np.array([1.0, 1.0]))
+
+    @property
+    def monochromatic(self) -> bool:
+        return self.wavelength_nm.size == 1
+
+    def __call__(self, wavelength_nm) -> np.ndarray:
+        return np.interp(np.asarray(wavelength_nm, dtype=np.float64), self.wavelength_nm, self.power, left=0.0, right=0.0)
+
+    def integral(self) -> float:
+        return float(_trapezoid(self.power, self.wavelength_nm)) if not self.monochromatic else 1.0
+
+
+def hero_wavelengths(n: int, n_lambda: int, rng=None, lo: float = LAMBDA_MIN, hi: float = LAMBDA_MAX) -> np.ndarray:
+    """(n, n_lambda) 파장. 열 0 이 hero, 나머지는 [lo,hi) 를 n_lambda 등분 간격으로 회전."""
+    rng = np.random.default_rng() if rng is None else rng
+    span = hi - lo
+    hero = rng.random(n) * span
+    return lo + np.mod(hero[:, None] + np.arange(n_lambda)[None, :] * (span / n_lambda), span)
+
+
+def sample_spectral(spectrum: Spectrum, n: int, n_lambda: int, power: float = 1.0, rng=None):
+    """-> (wavelength_nm (n,k) float32, energy (n,k) float32). 전체 lane 에너지 합의 기댓값 = power."""
+    if spectrum.monochromatic:
+        wl = np.full((n, n_lambda), spectrum.wavelength_nm[0])
+        e = np.full((n, n_lambda), power / max(n * n_lambda, 1))
+        return wl.astype(np.float32), e.astype(np.float32)
+    lo, hi = float(spectrum.wavelength_nm[0]), float(spectrum.wavelength_nm[-1])
+    wl = hero_wavelengths(n, n_lambda, rng, lo, hi)
+    e = spectrum(wl) * ((hi - lo) / (n_lambda * spectrum.integral())) * (power / max(n, 1))
+    return wl.astype(np.float32), e.astype(np.float32)
+
+
+def terminate_secondary(energy: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """mask 인 광선은 hero lane 만 남기고 k 배 (동반 lane 0). energy (N,k) 를 제자리 수정 후 반환."""
+    k = energy.shape[1]
+    if k > 1 and mask.any():
+        energy[mask, 0] *= k
+        energy[mask, 1:] = 0.0
+    return energy
+
+
+def spectral_histogram(wavelength_nm, energy, edges_nm) -> np.ndarray:
+    """lane 에너지를 파장 bin 으로 합산 (len(edges)-1,)."""
+    wl = np.asarray(wavelength_nm, dtype=np.float64).ravel()
+    e = np.broadcast_to(np.asarray(energy, dtype=np.float64), np.shape(wavelength_nm)).ravel()
+    return np.histogram(wl, bins=np.asarray(edges_nm, dtype=np.float64), weights=e)[0]
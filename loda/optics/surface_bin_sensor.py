@@ -1,10 +1,11 @@
 """3D Surface-bin Sensor 스켈레톤.
 메쉬 face 기반 binning, 각도 히스토그램 누적.
+히스토그램은 dense (bins x theta x phi) float32 텐서, accumulate_batch 로 배열 단위 누적.
 """
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Callable
 import numpy as np
-import math
 
 @dataclass
 class SurfaceBin:
@@ -12,36 +13,122 @@ class SurfaceBin:
     normal: Tuple[float, float, float]
     area: float
 
+class _BinView(Mapping):
+    """bin_id -> dense 배열 행의 읽기 전용 Mapping (조회당 O(log K), 복사 없음)."""
+    __slots__ = ('_sensor', '_get')
+
+    def __init__(self, sensor: 'SurfaceBinSensor', get: Callable[[int], Any]):
+        self._sensor = sensor
+        self._get = get
+
+    def __getitem__(self, bin_id):
+        r = int(self._sensor.rows([bin_id])[0])
+        if r < 0:
+            raise KeyError(bin_id)
+        return self._get(r)
+
+    def __iter__(self):
+        return (int(b) for b in self._sensor.bin_ids)
+
+    def __len__(self) -> int:
+        return int(self._sensor.bin_ids.size)
+
+    def __contains__(self, bin_id) -> bool:
+        try:
+            return int(self._sensor.rows([bin_id])[0]) >= 0
+        except (TypeError, ValueError):
+            return False
+
+
 class SurfaceBinSensor:
+    """bin 별 (theta, phi) 히스토그램을 하나의 dense 텐서로 보관.
+    hist_dense: (K, theta_bins, phi_bins) float32, 행 r 은 bin_ids[r] (오름차순) 에 대응.
+    메모리: K * theta_bins * phi_bins * 4 bytes.
+    """
     def __init__(self, bins: Dict[int, SurfaceBin], theta_bins: int = 36, phi_bins: int = 72):
         self.bins = bins
         self.theta_bins = theta_bins
         self.phi_bins = phi_bins
-        self.hist = {bid: np.zeros((theta_bins, phi_bins), dtype=np.float32) for bid in bins}
-        self.energy_sum = {bid: 0.0 for bid in bins}
+        self.bin_ids = np.array(sorted(bins), dtype=np.int64)
+        self.hist_dense = np.zeros((self.bin_ids.size, theta_bins, phi_bins), dtype=np.float32)
+        self.energy_dense = np.zeros((self.bin_ids.size,), dtype=np.float64)
+
+    @property
+    def hist(self) -> Mapping:
+        # 호환용: bin_id -> (theta_bins, phi_bins) 뷰 (dict 를 만들지 않음)
+        return _BinView(self, lambda r: self.hist_dense[r])
+
+    @property
+    def energy_sum(self) -> Mapping:
+        return _BinView(self, lambda r: float(self.energy_dense[r]))
+
+    def rows(self, bin_ids) -> np.ndarray:
+        """bin_id 배열 -> hist_dense 행 인덱스 (없는 id 는 -1)."""
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        if self.bin_ids.size == 0:
+            return np.full(bin_ids.shape, -1, dtype=np.int64)
+        r = np.clip(np.searchsorted(self.bin_ids, bin_ids), 0, self.bin_ids.size - 1)
+        return np.where(self.bin_ids[r] == bin_ids, r, -1)
+
+    def accumulate_batch(self, bin_ids, dirs_local, energy):
+        """(N,) bin_id, (N,3) 국소 (n,t,b) 프레임 방향, (N,) 에너지 일괄 누적.
+        z<=0 (반구 밖) 과 등록되지 않은 bin_id 는 무시.
+        """
+        d = np.asarray(dirs_local, dtype=np.float64).reshape(-1, 3)
+        r = self.rows(np.asarray(bin_ids).ravel())
+        e = np.broadcast_to(np.asarray(energy, dtype=np.float64), r.shape)
+        ok = (d[:, 2] > 0) & (r >= 0)
+        d, r, e = d[ok], r[ok], e[ok]
+        theta = np.arccos(np.clip(d[:, 2], -1.0, 1.0))  # 0~pi/2
+        phi = np.arctan2(d[:, 1], d[:, 0])
+        phi = np.where(phi < 0, phi + 2*np.pi, phi)
+        ti = np.minimum((theta / (0.5*np.pi) * self.theta_bins).astype(np.int64), self.theta_bins - 1)
+        pi = np.minimum((phi / (2*np.pi) * self.phi_bins).astype(np.int64), self.phi_bins - 1)
+        flat = (r * self.theta_bins + ti) * self.phi_bins + pi
+        # 건드린 항목만 갱신: 고유 인덱스별 합 (float64) 후 한 번에 더함 (전체 크기 임시 배열 없음)
+        u, inv = np.unique(flat, return_inverse=True)
+        self.hist_dense.reshape(-1)[u] += np.bincount(inv.reshape(-1), weights=e).astype(np.float32)
+        u, inv = np.unique(r, return_inverse=True)
+        self.energy_dense[u] += np.bincount(inv.reshape(-1), weights=e)
 
     def accumulate(self, bin_id: int, dir_local: Tuple[float,float,float], energy: float):
-        # dir_local 은 (n,t,b) 프레임 기준
-        x,y,z = dir_local
-        # 반구 판단: z>0만 유지
-        if z <= 0:
+        # dir_local 은 (n,t,b) 프레임 기준, accumulate_batch 와 같은 binning (O(1))
+        r = int(self.rows([bin_id])[0])
+        x, y, z = (float(c) for c in dir_local)
+        if r < 0 or z <= 0:
             return
-        theta = math.acos(max(-1.0, min(1.0, z)))  # 0~pi/2
-        phi = math.atan2(y, x)
+        theta = float(np.arccos(min(z, 1.0)))
+        phi = float(np.arctan2(y, x))
         if phi < 0:
-            phi += 2*math.pi
-        ti = int(theta / (0.5*math.pi) * self.theta_bins)
-        pi = int(phi / (2*math.pi) * self.phi_bins)
-        if ti >= self.theta_bins:
-            ti = self.theta_bins - 1
-        if pi >= self.phi_bins:
-            pi = self.phi_bins - 1
-        if bin_id in self.hist:
-            self.hist[bin_id][ti, pi] += energy
-            self.energy_sum[bin_id] += energy
+            phi += 2*np.pi
+        ti = min(int(theta / (0.5*np.pi) * self.theta_bins), self.theta_bins - 1)
+        pi = min(int(phi / (2*np.pi) * self.phi_bins), self.phi_bins - 1)
+        self.hist_dense[r, ti, pi] += energy
+        self.energy_dense[r] += energy
+
+    def to_sensor_sources(self, bin_ids=None) -> Dict[str, Any]:
+        """여러 bin 의 정규화 분포를 한 번에: prob (M,theta_bins,phi_bins), energy_sum (M,)."""
+        if bin_ids is None:
+            bin_ids, r = self.bin_ids, np.arange(self.bin_ids.size)
+        else:
+            bin_ids = np.asarray(bin_ids, dtype=np.int64)
+            r = self.rows(bin_ids)
+            if (r < 0).any():
+                raise KeyError(f"unknown bin_id(s): {bin_ids[r < 0].tolist()}")
+        h = self.hist_dense[r]
+        total = h.sum(axis=(1, 2), dtype=np.float64)
+        scale = np.where(total > 0, 1.0 / np.where(total > 0, total, 1.0), 1.0).astype(np.float32)
+        return {
+            'bin_ids': bin_ids,
+            'prob': h * scale[:, None, None],
+            'energy_sum': self.energy_dense[r]
+        }
 
     def to_sensor_source(self, bin_id: int) -> Dict[str, Any]:
-        h = self.hist[bin_id]
+        r = int(self.rows([bin_id])[0])
+        if r < 0:
+            raise KeyError(bin_id)
+        h = self.hist_dense[r]
         total = h.sum()
         if total <= 0:
             prob = h
@@ -50,5 +137,5 @@ class SurfaceBinSensor:
         return {
             'bin_id': bin_id,
             'prob': prob,
-            'energy_sum': self.energy_sum[bin_id]
+            'energy_sum': float(self.energy_dense[r])
         }
@@ -0,0 +1,325 @@
+"""CPU BVH (OptiX BLAS/TLAS 대체).
+
+- build_bvh: 프리미티브 AABB 위 binned SAH 빌드, 평탄화 배열 (노드별 bounds/자식/leaf 구간 + prim_index)
+- traverse : (N,) 광선 배치를 (ray, node) 쌍 큐로 너비 우선 순회 (numpy 벡터화)
+             leaf 에서 intersect_fn(ray_idx, prim_idx) -> (t, aux) 호출, closest 는 t 최소, any 는 첫 hit 에서 종료
+- TriangleBLAS: 삼각형 메쉬 BVH (Möller–Trumbore)
+- InstanceTLAS: 인스턴스 (BLAS, 4x4 변환) 의 world AABB 위 BVH, leaf 에서 광선을 객체 좌표로 옮겨 BLAS 질의
+  (방향을 정규화하지 않고 변환하므로 t 는 world/객체 좌표에서 같음)
+
+변환 규약: SceneNode.transform 과 같이 4x4 row-major, 열벡터 (p_world = M @ [p, 1], 이동은 [3], [7], [11])
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, List
+import numpy as np
+
+_EPS = 1e-12
+
+
+@dataclass
+class FlatBVH:
+    node_min: np.ndarray    # (M,3) float64
+    node_max: np.ndarray    # (M,3) float64
+    node_left: np.ndarray   # (M,) int32, 내부 노드의 자식, leaf 는 -1
+    node_right: np.ndarray  # (M,) int32
+    node_start: np.ndarray  # (M,) int32, leaf 의 prim_index 시작
+    node_count: np.ndarray  # (M,) int32, leaf 프리미티브 수 (내부 노드 0)
+    prim_index: np.ndarray  # (P,) int64, leaf 순서로 정렬된 원본 프리미티브 인덱스
+
+    @property
+    def n_nodes(self) -> int:
+        return int(self.node_count.size)
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.node_min[0], self.node_max[0]
+
+    FIELDS = ('node_min', 'node_max', 'node_left', 'node_right', 'node_start', 'node_count', 'prim_index')
+
+    def arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        return {prefix + f: getattr(self, f) for f in self.FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str = '') -> 'FlatBVH':
+        return cls(*(arrays[prefix + f] for f in cls.FIELDS))
+
+
+def _area(ext: np.ndarray) -> np.ndarray:
+    ext = np.maximum(ext, 0.0)
+    return 2.0 * (ext[..., 0] * ext[..., 1] + ext[..., 1] * ext[..., 2] + ext[..., 2] * ext[..., 0])
+
+
+def build_bvh(bmin: np.ndarray, bmax: np.ndarray, leaf_size: int = 4, n_bins: int = 16) -> FlatBVH:
+    """프리미티브 AABB (P,3) 로 binned SAH BVH 구축."""
+    bmin = np.asarray(bmin, dtype=np.float64).reshape(-1, 3)
+    bmax = np.asarray(bmax, dtype=np.float64).reshape(-1, 3)
+    P = bmin.shape[0]
+    cent = 0.5 * (bmin + bmax)
+    order = np.arange(P, dtype=np.int64)
+    nmin: List[np.ndarray] = []
+    nmax: List[np.ndarray] = []
+    left: List[int] = []
+    right: List[int] = []
+    start: List[int] = []
+    count: List[int] = []
+
+    def new_node(lo, hi):
+        nmin.append(lo); nmax.append(hi); left.append(-1); right.append(-1); start.append(0); count.append(0)
+        return len(count) - 1
+
+    if P == 0:
+        new_node(np.full(3, np.inf), np.full(3, -np.inf))
+        return FlatBVH(np.array(nmin), np.array(nmax), np.array(left, dtype=np.int32), np.array(right, dtype=np.int32), np.array(start, dtype=np.int32),
+                       np.array(count, dtype=np.int32), order)
+
+    # 명시적 스택 (재귀 깊이 제한 회피): (노드 인덱스, 구간 [s, e))
+    root = new_node(bmin.min(axis=0), bmax.max(axis=0))
+    stack = [(root, 0, P)]
+    while stack:
+        node, s, e = stack.pop()
+        idx = order[s:e]
+        n = e - s
+        split = None
+        if n > leaf_size:
+            c = cent[idx]
+            cmin, cmax = c.min(axis=0), c.max(axis=0)
+            ext = cmax - cmin
+            if ext.max() > 0:
+                # 세 축 모두 bin 별 AABB/개수 → prefix/suffix 로 SAH 비용
+                best = (np.inf, 0, 0.0)
+                for ax in range(3):
+                    if ext[ax] <= 0:
+                        continue
+                    b = np.minimum(((c[:, ax] - cmin[ax]) / ext[ax] * n_bins).astype(np.int64), n_bins - 1)
+                    cnt = np.bincount(b, minlength=n_bins)
+                    lo = np.full((n_bins, 3), np.inf); hi = np.full((n_bins, 3), -np.inf)
+                    np.minimum.at(lo, b, bmin[idx]); np.maximum.at(hi, b, bmax[idx])
+                    llo = np.minimum.accumulate(lo, axis=0); lhi = np.maximum.accumulate(hi, axis=0)
+                    rlo = np.minimum.accumulate(lo[::-1], axis=0)[::-1]; rhi = np.maximum.accumulate(hi[::-1], axis=0)[::-1]
+                    lc = np.cumsum(cnt)[:-1]; rc = n - lc
+                    cost = _area(lhi[:-1] - llo[:-1]) * lc + _area(rhi[1:] - rlo[1:]) * rc
+                    cost = np.where((lc > 0) & (rc > 0), cost, np.inf)
+                    k = int(np.argmin(cost))
+                    if cost[k] < best[0]:
+                        best = (cost[k], ax, cmin[ax] + ext[ax] * (k + 1) / n_bins)
+                leaf_cost = _area(nmax[node] - nmin[node]) * n
+                if np.isfinite(best[0]) and best[0] < leaf_cost or n > 4 * leaf_size:
+                    split = best if np.isfinite(best[0]) else None
+                if split is None and n > 4 * leaf_size:
+                    # SAH 가 나누지 못함 (중심 중복 등) → 가장 긴 축 중앙값
+                    ax = int(np.argmax(ext))
+                    split = (0.0, ax, float(np.median(c[:, ax])))
+        if split is None:
+            start[node], count[node] = s, n
+            continue
+        _, ax, pos = split
+        left_mask = cent[idx, ax] < pos
+        if left_mask.all() or not left_mask.any():
+            left_mask = np.zeros(n, dtype=bool)
+            left_mask[np.argsort(cent[idx, ax], kind='stable')[: n // 2]] = True
+        order[s:e] = np.concatenate([idx[left_mask], idx[~left_mask]])
+        mid = s + int(left_mask.sum())
+        li, ri = order[s:mid], order[mid:e]
+        left[node] = new_node(bmin[li].min(axis=0), bmax[li].max(axis=0))
+        right[node] = new_node(bmin[ri].min(axis=0), bmax[ri].max(axis=0))
+        stack.append((right[node], mid, e))
+        stack.append((left[node], s, mid))
+    return FlatBVH(np.array(nmin), np.array(nmax), np.array(left, dtype=np.int32), np.array(right, dtype=np.int32), np.array(start, dtype=np.int32),
+                   np.array(count, dtype=np.int32), order)
+
+
+def _slab(O, invD, lo, hi, t_min, t_max):
+    # 광선-AABB (pair 단위). 반환: hit mask, t_near
+    t0 = (lo - O) * invD
+    t1 = (hi - O) * invD
+    tn = np.maximum(np.minimum(t0, t1).max(axis=1), t_min)
+    tf = np.minimum(np.maximum(t0, t1).min(axis=1), t_max)
+    return tn <= tf, tn
+
+
+def _safe_inv(D):
+    with np.errstate(divide='ignore'):
+        return 1.0 / np.where(np.abs(D) < _EPS, np.copysign(_EPS, D + 0.0), D)
+
+
+IntersectFn = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+def traverse(bvh: FlatBVH, O: np.ndarray, D: np.ndarray, intersect_fn: IntersectFn, n_aux: int,
+             t_min: float = 1e-6, t_max=np.inf, any_hit: bool = False):
+    """(N,) 광선 BVH 순회. intersect_fn(ray_idx (K,), prim_idx (K,)) -> (t (K,) [miss=inf], aux (K, n_aux)).
+    반환: t (N,) [miss=inf], prim (N,) int64 [-1], aux (N, n_aux) float64.
+    """
+    O = np.asarray(O, dtype=np.float64).reshape(-1, 3)
+    D = np.asarray(D, dtype=np.float64).reshape(-1, 3)
+    N = O.shape[0]
+    invD = _safe_inv(D)
+    t_best = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (N,)).copy()
+    prim = np.full(N, -1, dtype=np.int64)
+    aux = np.zeros((N, n_aux), dtype=np.float64)
+    r = np.arange(N, dtype=np.int64)
+    nd = np.zeros(N, dtype=np.int64)
+    while r.size:
+        ok, _ = _slab(O[r], invD[r], bvh.node_min[nd], bvh.node_max[nd], t_min, t_best[r])
+        if any_hit:
+            ok &= prim[r] < 0
+        r, nd = r[ok], nd[ok]
+        cnt = bvh.node_count[nd]
+        leaf = cnt > 0
+        if leaf.any():
+            lr, ln, lc = r[leaf], nd[leaf], cnt[leaf].astype(np.int64)
+            rr = np.repeat(lr, lc)
+            # leaf 구간 [start, start+count) 펼치기
+            off = np.arange(rr.size) - np.repeat(np.cumsum(lc) - lc, lc)
+            pp = bvh.prim_index[np.repeat(bvh.node_start[ln].astype(np.int64), lc) + off]
+            t, a = intersect_fn(rr, pp)
+            hit = (t >= t_min) & (t < t_best[rr])
+            if hit.any():
+                rr, pp, t, a = rr[hit], pp[hit], t[hit], a[hit]
+                np.minimum.at(t_best, rr, t)
+                win = t == t_best[rr]
+                prim[rr[win]] = pp[win]
+                aux[rr[win]] = a[win]
+        inner = ~leaf
+        r = np.concatenate([r[inner], r[inner]])
+        nd = np.concatenate([bvh.node_left[nd[inner]], bvh.node_right[nd[inner]]]).astype(np.int64)
+    t_best[prim < 0] = np.inf
+    return t_best, prim, aux
+
+
+def intersect_triangles(O, D, v0, e1, e2):
+    """Möller–Trumbore (K 쌍). 반환 t (miss=inf), u, v."""
+    p = np.cross(D, e2)
+    det = np.einsum('ij,ij->i', e1, p)
+    ok = np.abs(det) > _EPS
+    inv = np.where(ok, 1.0 / np.where(ok, det, 1.0), 0.0)
+    s = O - v0
+    u = np.einsum('ij,ij->i', s, p) * inv
+    q = np.cross(s, e1)
+    v = np.einsum('ij,ij->i', D, q) * inv
+    t = np.einsum('ij,ij->i', e2, q) * inv
+    ok &= (u >= 0) & (v >= 0) & (u + v <= 1)
+    return np.where(ok, t, np.inf), u, v
+
+
+class TriangleBLAS:
+    """삼각형 메쉬 하나의 BLAS. vertices (V,3), faces (F,3) int, face_ids (F,) (CAD face id 등, 선택)."""
+    def __init__(self, vertices, faces, face_ids=None, leaf_size: int = 4):
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        self.face_ids = np.arange(self.faces.shape[0]) if face_ids is None else np.asarray(face_ids, dtype=np.int64)
+        tri = self.vertices[self.faces]  # (F,3,3)
+        self.v0 = tri[:, 0]
+        self.e1 = tri[:, 1] - tri[:, 0]
+        self.e2 = tri[:, 2] - tri[:, 0]
+        self.bvh = build_bvh(tri.min(axis=1), tri.max(axis=1), leaf_size=leaf_size)
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.bvh.bounds()
+
+    def arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        """재구축 없이 복원 가능한 배열 묶음 (공유 메모리 전달용)."""
+        out = {prefix + k: getattr(self, k) for k in ('vertices', 'faces', 'face_ids', 'v0', 'e1', 'e2')}
+        out.update(self.bvh.arrays(prefix + 'bvh.'))
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str = '') -> 'TriangleBLAS':
+        self = cls.__new__(cls)
+        for k in ('vertices', 'faces', 'face_ids', 'v0', 'e1', 'e2'):
+            setattr(self, k, arrays[prefix + k])
+        self.bvh = FlatBVH.from_arrays(arrays, prefix + 'bvh.')
+        return self
+
+    def intersect(self, O, D, t_min: float = 1e-6, t_max=np.inf, any_hit: bool = False):
+        """반환: t (N,), prim (N,) 삼각형 인덱스 [-1], uv (N,2)."""
+        O = np.asarray(O, dtype=np.float64).reshape(-1, 3)
+        D = np.asarray(D, dtype=np.float64).reshape(-1, 3)
+        def fn(rr, pp):
+            t, u, v = intersect_triangles(O[rr], D[rr], self.v0[pp], self.e1[pp], self.e2[pp])
+            return t, np.stack([u, v], axis=1)
+        return traverse(self.bvh, O, D, fn, 2, t_min, t_max, any_hit)
+
+    def normals(self, prim: np.ndarray) -> np.ndarray:
+        """삼각형 기하 법선 (객체 좌표, 단위)."""
+        n = np.cross(self.e1[prim], self.e2[prim])
+        return n / (np.linalg.norm(n, axis=1, keepdims=True) + _EPS)
+
+
+def as_matrix(transform) -> np.ndarray:
+    """SceneNode.transform (16 row-major 또는 4x4) -> (4,4) float64."""
+    return np.asarray(transform, dtype=np.float64).reshape(4, 4)
+
+
+@dataclass
+class HitResult:
+    t: np.ndarray         # (N,) miss = inf
+    instance: np.ndarray  # (N,) int64, miss = -1
+    prim: np.ndarray      # (N,) 삼각형 인덱스 (해당 BLAS 내), miss = -1
+    uv: np.ndarray        # (N,2) 무게중심 좌표
+    normal: np.ndarray    # (N,3) world 기하 법선 (miss 는 0)
+
+    @property
+    def hit(self) -> np.ndarray:
+        return self.instance >= 0
+
+
+class InstanceTLAS:
+    """인스턴스 목록 (blas_index, 4x4 변환) 위 BVH."""
+    def __init__(self, blas: List[TriangleBLAS], instances: List[Tuple[int, np.ndarray]]):
+        self.blas = blas
+        self.blas_index = np.array([int(b) for b, _ in instances], dtype=np.int64)
+        self.xform = np.array([as_matrix(m) for _, m in instances]).reshape(-1, 4, 4)
+        self.inv_xform = np.linalg.inv(self.xform) if len(instances) else self.xform
+        lo = np.zeros((len(instances), 3)); hi = np.zeros((len(instances), 3))
+        for k, (b, M) in enumerate(zip(self.blas_index, self.xform)):
+            bmin, bmax = blas[b].bounds()
+            corners = np.array(np.meshgrid(*zip(bmin, bmax), indexing='ij')).reshape(3, -1).T
+            w = corners @ M[:3, :3].T + M[:3, 3]
+            lo[k], hi[k] = w.min(axis=0), w.max(axis=0)
+        self.bvh = build_bvh(lo, hi, leaf_size=1)
+
+    def arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        out = {prefix + k: getattr(self, k) for k in ('blas_index', 'xform', 'inv_xform')}
+        out.update(self.bvh.arrays(prefix + 'bvh.'))
+        return out
+
+    @classmethod
+    def from_arrays(cls, blas: List[TriangleBLAS], arrays: Dict[str, np.ndarray], prefix: str = '') -> 'InstanceTLAS':
+        self = cls.__new__(cls)
+        self.blas = blas
+        for k in ('blas_index', 'xform', 'inv_xform'):
+            setattr(self, k, arrays[prefix + k])
+        self.bvh = FlatBVH.from_arrays(arrays, prefix + 'bvh.')
+        return self
+
+    def intersect(self, O, D, t_min: float = 1e-6, t_max=np.inf, any_hit: bool = False) -> HitResult:
+        O = np.asarray(O, dtype=np.float64).reshape(-1, 3)
+        D = np.asarray(D, dtype=np.float64).reshape(-1, 3)
+        t_cur = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (O.shape[0],)).copy()
+
+        def fn(rr, pp):
+            # (ray, instance) 쌍을 인스턴스별로 묶어 BLAS 질의, aux = (tri, u, v)
+            t = np.full(rr.size, np.inf)
+            a = np.zeros((rr.size, 3))
+            for inst in np.unique(pp):
+                sel = np.nonzero(pp == inst)[0]
+                Mi = self.inv_xform[inst]
+                Ol = O[rr[sel]] @ Mi[:3, :3].T + Mi[:3, 3]
+                Dl = D[rr[sel]] @ Mi[:3, :3].T
+                ts, tri, uv = self.blas[self.blas_index[inst]].intersect(Ol, Dl, t_min, t_cur[rr[sel]], any_hit)
+                t[sel] = ts
+                a[sel, 0] = tri
+                a[sel, 1:] = uv
+            np.minimum.at(t_cur, rr, t)
+            return t, a
+
+        t, inst, a = traverse(self.bvh, O, D, fn, 3, t_min, t_max, any_hit)
+        tri = np.where(inst >= 0, a[:, 0], -1).astype(np.int64)
+        normal = np.zeros((O.shape[0], 3))
+        for k in np.unique(inst[inst >= 0]):
+            sel = np.nonzero(inst == k)[0]
+            n_obj = self.blas[self.blas_index[k]].normals(tri[sel])
+            # 법선은 역전치 행렬로 변환
+            n_w = n_obj @ self.inv_xform[k][:3, :3]
+            normal[sel] = n_w / (np.linalg.norm(n_w, axis=1, keepdims=True) + _EPS)
+        return HitResult(t, inst, tri, a[:, 1:], normal)
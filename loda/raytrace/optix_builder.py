@@ -1,6 +1,19 @@
 """OptiX 빌더 스켈레톤.
 BLAS/TLAS 구성 및 SBT 자리.
+
+CPUBuilder: 같은 빌더 API 의 CPU 구현 (loda.raytrace.bvh, SAH BVH + 인스턴스 TLAS)
+  - build_blas(meshes): {이름: mesh} 또는 [mesh], mesh = (vertices, faces) | {'vertices','faces'[,'face_ids']} | .vertices/.faces 객체
+  - build_tlas(instances): SceneGraph (flatten), SceneNode (mesh_ref 로 BLAS 이름 참조, transform 누적) 또는 [(blas 이름/인덱스, 4x4)]
+  - build_sbt(registry[, lut]): 재질 SoA 표 (sbt) + material id 순서 BSDF 목록 (bsdfs, 코팅/LUT 포함)
+  - closest_hit / any_hit: (N,3) 광선 배치 질의
+make_builder(cfg): Config.optix_enabled 가 False 면 CPUBuilder
 """
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from loda.raytrace.bvh import TriangleBLAS, InstanceTLAS, HitResult, as_matrix
+from loda.optics.bsdf import make_bsdfs, bsdfs_from_table
+
+
 class OptiXBuilder:
     def __init__(self):
         self.blas = []
@@ -13,3 +26,81 @@ class OptiXBuilder:
         self.tlas = 'TLAS'
     def build_sbt(self, registry):
         self.sbt = 'SBT'
+
+
+def _mesh_arrays(mesh) -> Tuple[Any, Any, Any]:
+    if isinstance(mesh, dict):
+        return mesh['vertices'], mesh['faces'], mesh.get('face_ids')
+    if isinstance(mesh, (tuple, list)):
+        return mesh[0], mesh[1], (mesh[2] if len(mesh) > 2 else None)
+    return mesh.vertices, mesh.faces, getattr(mesh, 'face_ids', None)
+
+
+class CPUBuilder(OptiXBuilder):
+    def __init__(self, leaf_size: int = 4):
+        super().__init__()
+        self.leaf_size = leaf_size
+        self.blas_names: List[str] = []
+        self.instance_names: List[str] = []
+        self.instance_labels: List[Optional[str]] = []
+        self.bsdfs: Optional[List[Any]] = None
+
+    def build_blas(self, meshes):
+        items = list(meshes.items()) if isinstance(meshes, dict) else [(str(k), m) for k, m in enumerate(meshes)]
+        self.blas_names = [k for k, _ in items]
+        self.blas = [TriangleBLAS(*_mesh_arrays(m), leaf_size=self.leaf_size) for _, m in items]
+
+    def build_tlas(self, instances):
+        if hasattr(instances, 'flatten'):
+            flat = instances.flatten()
+            instances = [(flat.mesh_names[m], flat.world[k].astype(np.float64), flat.names[k], flat.labels[k])
+                         for k, m in enumerate(flat.mesh_id)]
+        elif hasattr(instances, 'children'):
+            instances = self._collect_instances(instances)
+        else:
+            instances = [(i[0], i[1], str(i[0]), None) for i in instances]
+        resolved = []
+        for ref, M, name, label in instances:
+            resolved.append((self.blas_names.index(ref) if isinstance(ref, str) else int(ref), M))
+        self.instance_names = [n for _, _, n, _ in instances]
+        self.instance_labels = [l for _, _, _, l in instances]
+        self.tlas = InstanceTLAS(self.blas, resolved)
+
+    def _collect_instances(self, root) -> List[Tuple[str, np.ndarray, str, Optional[str]]]:
+        # SceneNode 트리 순회, 부모 변환을 누적 (world = parent @ local)
+        out = []
+        stack = [(root, np.eye(4))]
+        while stack:
+            node, parent = stack.pop()
+            world = parent @ as_matrix(node.transform)
+            if node.mesh_ref is not None:
+                out.append((node.mesh_ref, world, node.name, node.label))
+            stack.extend((c, world) for c in reversed(node.children))
+        return out
+
+    def build_sbt(self, registry, lut: bool = False, cache_dir: Optional[str] = None):
+        # SBT 대신 재질 SoA 표 (material id 인덱싱) + material id 순서 BSDF 목록 (코팅/분산/LUT 포함)
+        if hasattr(registry, 'material_table'):
+            self.sbt = registry.material_table()
+            bsdfs = make_bsdfs(registry, lut=lut, cache_dir=cache_dir)
+            self.bsdfs = [bsdfs[n] for n in self.sbt.names]
+        else:
+            self.sbt = registry
+            self.bsdfs = bsdfs_from_table(registry)
+
+    def closest_hit(self, O, D, t_min: float = 1e-6, t_max=np.inf) -> HitResult:
+        if self.tlas is None:
+            raise RuntimeError("build_tlas() must be called before tracing")
+        return self.tlas.intersect(O, D, t_min, t_max)
+
+    def any_hit(self, O, D, t_min: float = 1e-6, t_max=np.inf) -> np.ndarray:
+        """(N,) bool, [t_min, t_max) 안에 가림이 있으면 True (그림자/가시성 광선)."""
+        if self.tlas is None:
+            raise RuntimeError("build_tlas() must be called before tracing")
+        return self.tlas.intersect(O, D, t_min, t_max, any_hit=True).hit
+
+
+def make_builder(cfg=None) -> OptiXBuilder:
+    if cfg is not None and getattr(cfg, 'optix_enabled', False):
+        return OptiXBuilder()
+    return CPUBuilder()
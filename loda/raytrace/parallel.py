@@ -0,0 +1,174 @@
+"""멀티 프로세스 wavefront 추적.
+
+- 장면 (BLAS/TLAS 배열) + 재질 SoA 표 + 인스턴스 material id 를 하나의 multiprocessing.shared_memory 블록에 배치
+  → worker 는 initializer 에서 attach 후 복사 없이 numpy 뷰로 재구성 (BVH 재빌드 없음)
+- 1차 광선을 chunk_size 단위 chunk 로 나누고, chunk c 의 RNG 는 SeedSequence(Config.seed, spawn_key=(c,))
+  → 같은 seed 면 worker 수와 무관하게 같은 광선 집합
+- chunk 하나 = job 하나: chunk 마다 센서의 새 private 사본 (float64) 에 누적해 반환,
+  부모가 chunk 번호 순서로 더한 뒤 원래 센서에 반영 → worker 수와 무관하게 비트 단위로 같은 결과
+- n_workers <= 1 이면 같은 chunk/RNG 규칙으로 현재 프로세스에서 실행
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import copy
+import multiprocessing as mp
+import os
+import numpy as np
+from multiprocessing import shared_memory
+from loda.raytrace.bvh import TriangleBLAS, InstanceTLAS
+from loda.raytrace.optix_builder import CPUBuilder
+from loda.raytrace.wavefront import WavefrontController, instance_material_ids
+from loda.optics.registry import MaterialTable
+
+SENSOR_BUFFERS = ('buffer', 'accum', 'photometric', 'spectral')
+_ALIGN = 64
+
+
+class SharedArrays:
+    """이름 -> ndarray 묶음을 공유 메모리 블록 하나에 배치. manifest 는 picklable (이름, dtype, shape, offset)."""
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        layout, off = [], 0
+        for k, a in arrays.items():
+            a = np.ascontiguousarray(a)
+            layout.append((k, a.dtype.str, a.shape, off))
+            off += -(-a.nbytes // _ALIGN) * _ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(off, 1))
+        self.manifest = {'name': self.shm.name, 'layout': layout}
+        for (k, dt, shape, o), a in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=dt, buffer=self.shm.buf, offset=o)[...] = a
+
+    @staticmethod
+    def attach(manifest) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+        # Pool worker 는 부모의 resource_tracker 를 공유 → unlink 는 부모 (close) 만 수행
+        shm = shared_memory.SharedMemory(name=manifest['name'])
+        views = {}
+        for k, dt, shape, o in manifest['layout']:
+            v = np.ndarray(shape, dtype=dt, buffer=shm.buf, offset=o)
+            v.flags.writeable = False
+            views[k] = v
+        return shm, views
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def pack_scene(builder: CPUBuilder, table: MaterialTable, instance_material: Optional[np.ndarray] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """-> (공유할 배열, 작은 메타 (pickle 로 전달))."""
+    arrays: Dict[str, np.ndarray] = {}
+    for i, b in enumerate(builder.blas):
+        arrays.update(b.arrays(f'blas{i}.'))
+    arrays.update(builder.tlas.arrays('tlas.'))
+    for c in MaterialTable.COLUMNS:
+        arrays['mat.' + c] = getattr(table, c)
+    arrays['instance_material'] = instance_material if instance_material is not None else instance_material_ids(builder, table)
+    # BSDF 목록 (코팅/LUT 포함) 은 작으므로 meta 로 pickle
+    meta = {'n_blas': len(builder.blas), 'material_names': list(table.names), 'bsdfs': getattr(builder, 'bsdfs', None)}
+    return arrays, meta
+
+
+def unpack_scene(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> Tuple[CPUBuilder, MaterialTable, np.ndarray]:
+    b = CPUBuilder()
+    b.blas = [TriangleBLAS.from_arrays(arrays, f'blas{i}.') for i in range(meta['n_blas'])]
+    b.tlas = InstanceTLAS.from_arrays(b.blas, arrays, 'tlas.')
+    table = MaterialTable(meta['material_names'], *(arrays['mat.' + c] for c in MaterialTable.COLUMNS))
+    b.sbt = table
+    b.bsdfs = meta.get('bsdfs')
+    return b, table, arrays['instance_material']
+
+
+def chunk_rng(seed: int, chunk: int) -> np.random.Generator:
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+
+
+def _private_sensors(sensors: Sequence) -> List[Any]:
+    out = []
+    for s in sensors:
+        c = copy.deepcopy(s)
+        for k in SENSOR_BUFFERS:
+            a = getattr(c, k, None)
+            if isinstance(a, np.ndarray):
+                setattr(c, k, np.zeros(a.shape, dtype=np.float64))
+        out.append(c)
+    return out
+
+
+def _sensor_arrays(sensors: Sequence) -> List[Dict[str, np.ndarray]]:
+    return [{k: getattr(s, k) for k in SENSOR_BUFFERS if isinstance(getattr(s, k, None), np.ndarray)} for s in sensors]
+
+
+def _trace_chunk(scene, sensors, job) -> Dict[str, Any]:
+    """chunk 하나 추적. sensors 는 0 으로 비운 템플릿 (chunk 마다 새 사본에 누적)."""
+    builder, table, inst_mat = scene
+    c, n_rays, chunk_size, seed, max_bounces, source, origin, n_lambda = job
+    private = _private_sensors(sensors)
+    n = min(chunk_size, n_rays - c * chunk_size)
+    wf = WavefrontController(max_bounces, builder, table, inst_mat, n_lambda=n_lambda)
+    wf.rng = chunk_rng(seed, c)
+    q = wf.generate(source, n, origin)
+    q.energy *= n / n_rays  # chunk 별 sample_batch 는 power 전체를 n 개로 나눔 → 전체 광선 수 기준으로 환산
+    res = wf.run(sensors=private, queue=q)
+    tally = {k: v for k, v in res.items() if k != 'stats'}
+    for st, t in wf.stats['time'].items():
+        tally['time.' + st] = t
+    return {'chunk': c, 'tally': tally, 'sensors': _sensor_arrays(private)}
+
+
+_WORKER: Dict[str, Any] = {}
+
+def _init_worker(manifest, meta, sensors):
+    shm, views = SharedArrays.attach(manifest)
+    _WORKER['shm'] = shm  # 프로세스 수명 동안 유지
+    _WORKER['scene'] = unpack_scene(views, meta)
+    _WORKER['sensors'] = sensors
+
+def _worker_job(job):
+    return _trace_chunk(_WORKER['scene'], _WORKER['sensors'], job)
+
+
+def trace_parallel(cfg, builder: CPUBuilder, source, n_rays: int, sensors: Sequence = (), n_workers: Optional[int] = None,
+                   chunk_size: int = 65536, origin=(0.0, 0.0, 0.0), material_table: Optional[MaterialTable] = None,
+                   instance_material: Optional[np.ndarray] = None, mp_context: Optional[str] = None,
+                   n_lambda: Optional[int] = None) -> Dict[str, Any]:
+    """n_rays 1차 광선을 n_workers 프로세스로 추적. sensors 는 제자리 갱신, 반환: 에너지/시간 합계.
+    n_lambda: 분광 모드 hero-wavelength lane 수 (WavefrontController 와 동일).
+    """
+    table = material_table if material_table is not None else builder.sbt
+    n_workers = (os.cpu_count() or 1) if n_workers is None else int(n_workers)
+    n_chunks = -(-n_rays // chunk_size)
+    n_jobs = max(1, min(n_workers, n_chunks))
+    jobs = [(c, n_rays, chunk_size, cfg.seed, cfg.optix_max_bounces, source, origin, n_lambda) for c in range(n_chunks)]
+    templates = _private_sensors(sensors)  # 0 버퍼 템플릿 (worker 에는 initializer 로 한 번만 전달)
+    tally: Dict[str, float] = {}
+    totals: List[Dict[str, np.ndarray]] = [{} for _ in sensors]
+
+    def reduce(results):
+        # chunk 번호 순서로 합산 (imap 은 제출 순서대로 반환) → 합산 순서가 worker 수와 무관
+        for r in results:
+            for k, v in r['tally'].items():
+                tally[k] = tally.get(k, 0.0) + v
+            for acc, arrs in zip(totals, r['sensors']):
+                for k, a in arrs.items():
+                    if k in acc:
+                        acc[k] += a
+                    else:
+                        acc[k] = a
+
+    if n_jobs == 1:
+        inst = instance_material if instance_material is not None else instance_material_ids(builder, table)
+        scene = (builder, table, inst)
+        reduce(_trace_chunk(scene, templates, job) for job in jobs)
+    else:
+        arrays, meta = pack_scene(builder, table, instance_material)
+        shared = SharedArrays(arrays)
+        try:
+            ctx = mp.get_context(mp_context)
+            with ctx.Pool(n_jobs, initializer=_init_worker, initargs=(shared.manifest, meta, templates)) as pool:
+                reduce(pool.imap(_worker_job, jobs))
+        finally:
+            shared.close()
+    for s, acc in zip(sensors, totals):
+        for k, total in acc.items():
+            buf = getattr(s, k)
+            buf += total.astype(buf.dtype)
+    tally['n_workers'] = n_jobs
+    return tally
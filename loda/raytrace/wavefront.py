@@ -1,7 +1,190 @@
-"""Wavefront 스케줄/큐 스켈레톤."""
+"""Wavefront 스케줄/큐 스켈레톤.
+
+루프 (bounce 마다): generate -> intersect -> scatter(탈출 광선 -> 센서) -> shade(material id 정렬 후 BSDF) -> compact
+- 살아있는 광선은 RayQueue (SoA) 에 보관, 매 bounce 후 죽은 광선 (흡수/탈출/에너지 미만) 을 compact 로 제거
+- shade 전 material id 로 안정 정렬 → 같은 재질 광선이 연속 구간, 구간마다 그 재질의 BSDF (코팅/분산/LUT 포함) 를 한 번 호출
+  BSDF 목록: 인자 bsdfs > builder.bsdfs (build_sbt) > 재질 표에서 생성 (bsdf.bsdfs_from_table, 코팅 없음)
+- 분광 (n_lambda=k): 광원에서 hero-wavelength lane (N,k) 을 받아 RayQueue.wavelength_nm 로 운반,
+  shade 는 BSDF.sample_spectral, 분산 굴절 광선은 spectral.terminate_secondary 로 hero lane 만 유지
+- 타이밍: stats['time'][stage] 누적 초, 큐 점유: stats['queue'] bounce 별 {live, hit, escaped, absorbed, ...}
+- builder: CPUBuilder (closest_hit), 없으면 run() 은 RuntimeError
+- 센서: score_batch(O, D, E) (PlanarDetector, lane 합) 또는 SphericalSensor (탈출 방향, 분광이면 lane 별 누적)
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence
+import time
+import numpy as np
+from loda.optics.bsdf import bsdfs_from_table
+from loda.optics.spectral import terminate_secondary
+from loda.utils.math3d import cart_to_sph_array
+
+
+@dataclass
+class RayQueue:
+    origin: np.ndarray     # (N,3) float64
+    direction: np.ndarray  # (N,3) float64, 단위
+    energy: np.ndarray     # (N,) float64, 분광이면 (N,k) lane 에너지
+    ray_id: np.ndarray     # (N,) int64, 생성 순서 인덱스
+    wavelength_nm: Optional[np.ndarray] = None  # (N,k) float64, 열 0 = hero (분광 모드)
+
+    def __len__(self) -> int:
+        return int(self.ray_id.size)
+
+    def ray_energy(self) -> np.ndarray:
+        """(N,) 광선별 에너지 (lane 합)."""
+        return self.energy.sum(axis=1) if self.energy.ndim == 2 else self.energy
+
+    def compact(self, keep: np.ndarray) -> 'RayQueue':
+        wl = self.wavelength_nm[keep] if self.wavelength_nm is not None else None
+        return RayQueue(self.origin[keep], self.direction[keep], self.energy[keep], self.ray_id[keep], wl)
+
+
+def instance_material_ids(builder, table) -> np.ndarray:
+    """인스턴스별 material id. label (없으면 인스턴스 이름) 이 table.names 에 없으면 -1 (흡수)."""
+    names = {n: i for i, n in enumerate(table.names)}
+    labels = getattr(builder, 'instance_labels', [])
+    inst_names = getattr(builder, 'instance_names', [])
+    return np.array([names.get(l if l is not None else n, -1) for l, n in zip(labels, inst_names)], dtype=np.int64)
+
+
+def score_sensor(sensor, O: np.ndarray, D: np.ndarray, E: np.ndarray, wavelength_nm: Optional[np.ndarray] = None):
+    """탈출 광선을 센서에 누적. E 가 (N,k) lane 이면 wavelength_nm (N,k) 와 함께."""
+    if hasattr(sensor, 'score_batch'):
+        sensor.score_batch(O, D, E.sum(axis=1) if E.ndim == 2 else E)
+    elif hasattr(sensor, 'theta_step_deg'):
+        th, ph = cart_to_sph_array(D)
+        sensor.accumulate_batch(np.degrees(th), np.mod(np.degrees(ph), 360.0), E, wavelength_nm=wavelength_nm)
+    else:
+        raise TypeError(f"unsupported sensor type {type(sensor).__name__}")
+
+
 class WavefrontController:
-    def __init__(self, max_bounces: int):
+    STAGES = ('generate', 'intersect', 'scatter', 'shade', 'compact')
+
+    def __init__(self, max_bounces: int, builder=None, material_table=None, instance_material: Optional[np.ndarray] = None,
+                 min_energy: float = 0.0, seed: Optional[int] = None, epsilon: float = 1e-6, bsdfs: Optional[Sequence] = None,
+                 n_lambda: Optional[int] = None):
         self.max_bounces = max_bounces
-    def run(self):
-        # placeholder
-        pass
+        self.builder = builder
+        self.material_table = material_table
+        self.instance_material = instance_material
+        self.bsdfs = bsdfs
+        self.n_lambda = n_lambda
+        self.min_energy = min_energy
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, cfg, builder=None, material_table=None, **kw) -> 'WavefrontController':
+        return cls(cfg.optix_max_bounces, builder, material_table, seed=cfg.seed, **kw)
+
+    def reset_stats(self):
+        self.stats: Dict[str, Any] = {'time': {s: 0.0 for s in self.STAGES}, 'queue': [], 'energy': {}}
+
+    @contextmanager
+    def _stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats['time'][name] += time.perf_counter() - t0
+
+    def generate(self, source, n_rays: int, origin=(0.0, 0.0, 0.0)) -> RayQueue:
+        with self._stage('generate'):
+            r = source.sample_batch(n_rays, self.rng, n_lambda=self.n_lambda) if self.n_lambda else source.sample_batch(n_rays, self.rng)
+            e = np.asarray(r.energy, dtype=np.float64)
+            wl = getattr(r, 'wavelength_nm', None)
+            if wl is not None:
+                wl = np.asarray(wl, dtype=np.float64).reshape(n_rays, -1)
+                e = np.broadcast_to(e.reshape(n_rays, -1), wl.shape).copy()
+            elif e.ndim == 2:
+                e = e.sum(axis=1)  # 파장 없는 lane 은 합산
+            O = np.broadcast_to(np.asarray(origin, dtype=np.float64), (n_rays, 3)).copy()
+            return RayQueue(O, np.asarray(r.directions, dtype=np.float64), e, np.arange(n_rays, dtype=np.int64), wl)
+
+    def material_bsdfs(self, table) -> List[Any]:
+        """material id 순서 BSDF 목록. bsdfs 가 dict 면 table.names 로 정렬."""
+        bsdfs = self.bsdfs if self.bsdfs is not None else getattr(self.builder, 'bsdfs', None)
+        if bsdfs is None:
+            return bsdfs_from_table(table)
+        if isinstance(bsdfs, dict):
+            return [bsdfs[n] for n in table.names]
+        return list(bsdfs)
+
+    def _shade(self, bsdfs, mid: np.ndarray, N: np.ndarray, q: RayQueue):
+        """mid 로 정렬된 광선을 재질 구간별로 BSDF 샘플. 반환 (wo (n,3) float64, 새 energy)."""
+        wo = np.empty_like(q.direction)
+        e_new = np.empty_like(q.energy)
+        bounds = np.flatnonzero(np.diff(mid)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, mid.size]):
+            if lo == hi:
+                continue
+            sl = slice(int(lo), int(hi))
+            bsdf = bsdfs[int(mid[lo])]
+            if q.wavelength_nm is not None:
+                out = bsdf.sample_spectral(N[sl], q.direction[sl], q.wavelength_nm[sl], self.rng)
+                e = q.energy[sl] * out['throughput']
+                e_new[sl] = terminate_secondary(e, np.asarray(out['dispersed']))
+            else:
+                out = bsdf.sample(N[sl], q.direction[sl], self.rng)
+                e_new[sl] = q.energy[sl] * out['throughput']
+            wo[sl] = out['wo']
+        return wo, e_new
+
+    def run(self, source=None, n_rays: int = 0, sensors: Sequence = (), origin=(0.0, 0.0, 0.0), queue: Optional[RayQueue] = None) -> Dict[str, Any]:
+        """광원 (또는 주어진 queue) 에서 max_bounces 까지 추적. 반환: 에너지 집계 + stats."""
+        if self.builder is None:
+            raise RuntimeError("WavefrontController.run() requires a builder with built BLAS/TLAS (builder is None)")
+        q = queue if queue is not None else self.generate(source, n_rays, origin)
+        table = self.material_table if self.material_table is not None else getattr(self.builder, 'sbt', None)
+        bsdfs = self.material_bsdfs(table)
+        inst_mat = self.instance_material if self.instance_material is not None else instance_material_ids(self.builder, table)
+        tally = {'emitted': float(q.energy.sum()), 'escaped': 0.0, 'absorbed': 0.0, 'truncated': 0.0}
+        for bounce in range(self.max_bounces + 1):
+            if len(q) == 0:
+                break
+            counters = {'bounce': bounce, 'live': len(q)}
+            with self._stage('intersect'):
+                hit = self.builder.closest_hit(q.origin, q.direction)
+            with self._stage('scatter'):
+                esc = ~hit.hit
+                if esc.any():
+                    for s in sensors:
+                        score_sensor(s, q.origin[esc], q.direction[esc], q.energy[esc],
+                                     q.wavelength_nm[esc] if q.wavelength_nm is not None else None)
+                    tally['escaped'] += float(q.energy[esc].sum())
+            counters['escaped'] = int(esc.sum())
+            counters['hit'] = len(q) - counters['escaped']
+            with self._stage('compact'):
+                mid = np.where(hit.hit, inst_mat[np.maximum(hit.instance, 0)], -1)
+                dead = esc | (mid < 0)
+                tally['absorbed'] += float(q.energy[~esc & (mid < 0)].sum())
+                keep = np.nonzero(~dead)[0]
+                if bounce == self.max_bounces:
+                    tally['truncated'] += float(q.energy[keep].sum())
+                    counters['truncated'] = int(keep.size)
+                    self.stats['queue'].append(counters)
+                    break
+                # material id 로 정렬 (coherent BSDF 호출)
+                keep = keep[np.argsort(mid[keep], kind='stable')]
+                P = q.origin[keep] + hit.t[keep, None] * q.direction[keep]
+                N = hit.normal[keep]
+                q, mid = q.compact(keep), mid[keep]
+            with self._stage('shade'):
+                wo, e_new = self._shade(bsdfs, mid, N, q)
+                # hero lane 재가중 (terminate_secondary) 분도 여기서 정산 → emitted = escaped + absorbed + truncated
+                tally['absorbed'] += float((q.energy - e_new).sum())
+                # 나가는 쪽으로 offset (자기 교차 방지)
+                side = np.sign(np.einsum('ij,ij->i', wo, N))[:, None]
+                q = RayQueue(P + side * self.epsilon * N, wo, e_new, q.ray_id, q.wavelength_nm)
+            with self._stage('compact'):
+                alive = q.ray_energy() > self.min_energy
+                tally['absorbed'] += float(q.energy[~alive].sum())
+                counters['absorbed'] = counters['hit'] - int(alive.sum())
+                q = q.compact(alive)
+            self.stats['queue'].append(counters)
+        tally['stats'] = self.stats
+        self.stats['energy'] = {k: v for k, v in tally.items() if k != 'stats'}
+        return tally
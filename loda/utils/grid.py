@@ -6,3 +6,12 @@ def theta_phi_grid(T: int, P: int, theta_max_rad: float):
     th, ph = np.meshgrid(theta, phi, indexing='ij')
     dirs = np.stack([np.sin(th)*np.cos(ph), np.sin(th)*np.sin(ph), np.cos(th)], axis=-1)
     return th, ph, dirs  # (T,P), (T,P), (T,P,3)
+
+def uniform_angle_grid(H: int, W: int, resolution_deg: float, offset=(0, 0), phi_resolution_deg=None):
+    # LPF 셀 (i,j) -> (theta_deg, phi_deg) = ((i0+i)*res, (j0+j)*phi_res), offset=(i0,j0) 은 타일 시작 셀
+    if phi_resolution_deg is None:
+        phi_resolution_deg = resolution_deg
+    theta = (offset[0] + np.arange(H, dtype=np.float64)) * resolution_deg
+    phi = (offset[1] + np.arange(W, dtype=np.float64)) * phi_resolution_deg
+    th, ph = np.meshgrid(theta, phi, indexing='ij')
+    return th, ph  # (H,W), (H,W) degrees
@@ -16,3 +16,23 @@ def rotation_from_z(to_dir: np.ndarray) -> np.ndarray:
     vx = np.array([[0, -v[2], v[1]],[v[2], 0, -v[0]],[-v[1], v[0], 0]], dtype=np.float32)
     R = np.eye(3, dtype=np.float32) + vx + vx @ vx * (1.0/(1.0 + c))
     return R.astype(np.float32)
+
+def sph_to_cart_array(theta, phi) -> np.ndarray:
+    # (...,) theta/phi (rad) -> (...,3) float32 단위 벡터 (theta: +z 축 기준 극각)
+    theta = np.asarray(theta, dtype=np.float32)
+    phi = np.asarray(phi, dtype=np.float32)
+    out = np.empty(np.broadcast_shapes(theta.shape, phi.shape) + (3,), dtype=np.float32)
+    st = np.sin(theta)
+    out[..., 0] = st * np.cos(phi)
+    out[..., 1] = st * np.sin(phi)
+    out[..., 2] = np.cos(theta)
+    return out
+
+def cart_to_sph_array(v) -> tuple:
+    # (...,3) 벡터 -> (theta, phi) 각각 (...,), phi 는 (-pi, pi]
+    v = np.asarray(v)
+    x, y, z = v[..., 0], v[..., 1], v[..., 2]
+    r = np.sqrt(x*x + y*y + z*z) + 1e-12
+    theta = np.arccos(np.clip(z / r, -1.0, 1.0))
+    phi = np.arctan2(y, x)
+    return theta, phi
@@ -9,3 +9,29 @@ def cosine_hemisphere(n_rays: int):
     y = r * np.sin(theta)
     z = np.sqrt(1.0 - u1)
     return np.stack([x,y,z], axis=-1).astype(np.float32)
+
+def build_alias_table(weights: np.ndarray):
+    # Vose alias method: O(n) 구축, 샘플당 O(1). 반환 (prob (n,) float64, alias (n,) int64)
+    w = np.asarray(weights, dtype=np.float64).ravel()
+    if w.size == 0 or not np.all(np.isfinite(w)) or (w < 0).any() or w.sum() <= 0:
+        raise ValueError("alias table weights must be finite, non-negative and not all zero")
+    n = w.size
+    scaled = w * (n / w.sum())
+    prob = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.int64)
+    small = [int(i) for i in np.nonzero(scaled < 1.0)[0]]
+    large = [int(i) for i in np.nonzero(scaled >= 1.0)[0]]
+    while small and large:
+        s = small.pop(); l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = (scaled[l] + scaled[s]) - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+    # 남은 항목은 수치 오차 → prob=1 (자기 자신)
+    return prob, alias
+
+def sample_alias(prob: np.ndarray, alias: np.ndarray, n: int, rng=None) -> np.ndarray:
+    # alias table 에서 n 개 인덱스 샘플
+    rng = np.random.default_rng() if rng is None else rng
+    k = rng.integers(0, prob.size, size=n)
+    return np.where(rng.random(n) < prob[k], k, alias[k])
@@ -0,0 +1,249 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+
+class TestOCCReaderCache(unittest.TestCase):
+    def test_content_addressed_cache(self):
+        from loda.geometry.occ_reader import OCCReader, SceneGraph, SceneNode, AxisRegistry, Axis, TriMesh
+
+        class CountingReader(OCCReader):
+            # pythonocc 없이 캐시 경로만 검증: 테셀레이션 결과를 고정값으로
+            calls = 0
+            def _tessellate(self, step_path, preset):
+                CountingReader.calls += 1
+                m = TriMesh(np.eye(3, dtype=np.float32), np.array([[0, 1, 2]], dtype=np.int32), np.array([7], dtype=np.int32))
+                I = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+                root = SceneNode('ROOT', I, [SceneNode('LENS_1', I, [], mesh_ref='0:1:1:1', label='LENS')])
+                return SceneGraph(root, {7: 'LENS'}, {'0:1:1:1': m}), AxisRegistry({'AXIS_SOURCE_1': Axis('AXIS_SOURCE_1', (0, 0, 1), (0, 0, 1), (1, 0, 0), (0, 1, 0))})
+
+        with tempfile.TemporaryDirectory() as d:
+            step = os.path.join(d, 'lamp.step')
+            with open(step, 'w') as f:
+                f.write('ISO-10303-21;\n')
+            r = CountingReader(cache_dir=os.path.join(d, 'cache'))
+            r.load(step, 'fast')
+            sg, reg = r.load(step, 'fast')
+            self.assertTrue(r.last_cache_hit)
+            self.assertEqual(CountingReader.calls, 1)
+            self.assertEqual(sg.root.children[0].label, 'LENS')
+            self.assertEqual(sg.faces, {7: 'LENS'})
+            self.assertIsInstance(sg.meshes['0:1:1:1'].vertices, np.memmap)
+            self.assertEqual(reg.axes['AXIS_SOURCE_1'].origin, (0, 0, 1))
+            # 다른 프리셋, 바뀐 내용 → 다시 테셀레이션
+            r.load(step, 'quality')
+            with open(step, 'a') as f:
+                f.write('END-ISO-10303-21;\n')
+            r.load(step, 'fast')
+            self.assertFalse(r.last_cache_hit)
+            self.assertEqual(CountingReader.calls, 3)
+
+    def test_parallel_mesh_file_tessellation(self):
+        from loda.geometry.occ_reader import OCCReader
+        obj = '\n'.join([
+            'o LENS_A', 'v 0 0 0', 'v 1 0 0', 'v 1 1 0', 'v 0 1 0', 'f 1 2 3 4',
+            'o REFLECTOR_1', 'v 0 0 1', 'v 1 0 1', 'v 1 1 1', 'g front', 'f 5 6 7', 'g back', 'f 7 6 5', 'f -1 -2 -3',
+            'o HOUSING', 'v 0 0 2', 'v 2 0 2', 'v 0 2 2', 'f 8/1/1 9/2/2 10/3/3',
+        ])
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'lamp.obj')
+            with open(path, 'w') as f:
+                f.write(obj)
+            out = []
+            for w in (1, 3):
+                sg, _ = OCCReader(use_cache=False, n_workers=w).load(path)
+                out.append(sg)
+            a, b = out
+            self.assertEqual(a.faces, {0: 'LENS', 1: 'REFLECTOR', 2: 'REFLECTOR', 3: 'HOUSING'})
+            self.assertEqual(a.faces, b.faces)
+            ma, mb = a.merged_mesh(), b.merged_mesh()
+            np.testing.assert_array_equal(ma.faces, mb.faces)
+            np.testing.assert_array_equal(ma.face_ids, [0, 0, 1, 2, 2, 3])
+            self.assertEqual(ma.vertices.shape, (10, 3))
+            self.assertEqual([c.label for c in a.root.children], ['LENS', 'REFLECTOR', 'HOUSING'])
+            self.assertEqual(a.label_names, ['LENS', 'REFLECTOR', 'HOUSING'])
+            np.testing.assert_array_equal(a.face_label_ids, [0, 1, 1, 2])
+            np.testing.assert_array_equal(a.triangle_label_ids(a.root.children[1].mesh_ref), [1, 1, 1])
+            # 이진 STL: 같은 삼각형 2개 → 정점 병합
+            stl = os.path.join(d, 'part.stl')
+            rec = np.zeros(2, dtype=np.dtype([('n', '<f4', 3), ('v', '<f4', (3, 3)), ('attr', '<u2')]))
+            rec['v'][0] = [[0, 0, 0], [1, 0, 0], [0, 1, 0]]
+            rec['v'][1] = [[1, 0, 0], [1, 1, 0], [0, 1, 0]]
+            with open(stl, 'wb') as f:
+                f.write(b'\0' * 80 + np.uint32(2).tobytes() + rec.tobytes())
+            sg, _ = OCCReader(use_cache=False).load(stl)
+            m = sg.meshes[sg.root.children[0].mesh_ref]
+            self.assertEqual((m.vertices.shape[0], m.faces.shape[0]), (4, 2))
+
+
+    def test_reader_label_rules(self):
+        from loda.geometry.occ_reader import OCCReader
+        from loda.geometry.labeling import LabelRules
+        obj = '\n'.join(['o LENS_A', 'v 0 0 0', 'v 1 0 0', 'v 1 1 0', 'f 1 2 3', 'o bezel', 'v 0 0 1', 'v 1 0 1', 'v 1 1 1', 'f 4 5 6'])
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'lamp.obj')
+            with open(path, 'w') as f:
+                f.write(obj)
+            yml = os.path.join(d, 'labeling.yaml')
+            with open(yml, 'w') as f:
+                f.write("rules:\n  - { label: HOUSING, name: 'bezel' }\ndefault: null\n")
+            cache = os.path.join(d, 'cache')
+            sg, _ = OCCReader(cache_dir=cache, label_rules=yml).load(path)
+            self.assertEqual([c.label for c in sg.root.children], [None, 'HOUSING'])
+            self.assertEqual(sg.faces, {0: None, 1: 'HOUSING'})
+            np.testing.assert_array_equal(sg.face_label_ids, [-1, 0])
+            # 규칙이 다르면 캐시 키도 다름 (기본 규칙 결과가 섞이지 않음)
+            r = OCCReader(cache_dir=cache)
+            self.assertNotEqual(r.cache_key(path, 'medium'), OCCReader(cache_dir=cache, label_rules=LabelRules.load(yml)).cache_key(path, 'medium'))
+            sg, _ = r.load(path)
+            self.assertFalse(r.last_cache_hit)
+            self.assertEqual(sg.faces, {0: 'LENS', 1: 'BEZEL'})
+            sg, _ = r.load(path)
+            self.assertTrue(r.last_cache_hit)
+            self.assertEqual(sg.label_names, ['LENS', 'REFLECTOR', 'BEZEL'])
+            np.testing.assert_array_equal(sg.face_label_ids, [0, 2])
+
+
+class TestMeshingPolicy(unittest.TestCase):
+    @staticmethod
+    def _cylinder(n=8, r=10.0):
+        # 반원통 띠 (face 0) + 평판 (face 1), 정점 공유 없음
+        from loda.geometry.occ_reader import TriMesh
+        a = np.linspace(0, np.pi, n + 1)
+        ring = np.stack([r * np.cos(a), r * np.sin(a), np.zeros_like(a)], 1)
+        V = np.concatenate([ring, ring + [0, 0, 5], [[0, -20, 0], [5, -20, 0], [5, -25, 0], [0, -25, 0]]])
+        F = [[i, i + 1, n + 2 + i] for i in range(n)] + [[i + 1, n + 2 + i + 1, n + 2 + i] for i in range(n)]
+        k = 2 * (n + 1)
+        F += [[k, k + 1, k + 2], [k, k + 2, k + 3]]
+        return TriMesh(V.astype(np.float32), np.array(F, np.int32), np.array([0] * 2 * n + [1, 1], np.int32))
+
+    def test_policy_per_label(self):
+        from loda.geometry.meshing import POLICIES, get_policy, PRESETS
+        optical = get_policy('optical')
+        self.assertEqual(optical.preset_for('LENS').linear_deflection, 0.05)
+        self.assertEqual(optical.preset_for('HOUSING').linear_deflection, 2.0)
+        self.assertIs(optical.preset_for('OTHER'), PRESETS['medium'])
+        self.assertIs(get_policy('fast').preset_for('LENS'), PRESETS['fast'])
+        self.assertTrue(POLICIES['optical'].refines('LENS'))
+        self.assertFalse(POLICIES['optical'].refines('HOUSING'))
+
+    def test_curvature_refine_is_local_and_watertight(self):
+        from loda.geometry.meshing import RefineCriteria, refine_mesh
+        m = self._cylinder()
+        out = refine_mesh(m, RefineCriteria(curvature_deg=5.0, max_iterations=1))
+        fid = np.asarray(out.face_ids)
+        self.assertEqual(int((fid == 1).sum()), 2)  # 평판은 그대로
+        self.assertGreater(int((fid == 0).sum()), 16)
+        # 모든 변이 삼각형 1~2 개에만 속함 (T-junction 없음)
+        e = np.sort(np.concatenate([out.faces[:, [0, 1]], out.faces[:, [1, 2]], out.faces[:, [2, 0]]]), axis=1)
+        _, cnt = np.unique(e, axis=0, return_counts=True)
+        self.assertLessEqual(cnt.max(), 2)
+        # 새 정점은 현 (chord) 중점보다 원통면에 가까움
+        new = np.asarray(out.vertices)[m.vertices.shape[0]:]
+        r = np.linalg.norm(new[:, :2], axis=1)
+        on_ring = np.abs(new[:, 2] - np.round(new[:, 2] / 5) * 5) < 1e-4
+        chord = 10.0 * np.cos(np.pi / 16)
+        self.assertTrue(np.all(r[on_ring & (r > 1)] > chord + 1e-3))
+
+    def test_hit_density_refine(self):
+        from loda.geometry.meshing import RefineCriteria, refine_mesh
+        m = self._cylinder()
+        hits = np.zeros(m.faces.shape[0])
+        hits[-1] = 1000.0  # 평판 한쪽 삼각형에 집중
+        out = refine_mesh(m, RefineCriteria(hit_density=1.0, max_iterations=2, min_edge_mm=2.0), hits)
+        fid = np.asarray(out.face_ids)
+        self.assertEqual(int((fid == 0).sum()), 16)
+        self.assertGreater(int((fid == 1).sum()), 4)
+
+    def test_reader_applies_policy(self):
+        from loda.geometry.occ_reader import OCCReader
+        from loda.geometry.meshing import MeshingPolicy, RefineCriteria, PRESETS
+        # 렌즈: 15° 씩 꺾인 띠 (같은 CAD face), 하우징: 같은 모양
+        strip = ['v 0 0 0', 'v 0 1 0', 'v 1 0 0', 'v 1 1 0', 'v 1.97 0 0.26', 'v 1.97 1 0.26']
+        obj = '\n'.join(['o LENS_A'] + strip + ['f 1 3 4 2', 'f 3 5 6 4', 'o HOUSING'] + strip + ['f 7 9 10 8', 'f 9 11 12 10'])
+        policy = MeshingPolicy('lens-only', PRESETS['medium'], refine=RefineCriteria(curvature_deg=5.0, max_iterations=1), refine_labels=('LENS',))
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'lamp.obj')
+            with open(path, 'w') as f:
+                f.write(obj)
+            r = OCCReader(cache_dir=os.path.join(d, 'cache'))
+            sg, _ = r.load(path, policy)
+            lens, housing = (sg.meshes[c.mesh_ref] for c in sg.root.children)
+            self.assertEqual(housing.faces.shape[0], 4)
+            self.assertGreater(lens.faces.shape[0], 4)
+            self.assertEqual(r.cache_key(path, policy), r.cache_key(path, policy))
+            self.assertNotEqual(r.cache_key(path, policy), r.cache_key(path, 'medium'))
+
+
+class TestSceneFlatten(unittest.TestCase):
+    def test_incremental_flatten(self):
+        from loda.geometry.occ_reader import SceneGraph, SceneNode, TriMesh
+        I = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+        T = lambda x, y, z: [1, 0, 0, x, 0, 1, 0, y, 0, 0, 1, z, 0, 0, 0, 1]
+        cube = TriMesh(np.array([[0, 0, 0], [1, 1, 1]], dtype=np.float32), np.zeros((0, 3), np.int32), np.zeros(0, np.int32))
+        arm = SceneNode('ARM', T(10, 0, 0), [SceneNode('LENS_1', T(0, 1, 0), [], 'cube', 'LENS'), SceneNode('LENS_2', T(0, 2, 0), [], 'cube', 'LENS')])
+        sg = SceneGraph(SceneNode('ROOT', I, [SceneNode('HOUSING', I, [], 'cube', 'HOUSING'), arm]), {}, {'cube': cube})
+        f = sg.flatten()
+        self.assertEqual(f.names, ['HOUSING', 'LENS_1', 'LENS_2'])
+        self.assertEqual(f.world.shape, (3, 4, 4))
+        np.testing.assert_allclose(f.world[2, :3, 3], [10, 2, 0])
+        np.testing.assert_allclose(f.aabb_min[1], [10, 1, 0])
+        np.testing.assert_allclose(f.aabb_max[1], [11, 2, 1])
+        self.assertIs(sg.flatten(), f)
+        self.assertEqual(f.changed.size, 0)
+        # 서브트리 변환만 바뀜 → 해당 인스턴스만 갱신
+        arm.transform = T(0, 0, 5)
+        f2 = sg.flatten()
+        self.assertIs(f2, f)
+        np.testing.assert_array_equal(f.changed, [1, 2])
+        np.testing.assert_allclose(f.aabb_min[2], [0, 2, 5])
+        np.testing.assert_allclose(f.world[0, :3, 3], [0, 0, 0])
+        # 구조 변경 → 전체 재구성
+        arm.children.pop()
+        self.assertEqual(len(sg.flatten()), 2)
+
+
+class TestLabelRules(unittest.TestCase):
+    def test_rule_priority_and_defaults(self):
+        from loda.geometry.labeling import LabelRules, assign_label
+        self.assertEqual(assign_label('REFLECT_part'), 'REFLECTOR')
+        self.assertEqual(assign_label('lens_outer'), 'LENS')
+        self.assertEqual(assign_label('bracket'), 'BRACKET')
+        rules = LabelRules.from_dict({'rules': [
+            {'label': 'LENS_INNER', 'name': '^LENS', 'layer': 'inner'},
+            {'label': 'LENS', 'name': '^LENS'},
+            {'label': 'HOUSING', 'layer': 'HOUSING'},
+            {'label': 'REFLECTOR', 'name': 'REFL(ECT)?'},
+            {'label': 'BLACK', 'color': '#202020'},
+        ], 'default': None})
+        self.assertEqual(rules.label_of('Lens_1', layer='INNER'), 'LENS_INNER')
+        self.assertEqual(rules.label_of('Lens_1', layer='HOUSING'), 'LENS')
+        self.assertEqual(rules.label_of('REFL_2', layer='housing'), 'HOUSING')
+        self.assertEqual(rules.label_of('REFL_2', color='#202020'), 'REFLECTOR')
+        self.assertEqual(rules.label_of('part', color='#202020'), 'BLACK')
+        self.assertIsNone(rules.label_of('part'))
+        for bad in ({'rules': [{'name': 'x'}]}, {'rules': [{'label': 'A'}]}, {'rules': [{'label': 'A', 'name': '('}]},
+                    {'rules': [{'label': 'A', 'shape': 'x'}]}, {'rule': []}):
+            with self.assertRaises(ValueError):
+                LabelRules.from_dict(bad)
+
+    def test_bulk_label_ids(self):
+        from loda.geometry.labeling import LabelRules
+        from loda.optics.registry import OpticalRegistry
+        path = os.path.join(os.path.dirname(__file__), '..', 'loda', 'geometry', 'labeling.yaml')
+        rules = LabelRules.load(path)
+        table = OpticalRegistry.from_dict({'materials': {
+            'LENS': {'type': 'dielectric'}, 'REFLECTOR': {'type': 'mirror'}, 'HOUSING': {'type': 'absorb'}}}).material_table()
+        names = ['LENS_A', 'housing', 'reflector_1', 'LENS_B', 'bolt']
+        ids = rules.label_ids(names, vocabulary=table)
+        np.testing.assert_array_equal(ids, [0, 2, 1, 0, -1])
+        self.assertEqual(ids.dtype, np.int32)
+        # 메쉬 삼각형 순서 (face_ids) 로 정렬
+        tri = rules.label_ids(names, vocabulary=table, face_ids=[4, 4, 0, 2])
+        np.testing.assert_array_equal(tri, [-1, -1, 0, 1])
+        np.testing.assert_array_equal(rules.label_ids(['x', 'lens'], layers=['a', 'b']), [-1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from loda.fields.lpf import LPFConfig, LPF, RayPath
+from loda.fields.lpf import LPFConfig, LPF, RayPath, RayData
 
 
 class TestLPFMatrix(unittest.TestCase):
@@ -29,5 +29,227 @@ class TestLPFMatrix(unittest.TestCase):
         self.assertIn('paths', data)
         self.assertEqual(len(data['paths']), lpf.H * lpf.W)
 
+    def test_array_backed_views(self):
+        cfg = LPFConfig(source_angle=10, ray_resolution=5, bounces=3)
+        lpf = LPF(cfg)
+        self.assertEqual(lpf.buf.vertex.shape, (3, 3, 3, 3))
+        self.assertEqual(lpf.buf.energy.dtype, np.float32)
+        lpf.build_from_source_distribution(lambda th, ph: 1.0)
+        # 뷰를 통한 수정이 버퍼에 반영
+        path = lpf.get_path(1, 2)
+        path.steps[0].energy = 0.5
+        self.assertAlmostEqual(float(lpf.buf.energy[1, 2, 0]), 0.5)
+        # set_path 는 버퍼로 복사
+        p = RayPath(max_bounces=3)
+        p.add_step(RayData(vertex=np.zeros(3), theta=0.1, phi=0.2, energy=0.3, final_vertex=np.ones(3)))
+        lpf.set_path(0, 0, p)
+        self.assertEqual(int(lpf.buf.n_steps[0, 0]), 1)
+        np.testing.assert_allclose(lpf.get_path(0, 0).last().final_vertex, np.ones(3))
+        self.assertIsNone(lpf.get_path(1, 1).last().final_vertex)
+        # paths: 평탄 인덱스 (i*W + j) 뷰
+        self.assertEqual(len(lpf.paths), 9)
+        self.assertAlmostEqual(lpf.paths[1 * 3 + 2].steps[0].energy, 0.5)
+        self.assertEqual(lpf.paths[-1]._cell, (2, 2))
+        self.assertEqual(len(lpf.paths[2:5]), 3)
+        with self.assertRaises(IndexError):
+            lpf.paths[9]
+
+    def test_vectorized_build_matches_scalar(self):
+        import math
+        cfg = LPFConfig(source_angle=30, ray_resolution=5, bounces=2)
+        a, b = LPF(cfg), LPF(cfg)
+        a.build_from_source_distribution(lambda th, ph: np.cos(np.radians(th)) + 0.01 * ph, vectorized=True)
+        b.build_from_source_distribution(lambda th, ph: math.cos(math.radians(th)) + 0.01 * ph)  # auto -> scalar fall-back
+        np.testing.assert_allclose(a.distribution_map(0), b.distribution_map(0), rtol=1e-6)
+        np.testing.assert_allclose(a.buf.theta, b.buf.theta)
+        self.assertTrue((a.buf.n_steps == 1).all())
+
+    def test_connectivity_mask(self):
+        cfg = LPFConfig(source_angle=10, ray_resolution=5, bounces=2)
+        lpf = LPF(cfg)
+        lpf.build_from_source_distribution(lambda th, ph: 1.0)
+        lpf.append_interaction(1, 1, vertex=np.array([0, 0, 1], dtype=np.float32), theta=0.0, phi=0.0, energy=0.1)
+        lpf.append_interaction(2, 0, vertex=np.array([0, 1, 0], dtype=np.float32), theta=0.0, phi=0.0, energy=0.1)
+        self.assertFalse(lpf.connectivity_violations().any())
+        lpf.update_ray_step(2, 0, 0, final_vertex=np.array([5, 5, 5], dtype=np.float32))
+        mask = lpf.connectivity_violations()
+        self.assertEqual(mask.shape, (3, 3))
+        self.assertEqual([tuple(x) for x in np.argwhere(mask)], [(2, 0)])
+        with self.assertRaises(ValueError):
+            lpf.enforce_all_connectivity()
+        self.assertAlmostEqual(lpf.energy_sum(), 1.2, places=5)
+
+    def test_save_load_memmap(self):
+        import tempfile
+        cfg = LPFConfig(source_angle=10, ray_resolution=5, bounces=2, source_origin=(0.0, 0.0, 1.0))
+        lpf = LPF(cfg)
+        lpf.build_from_source_distribution(lambda th, ph: th + 1.0)
+        lpf.append_interaction(0, 1, vertex=np.array([1, 2, 3], dtype=np.float32), theta=0.3, phi=0.4, energy=0.05)
+        with tempfile.TemporaryDirectory() as d:
+            lpf.save(d)
+            loaded = LPF.load(d)
+            self.assertIsInstance(loaded.buf.energy, np.memmap)
+            self.assertEqual(loaded.cfg, cfg)
+            for name, arr in lpf.buf.arrays().items():
+                np.testing.assert_array_equal(getattr(loaded.buf, name), arr)
+            self.assertEqual(len(loaded.get_path(0, 1).steps), 2)
+            del loaded
+
+    def test_batched_append_and_update(self):
+        cfg = LPFConfig(source_angle=10, ray_resolution=5, bounces=2)
+        lpf = LPF(cfg)
+        lpf.build_from_source_distribution(lambda th, ph: 1.0)
+        ii, jj = np.array([0, 1, 2]), np.array([2, 1, 0])
+        verts = np.arange(9, dtype=np.float32).reshape(3, 3)
+        ok = lpf.append_interactions(ii, jj, verts, theta=0.5, phi=np.array([0.1, 0.2, 0.3]), energy=np.array([0.1, -1.0, 0.2]))
+        self.assertTrue(ok.all())
+        np.testing.assert_array_equal(lpf.buf.n_steps[ii, jj], [2, 2, 2])
+        np.testing.assert_allclose(lpf.buf.final_vertex[ii, jj, 0], verts)
+        self.assertEqual(float(lpf.buf.energy[1, 1, 1]), 0.0)
+        self.assertFalse(lpf.connectivity_violations().any())
+        # bounce 한도: strict 이면 예외, 아니면 건너뜀
+        with self.assertRaises(ValueError):
+            lpf.append_interactions([0, 0], [2, 0], np.zeros((2, 3)), 0.0, 0.0, 0.1)
+        ok = lpf.append_interactions([0, 0], [2, 0], np.zeros((2, 3)), 0.0, 0.0, 0.1, strict=False)
+        np.testing.assert_array_equal(ok, [False, True])
+        with self.assertRaises(ValueError):  # 한 배치 안 중복 셀
+            lpf.append_interactions([1, 1], [0, 0], np.zeros((2, 3)), 0.0, 0.0, 0.1, strict=False)
+        # 마스크 일괄 수정
+        mask = lpf.buf.n_steps == 2
+        lpf.update_steps(1, mask, energy=0.25)
+        self.assertAlmostEqual(float(lpf.distribution_map(1).sum()), 1.0, places=6)
+        with self.assertRaises(IndexError):
+            lpf.update_steps(1, np.ones((3, 3), dtype=bool), energy=0.0)
+
+    def test_torch_bridge(self):
+        try:
+            import torch
+        except ImportError:
+            self.skipTest('torch not installed')
+        cfg = LPFConfig(source_angle=10, ray_resolution=5, bounces=2)
+        lpf = LPF(cfg)
+        lpf.build_from_source_distribution(lambda th, ph: 1.0)
+        t = lpf.as_tensors()
+        t['energy'][..., 0] *= 2.0  # 메모리 공유 → 버퍼에 즉시 반영
+        self.assertAlmostEqual(lpf.energy_sum(), 2.0, places=5)
+        detached = {'theta': t['theta'].clone() + 1.0}
+        lpf.write_back(detached)
+        self.assertAlmostEqual(float(lpf.buf.theta[0, 0, 0]), 1.0, places=6)
+
+    def test_direction_cache(self):
+        cfg = LPFConfig(source_angle=20, ray_resolution=5, bounces=2)
+        lpf = LPF(cfg)
+        lpf.build_from_source_distribution(lambda th, ph: 1.0)
+        d0 = lpf.directions()
+        self.assertEqual(d0.shape, (5, 5, 2, 3))
+        np.testing.assert_allclose(d0[2, 3, 0], LPF.sph_to_cart(lpf.buf.theta[2, 3, 0], lpf.buf.phi[2, 3, 0]), atol=1e-6)
+        self.assertIs(lpf.directions(), d0)  # 변경 없으면 캐시 재사용
+        th, ph = LPF.cart_to_sph_array(d0[..., 0, :])
+        np.testing.assert_allclose(th, lpf.buf.theta[..., 0], atol=1e-5)
+        lpf.update_ray_step(2, 3, 0, theta=0.0)
+        d1 = lpf.directions()
+        self.assertIsNot(d1, d0)
+        np.testing.assert_allclose(d1[2, 3, 0], [0, 0, 1], atol=1e-6)
+
+
+class TestTiledLPF(unittest.TestCase):
+    def test_tiled_matches_dense(self):
+        import os, tempfile
+        from loda.fields.lpf_tiled import TiledLPF
+        cfg = LPFConfig(source_angle=20, ray_resolution=5, bounces=2)
+        dense = LPF(cfg)
+        dist = lambda th, ph: 1.0 + th * 0.1 + ph * 0.01
+        dense.build_from_source_distribution(dist)
+        tile_bytes = 2 * 2 * (cfg.bounces * 36 + 2)
+        with tempfile.TemporaryDirectory() as d:
+            tl = TiledLPF(cfg, d, tile_size=2, memory_budget=2 * tile_bytes)
+            self.assertEqual((tl.n_ti, tl.n_tj), (3, 3))
+            tl.build_from_source_distribution(dist)
+            self.assertLessEqual(tl.resident_bytes(), 2 * tile_bytes)
+            self.assertGreater(tl.stats['evictions'], 0)
+            np.testing.assert_allclose(tl.distribution_map(0), dense.distribution_map(0), rtol=1e-6)
+            # 타일 단위 trace: 각 셀에 한 step 추가
+            def trace(tile):
+                ii, jj = np.nonzero(np.ones((tile.H, tile.W), dtype=bool))
+                tile.append_interactions(ii, jj, np.zeros((ii.size, 3)), 0.0, 0.0, tile.buf.energy[ii, jj, 0] * 0.5)
+            tl.map_tiles(trace)
+            tl.flush()
+            reopened = TiledLPF.open(d)
+            self.assertAlmostEqual(reopened.energy_sum(), 1.5, places=5)
+            self.assertEqual(reopened.connectivity_violation_count(), 0)
+            self.assertFalse(any(n.endswith(('.tmp', '.old')) for n in os.listdir(d)))
+            with self.assertRaises(TypeError):
+                reopened.tile(0, 0).save(os.path.join(d, 'standalone'))
+            # 다른 설정으로 같은 root → 거부, overwrite=True 면 기존 타일 삭제
+            other = LPFConfig(source_angle=20, ray_resolution=5, bounces=3)
+            with self.assertRaises(ValueError):
+                TiledLPF(other, d, tile_size=2)
+            fresh = TiledLPF(other, d, tile_size=2, overwrite=True)
+            self.assertEqual(fresh.energy_sum(), 0.0)
+            self.assertEqual(TiledLPF.open(d).cfg.bounces, 3)
+
+
+class TestAdaptiveLPF(unittest.TestCase):
+    def test_full_sphere_size(self):
+        cfg = LPFConfig(source_angle=90, ray_resolution=10, phi_span=360, phi_resolution=20)
+        self.assertEqual(cfg.compute_size(), (10, 18))
+        lpf = LPF(cfg)
+        _, ph = lpf.angle_grid()
+        self.assertAlmostEqual(float(ph.max()), 340.0)
+        with self.assertRaisesRegex(ValueError, 'phi_resolution'):
+            LPFConfig(phi_resolution=50).compute_size()
+
+    def test_max_level_key_range(self):
+        from loda.fields.adaptive_lpf import AdaptiveLPF
+        cfg = LPFConfig(source_angle=180, ray_resolution=0.01, phi_span=360, phi_resolution=20)
+        with self.assertRaises(ValueError):
+            AdaptiveLPF(cfg, max_level=20)  # 18000 << 20 >= 2**32
+
+    def test_refinement_concentrates_on_beam(self):
+        from loda.fields.adaptive_lpf import AdaptiveLPF
+        cfg = LPFConfig(source_angle=60, ray_resolution=10, phi_span=360, phi_resolution=20, bounces=2)
+        a = AdaptiveLPF(cfg, max_level=4)
+        a.build_from_source_distribution(lambda th, ph: np.where(th < 14, np.cos(np.radians(th * 6)) + 1.0, 0.0))
+        self.assertAlmostEqual(a.energy_sum(), 1.0, places=6)
+        self.assertLess(a.n_leaves, a.H0 * a.W0 * 4 ** 4 // 10)
+        th0, _, _, _ = a.leaf_bounds()
+        self.assertTrue((th0 < 20).all())  # 에너지 없는 영역은 제거
+        self.assertGreaterEqual(int(a.level.max()), 3)
+        thc, phc = a.leaf_centers()
+        np.testing.assert_array_equal(a.locate(thc, phc), np.arange(a.n_leaves))
+        self.assertEqual(int(a.locate([50.0], [0.0])[0]), -1)
+        # 외부 오차 기반 분할: 에너지 보존
+        err = np.zeros(a.n_leaves)
+        err[a.level < 4] = 1.0
+        n_before = a.n_leaves
+        split = a.refine_by_error(err, 0.5)
+        self.assertEqual(a.n_leaves, n_before + 3 * split)
+        self.assertAlmostEqual(a.energy_sum(), 1.0, places=6)
+
+    def test_leaf_write_api(self):
+        from loda.fields.adaptive_lpf import AdaptiveLPF
+        cfg = LPFConfig(source_angle=40, ray_resolution=10, phi_span=90, phi_resolution=15, bounces=2)
+        a = AdaptiveLPF(cfg, max_level=2)
+        a.build_from_source_distribution(lambda th, ph: 1.0)
+        # 상한 모서리 (theta_span, phi_span) 는 마지막 leaf 에 포함
+        self.assertGreaterEqual(int(a.locate([40.0], [90.0])[0]), 0)
+        self.assertEqual(int(a.locate([40.0], [90.5])[0]), -1)
+        thc, phc = a.leaf_centers()
+        leaves = a.locate(thc[:3], phc[:3])
+        ok = a.append_interactions_at(thc[:3], phc[:3], np.ones((3, 3)), 0.1, 0.2, a.distribution(0)[leaves] * 0.5)
+        self.assertTrue(ok.all())
+        np.testing.assert_array_equal(a.buf.n_steps[leaves], [2, 2, 2])
+        np.testing.assert_allclose(a.buf.final_vertex[leaves, 0], np.ones((3, 3)))
+        self.assertFalse(a.connectivity_violations().any())
+        with self.assertRaises(ValueError):
+            a.append_interactions(leaves, np.zeros((3, 3)), 0.0, 0.0, 0.1)  # bounce 한도
+        with self.assertRaises(IndexError):
+            a.append_interactions([-1], np.zeros((1, 3)), 0.0, 0.0, 0.1)
+        mask = a.buf.n_steps == 2
+        a.update_steps(1, mask, energy=np.zeros(3))
+        self.assertAlmostEqual(float(a.distribution(1).sum()), 0.0)
+        a.update_steps(0, np.ones(a.n_leaves, dtype=bool), energy=np.full(a.n_leaves, 1.0 / a.n_leaves))
+        self.assertAlmostEqual(a.energy_sum(), 1.0, places=5)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,300 @@
+import unittest
+import numpy as np
+
+
+class TestSensors(unittest.TestCase):
+    def test_planar_batch_matches_scalar(self):
+        from loda.optics.sensors import PlanarSensor
+        rng = np.random.default_rng(0)
+        x = rng.uniform(-70, 70, 2000); y = rng.uniform(-40, 40, 2000); e = rng.uniform(0, 1, 2000)
+        x[:3] = [-60.1, -60.0, 59.99]  # 경계 / 0 방향 절삭
+        a = PlanarSensor((120, 60), (64, 32), 500)
+        b = PlanarSensor((120, 60), (64, 32), 500)
+        for xi, yi, ei in zip(x, y, e):
+            a.accumulate(xi, yi, ei)
+        b.accumulate_batch(x, y, e)
+        np.testing.assert_allclose(a.buffer, b.buffer, rtol=1e-5, atol=1e-6)
+
+    def test_spherical_batch_matches_scalar(self):
+        from loda.optics.sensors import SphericalSensor
+        rng = np.random.default_rng(1)
+        th = rng.uniform(-5, 185, 1000); ph = rng.uniform(-5, 365, 1000)
+        a = SphericalSensor(5.0, 10.0, 1000)
+        b = SphericalSensor(5.0, 10.0, 1000)
+        for t, p in zip(th, ph):
+            a.accumulate(t, p, 1.0)
+        b.accumulate_batch(th, ph, 1.0)
+        np.testing.assert_array_equal(a.buffer, b.buffer)
+        b.accumulate_batch([np.nan], [0.0], 1.0)
+        np.testing.assert_array_equal(a.buffer, b.buffer)
+
+
+class TestPlanarDetector(unittest.TestCase):
+    def test_batch_matches_single(self):
+        from loda.optics.detector import PlanarDetector
+        rng = np.random.default_rng(2)
+        det_a = PlanarDetector(np.array([0, 0, 10.0]), np.array([0, 0, -1.0]), 4.0, 2.0, 16, 8)
+        det_b = PlanarDetector(np.array([0, 0, 10.0]), np.array([0, 0, -1.0]), 4.0, 2.0, 16, 8)
+        O = np.zeros((500, 3))
+        D = rng.normal(size=(500, 3)); D[:, 2] = np.abs(D[:, 2]) * 20
+        D[0] = [1, 0, 0]  # 평행
+        t, p, u, v, valid = det_b.intersect_batch(O, D)
+        for k in range(500):
+            hit = det_a.intersect(O[k], D[k])
+            self.assertEqual(hit is not None, bool(valid[k]))
+            if hit is not None:
+                self.assertEqual(hit[0], t[k])
+                self.assertEqual(hit[2], u[k])
+                det_a.add(hit[2], hit[3], 0.5)
+        self.assertFalse(valid[0])
+        det_b.score_batch(O, D, 0.5)
+        np.testing.assert_allclose(det_a.accum, det_b.accum, rtol=1e-6)
+        self.assertAlmostEqual(float(det_b.accum.sum()), 0.5 * valid.sum(), places=3)
+
+
+class TestSurfaceBinSensor(unittest.TestCase):
+    def test_batch_matches_scalar_and_export(self):
+        from loda.optics.surface_bin_sensor import SurfaceBinSensor, SurfaceBin
+        bins = {bid: SurfaceBin(face_indices=(bid,), normal=(0, 0, 1), area=1.0) for bid in (3, 7, 11)}
+        rng = np.random.default_rng(3)
+        ids = rng.choice([3, 7, 11, 99], size=400)
+        d = rng.normal(size=(400, 3)); d /= np.linalg.norm(d, axis=1, keepdims=True)
+        e = rng.uniform(0, 1, 400)
+        a, b = SurfaceBinSensor(bins, 9, 12), SurfaceBinSensor(bins, 9, 12)
+        for k in range(400):
+            a.accumulate(int(ids[k]), tuple(d[k]), float(e[k]))
+        b.accumulate_batch(ids, d, e)
+        np.testing.assert_allclose(a.hist_dense, b.hist_dense, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(a.energy_dense, b.energy_dense, rtol=1e-12)
+        self.assertEqual(b.hist_dense.shape, (3, 9, 12))
+        exp = b.to_sensor_sources()
+        np.testing.assert_allclose(exp['prob'].sum(axis=(1, 2)), 1.0, rtol=1e-5)
+        np.testing.assert_allclose(exp['prob'][1], b.to_sensor_source(7)['prob'], rtol=1e-6)
+        self.assertAlmostEqual(b.energy_sum[11], float(e[(ids == 11) & (d[:, 2] > 0)].sum()), places=6)
+        # 호환 Mapping 뷰: dict 처럼 조회, hist 는 dense 행 공유
+        self.assertEqual(list(b.hist), [3, 7, 11])
+        self.assertNotIn(99, b.hist)
+        self.assertTrue(np.shares_memory(b.hist[7], b.hist_dense))
+        self.assertEqual(dict(b.energy_sum)[3], float(b.energy_dense[0]))
+        with self.assertRaises(KeyError):
+            b.hist[99]
+
+
+class TestSources(unittest.TestCase):
+    def test_gaussian_importance_sampling(self):
+        from loda.optics.sources import build_source, alias_table_for, clear_alias_cache
+        from loda.optics.registry import SourceSpec
+        clear_alias_cache()
+        spec = SourceSpec('S', 2.0, 'gaussian', {'fwhm_deg': 20})
+        src = build_source(spec)
+        self.assertIs(alias_table_for(spec), alias_table_for(SourceSpec('S2', 1.0, 'gaussian', {'fwhm_deg': 20})))
+        rays = src.sample_batch(200000, np.random.default_rng(0))
+        self.assertEqual(rays.directions.shape, (200000, 3))
+        self.assertAlmostEqual(float(rays.energy.sum()), 2.0, places=3)
+        np.testing.assert_allclose(np.linalg.norm(rays.directions, axis=1), 1.0, atol=1e-5)
+        theta = np.degrees(np.arccos(np.clip(rays.directions[:, 2], -1, 1)))
+        # 기대 분포 ∝ I(θ) sinθ
+        th = np.linspace(0, 180, 18001); sigma = src.sigma
+        w = np.exp(-0.5 * (th / sigma) ** 2) * np.sin(np.radians(th))
+        self.assertAlmostEqual(float(theta.mean()), float((th * w).sum() / w.sum()), delta=0.1)
+
+    def test_ies_tabulated(self):
+        import os, tempfile
+        from loda.optics.sources import load_ies, TabulatedSource
+        text = "IESNA:LM-63-2002\n[TEST] x\nTILT=NONE\n1 1000 1 3 3 1 2 0 0 0\n1 1 10\n0 45 90\n0 90 180\n100 50 0\n100 50 0\n100 50 0\n"
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'lamp.ies')
+            with open(path, 'w') as f:
+                f.write(text)
+            tab = load_ies(path)
+        self.assertEqual(tab['intensity'].shape, (3, 3))
+        src = TabulatedSource(tab['theta_deg'], tab['phi_deg'], tab['intensity'])
+        d = src.sample_batch(20000, np.random.default_rng(1)).directions
+        theta = np.degrees(np.arccos(np.clip(d[:, 2], -1, 1)))
+        self.assertLessEqual(float(theta.max()), 67.5 + 1e-3)  # 90도 bin 강도 0
+        self.assertAlmostEqual(tab['lumens'], 1000.0)
+        self.assertFalse(tab['absolute'])
+
+    def test_ies_absolute_photometry(self):
+        import os, tempfile
+        from loda.optics.sources import load_ies
+        # lumens = -1: 등방 100 cd -> 4π x 100 lm
+        text = "IESNA:LM-63-2002\nTILT=NONE\n1 -1 1 3 1 1 2 0 0 0\n1 1 10\n0 90 180\n0\n100 100 100\n"
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'abs.ies')
+            with open(path, 'w') as f:
+                f.write(text)
+            tab = load_ies(path)
+        self.assertTrue(tab['absolute'])
+        self.assertAlmostEqual(tab['lumens'], 400.0 * np.pi, places=6)
+
+    def test_uniform_source(self):
+        from loda.optics.sources import build_source, SourceBase
+        Spec = type('Spec', (), {})
+        spec = Spec(); spec.power = 3.0; spec.distribution = 'uniform'; spec.params = {}
+        rays = build_source(spec).sample_batch(100000, np.random.default_rng(2))
+        self.assertAlmostEqual(float(rays.energy.sum()), 3.0, places=3)
+        self.assertLess(abs(float(rays.directions[:, 2].mean())), 0.01)  # 등방: cosθ 균등 [-1,1]
+        spec.params = {'half_angle_deg': 90, 'lambertian': True}
+        z = build_source(spec).sample_batch(100000, np.random.default_rng(3)).directions[:, 2]
+        self.assertTrue((z >= 0).all())
+        self.assertAlmostEqual(float(z.mean()), 2.0 / 3.0, delta=0.01)  # E[cosθ] = 2/3
+        with self.assertRaises(TypeError):  # 추상 클래스
+            SourceBase()
+        spec.distribution = 'laser'
+        with self.assertRaises(ValueError):
+            build_source(spec)
+
+
+class TestBSDF(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(4)
+
+    def test_mirror_and_absorb(self):
+        from loda.optics.bsdf import make_bsdf
+        n = np.tile([0.0, 0.0, 1.0], (1000, 1))
+        wi = np.tile([np.sin(0.3), 0.0, -np.cos(0.3)], (1000, 1))
+        out = make_bsdf('mirror', {'reflectance': 0.92}).sample(n, wi, self.rng)
+        np.testing.assert_allclose(out['wo'][0], [np.sin(0.3), 0.0, np.cos(0.3)], atol=1e-6)
+        np.testing.assert_allclose(out['throughput'], 0.92, rtol=1e-6)
+        out = make_bsdf('absorb', {'absorbance': 0.98}).sample(n, wi, self.rng)
+        self.assertTrue((out['wo'][:, 2] > 0).all())
+        np.testing.assert_allclose(out['throughput'], 0.02, rtol=1e-5)
+
+    def test_dielectric_fresnel_and_snell(self):
+        from loda.optics.bsdf import make_bsdf
+        b = make_bsdf('dielectric', {'ior': 1.49})
+        N = 200000
+        n = np.tile([0.0, 0.0, 1.0], (N, 1))
+        out = b.sample(n, np.tile([0.0, 0.0, -1.0], (N, 1)), self.rng)
+        self.assertAlmostEqual(float((~out['transmitted']).mean()), ((1.49 - 1) / 2.49) ** 2, delta=0.003)
+        ti = 0.5
+        out = b.sample(n[:100], np.tile([np.sin(ti), 0.0, -np.cos(ti)], (100, 1)), self.rng)
+        t = out['wo'][out['transmitted']]
+        np.testing.assert_allclose(np.hypot(t[:, 0], t[:, 1]), np.sin(ti) / 1.49, atol=1e-6)
+        self.assertTrue((t[:, 2] < 0).all())
+        # 내부에서 임계각 초과 → 전반사
+        out = b.sample(n[:100], np.tile([np.sin(1.2), 0.0, np.cos(1.2)], (100, 1)), self.rng)
+        self.assertFalse(out['transmitted'].any())
+
+    def test_ggx_sampling(self):
+        from loda.optics.bsdf import make_bsdf
+        b = make_bsdf('ggx', {'reflectance': 0.9, 'roughness': 0.2})
+        N = 5000
+        n = np.tile([0.0, 0.0, 1.0], (N, 1))
+        wi = np.tile([np.sin(0.4), 0.0, -np.cos(0.4)], (N, 1))
+        out = b.sample(n, wi, self.rng)
+        alive = out['throughput'] > 0
+        self.assertTrue((out['wo'][alive, 2] > 0).all())
+        self.assertGreater(float(out['throughput'].mean()), 0.8)
+        self.assertLessEqual(float(out['throughput'].max()), 0.9 + 1e-6)
+        self.assertTrue((b.evaluate(n, wi, out['wo'])[alive] > 0).all())
+
+    def test_coated_lut_cache(self):
+        import tempfile
+        from loda.optics.bsdf import fresnel_coated
+        axes = {'n_cos': 8, 'roughness': [0.0, 0.2], 'wavelength_nm': [450, 550, 650], 'n_mc': 256}
+        params = {'ior': 1.5, 'coating': 'ar_550nm'}
+        with tempfile.TemporaryDirectory() as d:
+            from loda.optics import bsdf_lut
+            a = bsdf_lut.load_or_bake('dielectric', params, cache_dir=d, axes=axes)
+            b = bsdf_lut.load_or_bake('dielectric', params, cache_dir=d, axes=axes)
+            self.assertIsInstance(b.data, np.memmap)
+            np.testing.assert_allclose(np.asarray(b.data), a.data)
+            F0 = float(b.fresnel(1.0, 0.0, 550.0))
+            self.assertLess(F0, 0.02)
+            self.assertAlmostEqual(F0, float(fresnel_coated(np.array([1.0]), 1.5, 550.0, 1.38, 550.0)[0]), places=5)
+            # 매끈한 유전체는 흡수 없음 → albedo 1
+            np.testing.assert_allclose(b.albedo(np.linspace(0.2, 1, 5), 0.0, 500.0), 1.0, atol=1e-6)
+
+
+class TestSpectral(unittest.TestCase):
+    def test_hero_sampling_conserves_power(self):
+        from loda.optics.sources import build_source
+        from loda.optics.registry import SourceSpec
+        rng = np.random.default_rng(5)
+        white = build_source(SourceSpec('S', 2.0, 'gaussian', {'fwhm_deg': 20}))
+        r = white.sample_batch(20000, rng, n_lambda=4)
+        self.assertEqual(r.energy.shape, (20000, 4))
+        self.assertAlmostEqual(float(r.energy.sum()), 2.0, delta=0.02)
+        gap = np.mod(np.diff(r.wavelength_nm, axis=1), 400.0)
+        np.testing.assert_allclose(gap, 100.0, atol=1e-3)
+        mono = build_source(SourceSpec('M', 1.0, 'gaussian', {'fwhm_deg': 20, 'wavelength_nm': 555}))
+        r = mono.sample_batch(100, rng, n_lambda=4)
+        self.assertTrue((r.wavelength_nm == 555).all())
+        self.assertAlmostEqual(float(r.energy.sum()), 1.0, places=5)
+
+    def test_sensor_photometric(self):
+        from loda.optics.sensors import PlanarSensor
+        s = PlanarSensor((10, 10), (2, 2), 100, spectral_edges_nm=(380, 580, 780))
+        wl = np.array([[555.0, 650.0], [450.0, 555.0]])
+        s.accumulate_batch([-2.0, 2.0], [-2.0, -2.0], np.ones((2, 2)), wavelength_nm=wl)
+        self.assertAlmostEqual(float(s.buffer.sum()), 4.0, places=5)
+        self.assertAlmostEqual(float(s.photometric[0, 0]), 683.0 * (1.0 + 0.107), places=2)
+        np.testing.assert_allclose(s.spectral[0, 0], [1.0, 1.0])
+        np.testing.assert_allclose(s.spectral[1, 0], [2.0, 0.0])
+        # 마지막 모서리 (780) 는 마지막 bin 에 포함
+        s.accumulate_batch([2.0], [2.0], [[1.0, 1.0]], wavelength_nm=[[780.0, 380.0]])
+        np.testing.assert_allclose(s.spectral[1, 1], [1.0, 1.0])
+
+    def test_dispersive_refraction_terminates_companions(self):
+        from loda.optics.bsdf import make_bsdf
+        from loda.optics.spectral import terminate_secondary
+        b = make_bsdf('dielectric', {'ior': 1.49, 'abbe': 30})
+        N = 1000
+        n = np.tile([0.0, 0.0, 1.0], (N, 1))
+        wi = np.tile([np.sin(0.6), 0.0, -np.cos(0.6)], (N, 1))
+        wl = np.tile([450.0, 550.0, 650.0], (N, 1))
+        out = b.sample_spectral(n, wi, wl, np.random.default_rng(0))
+        self.assertEqual(out['throughput'].shape, (N, 3))
+        np.testing.assert_array_equal(out['dispersed'], out['transmitted'])
+        e = terminate_secondary(np.ones((N, 3)) * out['throughput'], out['dispersed'])
+        self.assertTrue((e[out['dispersed'], 1:] == 0).all())
+        # 반사 lane 의 보정비: 청색 (ior 큼) 의 반사율이 더 큼
+        refl = ~out['transmitted']
+        self.assertTrue((out['throughput'][refl, 0] >= out['throughput'][refl, 2]).all())
+        one = b.sample_spectral(n[0], wi[0], wl[0], np.random.default_rng(0))
+        self.assertEqual((one['wo'].shape, one['throughput'].shape), ((3,), (3,)))
+        self.assertIsInstance(one['dispersed'], bool)
+
+
+
+class TestRegistry(unittest.TestCase):
+    def test_load_cache_and_table(self):
+        import os, tempfile
+        from loda.optics.registry import OpticalRegistry, clear_registry_cache
+        from loda.optics.bsdf import sample_materials
+        path = os.path.join(os.path.dirname(__file__), '..', 'loda', 'optics', 'opticalproperty.yaml')
+        clear_registry_cache()
+        from unittest import mock
+        a = OpticalRegistry.load(path)
+        with mock.patch('loda.optics.registry.yaml.safe_load', side_effect=AssertionError('cache miss')):
+            b = OpticalRegistry.load(path)
+        # 캐시 적중이어도 호출자마다 독립 사본
+        self.assertIsNot(b, a)
+        self.assertEqual(b.materials, a.materials)
+        b.materials['REFLECTOR'].params['reflectance'] = 0.5
+        self.assertNotEqual(OpticalRegistry.load(path).materials['REFLECTOR'].params['reflectance'], 0.5)
+        t = a.material_table()
+        ids = np.array([t.id_of('REFLECTOR'), t.id_of('LENS_OUTER'), t.id_of('HOUSING')])
+        g = t.gather(ids)
+        np.testing.assert_allclose(g['reflectance'][0], 0.92, rtol=1e-6)
+        np.testing.assert_allclose(g['ior'][1], 1.49, rtol=1e-6)
+        np.testing.assert_allclose(g['absorbance'][2], 0.98, rtol=1e-6)
+        out = sample_materials(t, np.repeat(ids, 100), np.array([0.0, 0, 1]), np.tile([0.0, 0, -1], (300, 1)))
+        np.testing.assert_allclose(out['throughput'][:100], 0.92, rtol=1e-6)
+        self.assertFalse(out['transmitted'][:100].any())
+        with tempfile.TemporaryDirectory() as d:
+            bad = os.path.join(d, 'bad.yaml')
+            with open(bad, 'w') as f:
+                f.write('materials:\n  X: { type: dielectric, ior: -2 }\n')
+            with self.assertRaisesRegex(ValueError, 'materials.X.ior'):
+                OpticalRegistry.load(bad)
+            with open(bad, 'w') as f:
+                f.write('materials:\n  X: { type: plastic }\n')
+            with self.assertRaisesRegex(ValueError, 'plastic'):
+                OpticalRegistry.load(bad)
+
+
+if __name__ == '__main__':
+    unittest.main()
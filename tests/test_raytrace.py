@@ -0,0 +1,135 @@
+import unittest
+import numpy as np
+
+
+def _grid_mesh(n=8, z=0.0):
+    # z 평면 위 [-1,1]^2 정사각형을 2 n^2 삼각형으로
+    xs = np.linspace(-1, 1, n + 1)
+    X, Y = np.meshgrid(xs, xs, indexing='ij')
+    V = np.stack([X.ravel(), Y.ravel(), np.full(X.size, z)], axis=1)
+    k = np.arange(n * (n + 1)).reshape(n, n + 1)[:, :n].ravel()
+    F = np.concatenate([np.stack([k, k + n + 1, k + 1], 1), np.stack([k + 1, k + n + 1, k + n + 2], 1)])
+    return V, F
+
+
+class TestCPUBuilder(unittest.TestCase):
+    def test_closest_hit_matches_brute_force(self):
+        from loda.raytrace.bvh import TriangleBLAS, intersect_triangles
+        rng = np.random.default_rng(0)
+        c = rng.uniform(-5, 5, (2000, 3))
+        tri = c[:, None, :] + rng.normal(0, 0.5, (2000, 3, 3))
+        b = TriangleBLAS(tri.reshape(-1, 3), np.arange(6000).reshape(-1, 3))
+        O = rng.uniform(-6, 6, (200, 3))
+        D = rng.normal(size=(200, 3))
+        t, prim, _ = b.intersect(O, D)
+        for k in range(200):
+            tt, _, _ = intersect_triangles(np.repeat(O[k:k+1], 2000, 0), np.repeat(D[k:k+1], 2000, 0), b.v0, b.e1, b.e2)
+            tt = np.where(tt >= 1e-6, tt, np.inf)
+            self.assertTrue(np.isclose(tt.min(), t[k]) or np.isinf(tt.min()) and np.isinf(t[k]))
+        _, prim_any, _ = b.intersect(O, D, any_hit=True)
+        np.testing.assert_array_equal(prim_any >= 0, prim >= 0)
+
+    def test_scene_instances(self):
+        from loda.geometry.occ_reader import SceneNode
+        from loda.raytrace.optix_builder import make_builder, CPUBuilder
+        from loda.config import Config
+        b = make_builder(Config(optix_enabled=False))
+        self.assertIsInstance(b, CPUBuilder)
+        b.build_blas({'PLATE': _grid_mesh()})
+        I = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+        up = SceneNode('UP', [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 5, 0, 0, 0, 1], [SceneNode('P1', I, [], mesh_ref='PLATE', label='LENS')])
+        root = SceneNode('ROOT', I, [up, SceneNode('P0', [2, 0, 0, 0, 0, 2, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1], [], mesh_ref='PLATE')])
+        b.build_tlas(root)
+        self.assertEqual(b.instance_names, ['P1', 'P0'])
+        O = np.array([[0.5, 0.5, 10.0], [1.5, 0.0, 10.0], [5.0, 0.0, 10.0]])
+        D = np.tile([0.0, 0.0, -1.0], (3, 1))
+        h = b.closest_hit(O, D)
+        np.testing.assert_allclose(h.t[:2], [5.0, 10.0])
+        np.testing.assert_array_equal(h.instance, [0, 1, -1])
+        np.testing.assert_allclose(np.abs(h.normal[0]), [0, 0, 1], atol=1e-9)
+        np.testing.assert_array_equal(b.any_hit(O, D, t_max=np.array([4.0, 11.0, 11.0])), [False, True, False])
+
+
+class TestWavefront(unittest.TestCase):
+    def test_mirror_scene_energy_balance(self):
+        from loda.geometry.occ_reader import SceneNode
+        from loda.optics.registry import OpticalRegistry
+        from loda.optics.sources import GaussianSource
+        from loda.optics.sensors import SphericalSensor
+        from loda.raytrace.optix_builder import CPUBuilder
+        from loda.raytrace.wavefront import WavefrontController
+        b = CPUBuilder()
+        b.build_blas({'PLATE': _grid_mesh(4)})
+        I = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+        b.build_tlas(SceneNode('ROOT', I, [SceneNode('R', [4, 0, 0, 0, 0, 4, 0, 0, 0, 0, 1, 5, 0, 0, 0, 1], [], mesh_ref='PLATE', label='REFLECTOR')]))
+        reg = OpticalRegistry.from_dict({'materials': {'REFLECTOR': {'type': 'mirror', 'reflectance': 0.9}}})
+        b.build_sbt(reg)
+        far = SphericalSensor(5.0, 10.0, 1e4)
+        wf = WavefrontController(3, b, seed=0)
+        res = wf.run(GaussianSource(20.0), 5000, sensors=[far])
+        self.assertAlmostEqual(res['escaped'] + res['absorbed'] + res['truncated'], res['emitted'], places=6)
+        self.assertAlmostEqual(float(far.buffer.sum()), res['escaped'], places=3)
+        hit = wf.stats['queue'][0]['hit']
+        self.assertGreater(hit, 4000)
+        # 반사된 광선은 아래 반구로 탈출, 반사율만큼 에너지 유지
+        self.assertAlmostEqual(float(far.buffer[19:].sum()), 0.9 * hit / 5000, places=3)
+        self.assertEqual(wf.stats['queue'][1]['escaped'], hit)
+        self.assertGreater(wf.stats['time']['intersect'], 0.0)
+
+    def test_spectral_coated_lens(self):
+        from loda.geometry.occ_reader import SceneNode
+        from loda.optics.registry import OpticalRegistry
+        from loda.optics.sources import GaussianSource
+        from loda.optics.sensors import SphericalSensor
+        from loda.raytrace.optix_builder import CPUBuilder
+        from loda.raytrace.wavefront import WavefrontController
+        self.assertRaises(RuntimeError, WavefrontController(2).run, GaussianSource(20.0), 10)
+        I = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+        back = {}
+        for coating in ('none', 'ar_550nm'):
+            b = CPUBuilder()
+            b.build_blas({'PLATE': _grid_mesh(4)})
+            b.build_tlas(SceneNode('ROOT', I, [SceneNode('L', [4, 0, 0, 0, 0, 4, 0, 0, 0, 0, 1, 3, 0, 0, 0, 1], [], mesh_ref='PLATE', label='LENS')]))
+            b.build_sbt(OpticalRegistry.from_dict({'materials': {'LENS': {'type': 'dielectric', 'ior': 1.5, 'abbe': 30.0, 'coating': coating}}}))
+            far = SphericalSensor(5.0, 10.0, 1e4, spectral_edges_nm=(380, 480, 580, 680, 780))
+            wf = WavefrontController(2, b, seed=0, n_lambda=4)
+            q = wf.generate(GaussianSource(10.0), 20000)
+            self.assertEqual(q.energy.shape, (20000, 4))
+            res = wf.run(sensors=[far], queue=q)
+            self.assertAlmostEqual(res['escaped'] + res['absorbed'] + res['truncated'], res['emitted'], places=6)
+            self.assertGreater(float(far.photometric.sum()), 0.0)
+            np.testing.assert_allclose(far.spectral.sum(axis=2), far.buffer, rtol=1e-4, atol=1e-7)
+            back[coating] = float(far.buffer[18:].sum())  # 반사되어 아래 반구로
+        # 비코팅 ~4%, AR 코팅은 훨씬 작음
+        self.assertAlmostEqual(back['none'], 0.04, delta=0.01)
+        self.assertLess(back['ar_550nm'], 0.5 * back['none'])
+
+    def test_parallel_matches_serial(self):
+        from loda.config import Config
+        from loda.geometry.occ_reader import SceneNode
+        from loda.optics.registry import OpticalRegistry
+        from loda.optics.sources import GaussianSource
+        from loda.optics.sensors import SphericalSensor
+        from loda.raytrace.optix_builder import CPUBuilder
+        from loda.raytrace.parallel import trace_parallel
+        b = CPUBuilder()
+        b.build_blas({'PLATE': _grid_mesh(4)})
+        I = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+        b.build_tlas(SceneNode('ROOT', I, [SceneNode('L', [2, 0, 0, 0, 0, 2, 0, 0, 0, 0, 1, 3, 0, 0, 0, 1], [], mesh_ref='PLATE', label='LENS')]))
+        b.build_sbt(OpticalRegistry.from_dict({'materials': {'LENS': {'type': 'dielectric', 'ior': 1.5}}}))
+        cfg = Config(seed=7, optix_max_bounces=2)
+        out = []
+        for w in (1, 3, 4):
+            far = SphericalSensor(5.0, 10.0, 1e4)
+            res = trace_parallel(cfg, b, GaussianSource(40.0), 3000, [far], n_workers=w, chunk_size=500)
+            out.append((far.buffer.copy(), res))
+        # chunk 순서 축소 → worker 수와 무관하게 비트 단위 동일
+        np.testing.assert_array_equal(out[0][0], out[1][0])
+        np.testing.assert_array_equal(out[0][0], out[2][0])
+        self.assertEqual(out[1][1]['n_workers'], 3)
+        self.assertAlmostEqual(out[1][1]['emitted'], 1.0, places=5)
+        self.assertEqual(out[0][1]['escaped'], out[1][1]['escaped'])
+
+
+if __name__ == '__main__':
+    unittest.main()